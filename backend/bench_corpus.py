@@ -0,0 +1,263 @@
+"""
+Corpus sintético de páginas de FourVenues
+=========================================
+Genera páginas de listado y de detalle parecidas a las reales para medir el
+scraper sin red (ver firecrawl_replay.py, bench_extract.py y bench_scale.py):
+
+- listado con enlaces aria-label (Luminata, Odiseo y la mayoría de venues)
+- listado con tarjetas data-testid (Dodo Club)
+- listado de Sala Rem: el html no trae enlaces, el markdown trae fechas y
+  nombres y el rawHtml es un bundle de varios MB con las URLs en el estado JS
+- detalle con og:image, aria-label de música, JSON-LD (ofertas, dirección,
+  coordenadas) y markdown con descripción y tickets
+
+Todo es determinista a partir de la semilla. Las respuestas tienen el mismo
+formato que los fixtures grabados con --record.
+"""
+
+import json
+import random
+import string
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from firecrawl_replay import DirectoryFixtures
+
+EVENT_NAMES = ['Fiesta Reggaeton', 'Noche Techno', 'Latin Session', 'Friday Session', 'Saturday Night',
+               'Remember 90s', 'House Afterwork', 'Electro Sunset', 'Fiesta Universitaria', 'Comercial Hits']
+GENRES = ['reggaeton', 'comercial', 'latin', 'techno', 'house', 'electro']
+CITIES = ['Murcia', 'Madrid', 'Valencia', 'Alicante', 'Sevilla', 'Málaga', 'Barcelona', 'Granada']
+MONTHS_ES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+             'septiembre', 'octubre', 'noviembre', 'diciembre']
+MONTHS_EN = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+DAYS_EN = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# Tamaño del rawHtml del listado de Sala Rem (el real ronda varios MB)
+SALA_REM_RAW_MB = 4.0
+
+# Marcado repetido de cabecera, pie y banner de cookies que acompaña a cada página
+_CHROME = (
+    '<header><nav>' + ''.join(f'<a href="/es/{s}">{s.title()}</a>' for s in ('inicio', 'eventos', 'contacto')) + '</nav></header>'
+    '<div class="cookie-banner"><p>Usamos cookies para mejorar tu experiencia.</p>'
+    '<button>Aceptar cookies</button><button>Rechazar cookies</button></div>'
+)
+_FOOTER = '<footer>' + '<p>Aviso legal · Política de privacidad · Política de cookies</p>' * 3 + '</footer>'
+
+
+def listing_kind(slug: str) -> str:
+    if 'sala-rem' in slug:
+        return 'sala-rem'
+    if slug == 'dodo-club':
+        return 'cards'
+    return 'aria'
+
+
+def synthetic_venues(count: int, seed: int = 0) -> List[Dict]:
+    """Catálogo de venues ficticios (mismo formato que venues.json)."""
+    rng = random.Random(f"venues:{seed}")
+    venues = []
+    for i in range(count):
+        slug = f"venue-{i + 1:04d}"
+        venues.append({
+            'slug': slug,
+            'nombre': f"Venue {i + 1}",
+            'ciudad': rng.choice(CITIES),
+            'url': f"https://site.fourvenues.com/es/{slug}/events",
+        })
+    return venues
+
+
+def _code(rng: random.Random) -> str:
+    # Códigos de 4 caracteres con letras y números, como los de FourVenues
+    while True:
+        code = ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(4))
+        if any(c.isalpha() for c in code) and any(c.isdigit() for c in code):
+            return code
+
+
+def _slugify(name: str) -> str:
+    return '-'.join(name.lower().split())
+
+
+class VenueEvents:
+    """Eventos sintéticos de un venue y sus páginas."""
+
+    def __init__(self, venue: Dict, count: int, seed: int = 0, today: date = None,
+                 sala_rem_raw_mb: float = SALA_REM_RAW_MB, used_codes: set = None):
+        self.venue = venue
+        self.slug = venue['slug']
+        self.kind = listing_kind(self.slug)
+        self.sala_rem_raw_mb = sala_rem_raw_mb
+        rng = random.Random(f"{seed}:{self.slug}")
+        today = today or date.today()
+        host = 'web' if self.kind == 'sala-rem' else 'site'
+        self.events = []
+        # Los códigos se deduplican entre venues: compartir used_codes evita que
+        # la deduplicación por código descarte eventos de venues distintos
+        codes = used_codes if used_codes is not None else set()
+        for i in range(count):
+            code = _code(rng)
+            while code in codes:
+                code = _code(rng)
+            codes.add(code)
+            day = today + timedelta(days=1 + i * 60 // max(count, 1) + rng.randint(0, 1))
+            name = rng.choice(EVENT_NAMES)
+            if self.kind == 'sala-rem':
+                name = f"{name.upper()} | SALA REM"
+                path = f"{_slugify(name.split(' | ')[0])}--sala-rem--{day.strftime('%d-%m-%Y')}-{code}"
+            else:
+                name = f"{name} {i + 1}"
+                path = code
+            self.events.append({
+                'code': code,
+                'name': name,
+                'date': day,
+                'url': f"https://{host}.fourvenues.com/es/{self.slug}/events/{path}",
+                'genres': rng.sample(GENRES, 2),
+                'prices': sorted(rng.sample([8, 10, 12, 15, 20, 25, 30, 50], 3)),
+                'sold_out': rng.random() < 0.15,
+            })
+        self.by_url = {e['url']: e for e in self.events}
+
+    # ----- Listado -----
+
+    def listing(self) -> Dict:
+        if self.kind == 'sala-rem':
+            return self._listing_sala_rem()
+        items = []
+        for e in self.events:
+            href = e['url'].split('fourvenues.com')[-1]
+            image = f'<img src="https://cdn.fourvenues.com/{self.slug}/{e["code"]}.jpg" alt="">'
+            if self.kind == 'cards':
+                items.append(f'<a href="{href}"><div data-testid="event-card">{image}'
+                             f'<span data-testid="event-card-name">{e["name"]}</span></div></a>')
+            else:
+                label = (f'Evento: {e["name"]}. Edad mínima: 18 años. '
+                         f'Fecha: {e["date"].day} {MONTHS_ES[e["date"].month - 1]}. Horario: de 23:30 a 06:00')
+                items.append(f'<div class="event-item"><a href="{href}" aria-label="{label}">{image}'
+                             f'<div class="event-info"><h3>{e["name"]}</h3><p>23:30</p></div></a></div>')
+        html = f'<html><head><title>{self.venue["nombre"]}</title></head><body>{_CHROME}<main>{"".join(items)}</main>{_FOOTER}</body></html>'
+        markdown = '\n'.join(f"[{e['name']}]({e['url']})" for e in self.events)
+        return _response(self.venue['url'], html, html, markdown)
+
+    def _listing_sala_rem(self) -> Dict:
+        # El listado real se pinta con JavaScript: el html no tiene enlaces a eventos
+        html = f'<html><head><title>Sala Rem</title></head><body>{_CHROME}<div id="app"></div>{_FOOTER}</body></html>'
+        lines = ['December 2025']
+        for e in self.events:
+            d = e['date']
+            lines += [f"## {DAYS_EN[d.weekday()]}{d.day}{MONTHS_EN[d.month - 1]}", e['name'], '23:30']
+        markdown = '\n'.join(lines)
+        state = ','.join(f'{{"name":"{e["name"]}","url":"{e["url"]}","code":"{e["code"]}"}}' for e in self.events)
+        target = int(self.sala_rem_raw_mb * 1024 * 1024)
+        chunk = 'function _0x{0:x}(a,b){{return a.map(function(c){{return c*b+{0}}})}};'
+        parts, size, i = [], 0, 0
+        while size < target:
+            piece = chunk.format(i)
+            parts.append(piece)
+            size += len(piece)
+            i += 1
+        bundle = ''.join(parts)
+        raw_html = (f'<html><head><title>Sala Rem</title><script>{bundle[:target // 2]}</script></head>'
+                    f'<body>{_CHROME}<div id="app"></div><script>window.__NUXT__={{"events":[{state}]}};</script>'
+                    f'<script>{bundle[target // 2:]}</script>{_FOOTER}</body></html>')
+        return _response(self.venue['url'], html, raw_html, markdown)
+
+    # ----- Detalle -----
+
+    def detail(self, url: str) -> Optional[Dict]:
+        e = self.by_url.get(url)
+        if e is None:
+            return None
+        image = f"https://cdn.fourvenues.com/{self.slug}/{e['code']}-cover.jpg"
+        offers = []
+        ticket_lines = []
+        for n, (kind, price) in enumerate(zip(['ENTRADA GENERAL', 'ENTRADA + 2 COPAS', 'RESERVADO VIP'], e['prices'])):
+            token_rng = random.Random(f"{e['code']}:{n}")
+            token = ''.join(token_rng.choice(string.ascii_lowercase + string.digits) for _ in range(24))
+            availability = 'https://schema.org/OutOfStock' if e['sold_out'] and n == 0 else 'https://schema.org/InStock'
+            offers.append({'@type': 'Offer', 'name': kind, 'price': price, 'priceCurrency': 'EUR',
+                           'url': f"https://{url.split('/')[2]}/es/{self.slug}/tickets/{token}",
+                           'availability': availability})
+            ticket_lines += [f"- {kind}", f"{n + 1} copa incluida" if n else "Acceso hasta las 02:00",
+                             f"{price} €"] + (['Agotadas'] if e['sold_out'] and n == 0 else [])
+        json_ld = {
+            '@context': 'https://schema.org', '@type': 'Event', 'name': e['name'], 'image': image,
+            'startDate': f"{e['date'].isoformat()}T23:30:00+01:00",
+            'location': {'@type': 'Place', 'name': self.venue['nombre'],
+                         'address': {'@type': 'PostalAddress', 'streetAddress': 'Calle Mayor 1',
+                                     'addressLocality': self.venue.get('ciudad', 'Murcia'), 'postalCode': '30001'},
+                         'geo': {'@type': 'GeoCoordinates', 'latitude': 37.98, 'longitude': -1.13}},
+            'offers': offers,
+        }
+        body = (f'<main><img class="cover" src="{image}"><h1>{e["name"]}</h1>'
+                f'<span aria-label="Música: {", ".join(e["genres"])}">{" · ".join(e["genres"])}</span>'
+                + ''.join(f'<div class="ticket"><h4>{o["name"]}</h4><span>{o["price"]} €</span></div>' for o in offers)
+                + '</main>')
+        head = f'<title>{e["name"]}</title><meta property="og:image" content="{image}">'
+        script = f'<script type="application/ld+json">{json.dumps(json_ld, ensure_ascii=False)}</script>'
+        html = f'<html><head>{head}{script}</head><body>{_CHROME}{body}{_FOOTER}</body></html>'
+        # rawHtml trae además los scripts de la app
+        raw_html = (f'<html><head>{head}{script}<script src="/_nuxt/app.js"></script></head>'
+                    f'<body>{_CHROME}{body}<script>window.__NUXT__={{"code":"{e["code"]}"}};</script>{_FOOTER}</body></html>')
+        description = (f"{e['name']} en {self.venue['nombre']}. La mejor música {' y '.join(e['genres'])} "
+                       f"toda la noche con los DJs residentes. Dress code: arreglado. No se permite la entrada "
+                       f"con ropa deportiva.")
+        markdown = '\n'.join([f"# {e['name']}", '', description, '', '## Entradas', ''] + ticket_lines
+                             + ['', 'Edad mínima: 18 años'])
+        return _response(url, html, raw_html, markdown)
+
+
+def _response(url: str, html: str, raw_html: str, markdown: str, status: int = 200) -> Dict:
+    return {
+        'html': html,
+        'raw_html': raw_html,
+        'markdown': markdown,
+        'links': None,
+        'metadata': {'status_code': status, 'source_url': url},
+    }
+
+
+class SyntheticFixtures:
+    """
+    Fuente de fixtures para ReplayFirecrawl que genera cada página al pedirla
+    (no guarda nada: sirve para miles de venues sin ocupar memoria).
+    """
+
+    def __init__(self, venues: List[Dict], events_per_venue: int, seed: int = 0,
+                 sala_rem_raw_mb: float = SALA_REM_RAW_MB, today: date = None):
+        self.venues = {}
+        self.by_listing = {}
+        used_codes = set()
+        for venue in venues:
+            events = VenueEvents(venue, events_per_venue, seed, today=today, sala_rem_raw_mb=sala_rem_raw_mb,
+                                 used_codes=used_codes)
+            self.venues[venue['slug']] = events
+            self.by_listing[venue['url']] = events
+
+    def responses(self, url: str) -> List[Dict]:
+        if url in self.by_listing:
+            return [self.by_listing[url].listing()]
+        parts = url.split('/')
+        venue = self.venues.get(parts[4]) if len(parts) > 4 else None
+        page = venue.detail(url) if venue else None
+        return [page] if page else []
+
+    def urls(self) -> List[str]:
+        urls = []
+        for events in self.venues.values():
+            urls.append(events.venue['url'])
+            urls.extend(e['url'] for e in events.events)
+        return urls
+
+
+def write_corpus(out_dir: Path, venues: List[Dict], events_per_venue: int, seed: int = 0,
+                 sala_rem_raw_mb: float = SALA_REM_RAW_MB, today: date = None) -> DirectoryFixtures:
+    """Escribe en disco el corpus sintético, en el formato de --record."""
+    source = SyntheticFixtures(venues, events_per_venue, seed, sala_rem_raw_mb, today)
+    fixtures = DirectoryFixtures(out_dir)
+    for url in source.urls():
+        for response in source.responses(url):
+            fixtures.record(url, response)
+    return fixtures
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks de las funciones de extracción
+==============================================
+Mide, venue a venue sobre un corpus de páginas de listado y de detalle:
+
+- extract_events_from_html: listado, con el mismo HTML que le pasa scrape_venue
+  (en Sala Rem, el rawHtml de varios MB)
+- extract_tickets_from_schema: JSON-LD de las páginas de detalle
+- parse_event_details: markdown de tickets, imagen, tags y venue
+- transform_to_app_format: eventos ya completados
+
+Por caso informa la mediana y el mínimo de tiempo y el pico de memoria
+asignada (tracemalloc), y los compara con la línea base guardada: si alguno
+empeora más que el umbral, termina con código 1.
+
+El corpus es un directorio de fixtures en el formato de --record (páginas
+reales) o, por defecto, el corpus sintético de bench_corpus.py, que se genera
+en data/bench_corpus la primera vez. Fechas del corpus y de la extracción van
+referidas a CORPUS_DAY, así los resultados no dependen del día en que se mide.
+
+Uso:
+    python bench_extract.py                      # comparar con bench_baseline.json
+    python bench_extract.py --corpus fixtures/   # corpus grabado con --record
+    python bench_extract.py --save-baseline      # guardar los resultados como línea base
+    python bench_extract.py --only sala-rem --repeat 10 --threshold 0.5
+"""
+
+import argparse
+import contextlib
+import copy
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import scraper_firecrawl as scraper
+from bench_corpus import SALA_REM_RAW_MB, write_corpus
+from firecrawl_replay import open_fixtures
+from date_normalizer import DateNormalizer
+from html_document import clear_cache, default_backend
+
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+CORPUS_DIR = scraper.DATA_DIR / "bench_corpus"
+CORPUS_EVENTS_PER_VENUE = 12
+# Día de referencia fijo del corpus sintético y de la extracción
+CORPUS_DAY = date(2026, 10, 1)
+
+DEFAULT_REPEAT = 7
+# Empeoramiento tolerado respecto a la línea base (0.5 = 50 %). El tiempo
+# varía bastante entre ejecuciones en máquinas compartidas; la memoria, medida
+# sin el recolector de ciclos, es estable y admite un umbral más estricto
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_MEMORY_THRESHOLD = 0.25
+# Por debajo de esta diferencia absoluta el tiempo se considera ruido
+MIN_DELTA_S = 0.002
+# Pasadas al guardar la línea base: se guarda la peor, para que una pasada con
+# suerte no deje una línea base que la misma máquina no vuelve a alcanzar
+BASELINE_PASSES = 3
+
+
+def load_corpus(corpus_dir: Path) -> Dict[str, Dict]:
+    """
+    Agrupa los fixtures por venue: {slug: {'listing': (url, página), 'details': [(url, página), ...]}}.
+    De cada URL se usa la última respuesta grabada (la buena tras los reintentos).
+    """
+    fixtures = open_fixtures(corpus_dir)
+    venues: Dict[str, Dict] = {}
+    for url in fixtures.urls():
+        responses = fixtures.responses(url)
+        if not responses or (responses[-1].get('metadata') or {}).get('status_code', 200) >= 400:
+            continue
+        parts = url.split('/')
+        if len(parts) < 6:
+            continue
+        venue = venues.setdefault(parts[4], {'listing': None, 'details': []})
+        if url.rstrip('/').endswith('/events'):
+            venue['listing'] = (url, responses[-1])
+        else:
+            venue['details'].append((url, responses[-1]))
+    return venues
+
+
+def _detail_event(url: str, listing_events: List[Dict], slug: str) -> Dict:
+    code = url.rstrip('/').split('/')[-1].split('-')[-1]
+    for event in listing_events:
+        if event.get('code') == code or event.get('url', '').endswith(code):
+            return dict(event, url=url)
+    return {'url': url, 'venue_slug': slug, 'name': f"Evento {code}", 'code': code}
+
+
+def build_cases(venues: Dict[str, Dict], only: Optional[str] = None) -> List[Dict]:
+    """
+    Casos de benchmark: {'name', 'fn', 'setup', 'items'}. setup() prepara los
+    argumentos de cada repetición fuera del tiempo medido.
+    """
+    cases = []
+    for slug, venue in sorted(venues.items()):
+        if only and only not in slug:
+            continue
+        listing_events = []
+        if venue['listing']:
+            url, page = venue['listing']
+            html, raw_html = page.get('html') or '', page.get('raw_html') or ''
+            args = (scraper.listing_html(url, html, raw_html), url, page.get('markdown'), raw_html, CORPUS_DAY)
+            cases.append({'name': f"extract_events_from_html[{slug}]", 'items': 1,
+                          'fn': lambda args=args: scraper.extract_events_from_html(*args)})
+            with _quiet():
+                listing_events = scraper.extract_events_from_html(*args)
+
+        pages = [{'url': url, 'html': p.get('html') or '', 'raw_html': p.get('raw_html') or p.get('html') or '',
+                  'markdown': p.get('markdown') or ''} for url, p in venue['details']]
+        if not pages:
+            continue
+        events = [_detail_event(page['url'], listing_events, slug) for page in pages]
+
+        def tickets(pages=pages):
+            for page in pages:
+                scraper.extract_tickets_from_schema(page['raw_html'])
+
+        def details(events, pages=pages):
+            for event, page in zip(events, pages):
+                scraper.parse_event_details(event, page)
+
+        with _quiet():
+            parsed = [scraper.parse_event_details(copy.deepcopy(e), p) for e, p in zip(events, pages)]
+
+        cases.append({'name': f"extract_tickets_from_schema[{slug}]", 'items': len(pages), 'fn': tickets})
+        cases.append({'name': f"parse_event_details[{slug}]", 'items': len(pages), 'fn': details,
+                      'setup': lambda events=events: (copy.deepcopy(events),)})
+        cases.append({'name': f"transform_to_app_format[{slug}]", 'items': len(parsed),
+                      'fn': scraper.transform_to_app_format,
+                      'setup': lambda parsed=parsed: (copy.deepcopy(parsed), DateNormalizer.for_day(CORPUS_DAY))})
+    return cases
+
+
+@contextlib.contextmanager
+def _quiet():
+    # Los prints del scraper cuestan lo mismo contra /dev/null y no ensucian el informe
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(fn: Callable, setup: Callable = None, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """
+    Tiempo (mediana y mínimo de `repeat` ejecuciones) y memoria (una ejecución
+    más bajo tracemalloc, que la ralentiza). Cada ejecución empieza con la caché
+    de documentos vacía.
+    """
+    times = []
+    with _quiet():
+        # Calentamiento: regex compiladas, imports perezosos, cachés de bs4
+        fn(*(setup() if setup else ()))
+        for _ in range(repeat):
+            args = setup() if setup else ()
+            clear_cache()
+            # Que no se cobre en esta repetición la basura cíclica de las anteriores
+            gc.collect()
+            started = time.perf_counter()
+            fn(*args)
+            times.append(time.perf_counter() - started)
+
+        args = setup() if setup else ()
+        clear_cache()
+        # Sin el recolector de ciclos el pico no depende de cuándo salta (los
+        # árboles de bs4 son cíclicos): la misma entrada da siempre el mismo pico
+        gc.collect()
+        gc.disable()
+        try:
+            tracemalloc.start()
+            fn(*args)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            gc.enable()
+    return {
+        'median_s': round(statistics.median(times), 6),
+        'min_s': round(min(times), 6),
+        'peak_bytes': peak,
+        'retained_bytes': retained,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float,
+            memory_threshold: float = DEFAULT_MEMORY_THRESHOLD) -> List[str]:
+    """
+    Casos que empeoran (tiempo o memoria) más que el umbral respecto a la línea
+    base. El tiempo se compara por el mínimo, que es lo menos sensible al ruido
+    de otros procesos.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if (result['min_s'] > base['min_s'] * (1 + threshold)
+                and result['min_s'] - base['min_s'] > MIN_DELTA_S):
+            regressions.append(f"{name}: tiempo {base['min_s'] * 1000:.1f} -> {result['min_s'] * 1000:.1f} ms")
+        if result['peak_bytes'] > base['peak_bytes'] * (1 + memory_threshold):
+            regressions.append(f"{name}: memoria {base['peak_bytes'] / 1e6:.2f} -> {result['peak_bytes'] / 1e6:.2f} MB")
+    return regressions
+
+
+def _delta(current: float, base: Optional[float]) -> str:
+    if not base:
+        return '     -'
+    return f"{(current - base) / base * 100:+5.0f}%"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Microbenchmarks de las funciones de extracción')
+    parser.add_argument('--corpus', metavar='DIR', help=f'Directorio de fixtures (por defecto el sintético en {CORPUS_DIR})')
+    parser.add_argument('--regenerate', action='store_true', help='Regenerar el corpus sintético')
+    parser.add_argument('--sala-rem-mb', type=float, default=SALA_REM_RAW_MB, help=f'Tamaño del rawHtml sintético de Sala Rem (por defecto {SALA_REM_RAW_MB} MB)')
+    parser.add_argument('--only', metavar='SLUG', help='Solo los venues cuyo slug contiene este texto')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f'Repeticiones por caso (por defecto {DEFAULT_REPEAT})')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), metavar='FICHERO', help='Línea base con la que comparar')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help=f'Empeoramiento de tiempo tolerado (por defecto {DEFAULT_THRESHOLD})')
+    parser.add_argument('--memory-threshold', type=float, default=DEFAULT_MEMORY_THRESHOLD, help=f'Empeoramiento de memoria tolerado (por defecto {DEFAULT_MEMORY_THRESHOLD})')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como línea base')
+    parser.add_argument('--baseline-passes', type=int, default=BASELINE_PASSES, metavar='N', help=f'Pasadas con --save-baseline; se guarda la peor (por defecto {BASELINE_PASSES})')
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus) if args.corpus else CORPUS_DIR
+    # Un corpus generado con otro día de referencia (o sin él) se regenera
+    stamp = corpus_dir / 'corpus_day.txt'
+    stale = not stamp.exists() or stamp.read_text(encoding='utf-8').strip() != CORPUS_DAY.isoformat()
+    if not args.corpus and (args.regenerate or stale or not any(corpus_dir.glob('*.json'))):
+        print(f"🧪 Generando corpus sintético en {corpus_dir} (día {CORPUS_DAY})...")
+        for old in corpus_dir.glob('*.json'):
+            old.unlink()
+        write_corpus(corpus_dir, scraper.VENUE_CATALOG, CORPUS_EVENTS_PER_VENUE, sala_rem_raw_mb=args.sala_rem_mb,
+                     today=CORPUS_DAY)
+        stamp.write_text(CORPUS_DAY.isoformat(), encoding='utf-8')
+
+    venues = load_corpus(corpus_dir)
+    if not venues:
+        print(f"❌ Corpus vacío: {corpus_dir}")
+        return 1
+
+    # Con PARTYFINDER_DEBUG_LOG=1 debug_log escribe una línea por línea de markdown: en un fichero temporal
+    log_dir = tempfile.TemporaryDirectory()
+    scraper.LOG_PATH = Path(log_dir.name) / "debug.log"
+
+    cases = build_cases(venues, args.only)
+    print(f"⏱️ {len(cases)} casos sobre {len(venues)} venues (parser HTML: {default_backend()}, {args.repeat} repeticiones)\n")
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        baseline = stored.get('results', {})
+        if stored.get('machine') != platform.machine() or stored.get('python') != platform.python_version():
+            print(f"   ⚠️ Línea base de otra máquina ({stored.get('machine')}, Python {stored.get('python')}): compara con cautela\n")
+
+    results = {}
+    print(f"{'caso':<48} {'items':>5} {'mediana':>10} {'mínimo':>10} {'Δ':>6} {'pico mem':>10} {'Δ':>6}")
+    passes = max(1, args.baseline_passes) if args.save_baseline else 1
+    for case in cases:
+        runs = [measure(case['fn'], case.get('setup'), args.repeat) for _ in range(passes)]
+        result = max(runs, key=lambda r: r['min_s'])
+        result['peak_bytes'] = max(r['peak_bytes'] for r in runs)
+        result['items'] = case['items']
+        results[case['name']] = result
+        base = baseline.get(case['name'], {})
+        print(f"{case['name']:<48} {case['items']:>5} {result['median_s'] * 1000:>8.1f}ms "
+              f"{result['min_s'] * 1000:>8.1f}ms {_delta(result['min_s'], base.get('min_s'))} {result['peak_bytes'] / 1e6:>8.2f}MB {_delta(result['peak_bytes'], base.get('peak_bytes'))}")
+
+    log_dir.cleanup()
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'machine': platform.machine(),
+                'python': platform.python_version(),
+                'html_parser': default_backend(),
+                'corpus': str(args.corpus or 'sintético'),
+                'results': results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Línea base guardada: {baseline_path}")
+        return 0
+
+    if not baseline:
+        print(f"\n⚠️ Sin línea base ({baseline_path}); guárdala con --save-baseline")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    limits = f"umbral {args.threshold:.0%} tiempo, {args.memory_threshold:.0%} memoria"
+    if regressions:
+        print(f"\n❌ {len(regressions)} regresiones ({limits}):")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print(f"\n✅ Sin regresiones ({limits})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
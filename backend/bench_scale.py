@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escala de extremo a extremo
+========================================
+Genera venues y eventos sintéticos parecidos a los de FourVenues (ver
+bench_corpus.py), los sirve con el backend de replay de Firecrawl y ejecuta el
+camino completo: scrape_all_events -> transform_to_app_format -> subida por
+lotes (upsert_events + delete_events_except) a un Firestore en memoria.
+
+Informa de:
+- rendimiento: eventos/s y páginas/s de principio a fin
+- latencia por etapa (p50 / p99 / total) a partir de los spans de tracing.py
+- pico de memoria residente (RSS) del proceso y de los procesos del pool
+
+Sirve para conocer los límites antes de añadir ciudades:
+
+    python bench_scale.py                               # 1.000 venues x 50 eventos
+    python bench_scale.py --venues 200 --events 20 --latency 800+400 --fetch-workers 8
+    python bench_scale.py --debug-log --output data/bench_scale.json
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import scraper_firecrawl as scraper
+from bench_corpus import SyntheticFixtures, synthetic_venues
+from firecrawl_replay import parse_latency
+from tracing import TRACER
+
+DEFAULT_VENUES = 1000
+DEFAULT_EVENTS = 50
+FIRESTORE_BATCH_LIMIT = 500
+
+
+# ----- Firestore en memoria -----
+
+class _Snapshot:
+    def __init__(self, reference: '_DocumentRef'):
+        self.reference = reference
+        self.id = reference.id
+
+    def to_dict(self) -> Dict:
+        return dict(self.reference._collection.docs[self.id])
+
+
+class _DocumentRef:
+    def __init__(self, collection: '_Collection', doc_id: str):
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data: Dict):
+        self._collection.db._apply([('set', self, data)])
+
+    def delete(self):
+        self._collection.db._apply([('delete', self, None)])
+
+
+class _Collection:
+    def __init__(self, db: 'InMemoryFirestore'):
+        self.db = db
+        self.docs: Dict[str, Dict] = {}
+
+    def document(self, doc_id: str = None) -> _DocumentRef:
+        return _DocumentRef(self, doc_id or uuid.uuid4().hex[:20])
+
+    def stream(self):
+        with self.db._lock:
+            ids = list(self.docs)
+        return [_Snapshot(_DocumentRef(self, doc_id)) for doc_id in ids]
+
+
+class _Batch:
+    def __init__(self, db: 'InMemoryFirestore'):
+        self.db = db
+        self.ops = []
+
+    def set(self, reference: _DocumentRef, data: Dict):
+        self.ops.append(('set', reference, data))
+
+    def delete(self, reference: _DocumentRef):
+        self.ops.append(('delete', reference, None))
+
+    def commit(self):
+        if len(self.ops) > FIRESTORE_BATCH_LIMIT:
+            raise ValueError(f"Un batch de Firestore admite como máximo {FIRESTORE_BATCH_LIMIT} escrituras")
+        self.db._apply(self.ops)
+        self.db.stats['commits'] += 1
+        self.ops = []
+
+
+class InMemoryFirestore:
+    """
+    Sustituto en memoria del cliente de Firestore con lo que usa
+    firebase_config.py: collection(), document(), batch() y stream().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: Dict[str, _Collection] = {}
+        self.stats = {'writes': 0, 'deletes': 0, 'commits': 0}
+
+    def collection(self, name: str) -> _Collection:
+        with self._lock:
+            return self._collections.setdefault(name, _Collection(self))
+
+    def batch(self) -> _Batch:
+        return _Batch(self)
+
+    def _apply(self, ops):
+        with self._lock:
+            for op, reference, data in ops:
+                if op == 'set':
+                    reference._collection.docs[reference.id] = dict(data)
+                    self.stats['writes'] += 1
+                else:
+                    reference._collection.docs.pop(reference.id, None)
+                    self.stats['deletes'] += 1
+
+    def count(self, name: str) -> int:
+        return len(self.collection(name).docs)
+
+
+def firestore_sink(db: InMemoryFirestore):
+    """
+    (upsert, delete_except) contra el Firestore en memoria. Usa el código real
+    de firebase_config.py si firebase-admin está instalado; si no, una copia
+    mínima con los mismos IDs y lotes.
+    """
+    try:
+        import firebase_config
+        firebase_config.get_db = lambda: db
+        return firebase_config.upsert_events, firebase_config.delete_events_except
+    except ImportError as e:
+        print(f"   ⚠️ firebase_config no disponible ({e}): se usa una subida equivalente sin firebase-admin")
+
+    def upsert(events_data):
+        batch = db.batch()
+        ids = []
+        for item in events_data:
+            event_dict = dict(item.get('evento', item))
+            doc_id = hashlib.sha1((event_dict.get('url_evento') or '').encode('utf-8')).hexdigest()[:20]
+            batch.set(db.collection('eventos').document(doc_id), event_dict)
+            ids.append(doc_id)
+        batch.commit()
+        return ids
+
+    def delete_except(keep_ids):
+        keep_ids = set(keep_ids)
+        batch = db.batch()
+        for doc in db.collection('eventos').stream():
+            if doc.id not in keep_ids:
+                batch.delete(doc.reference)
+                if len(batch.ops) == FIRESTORE_BATCH_LIMIT:
+                    batch.commit()
+                    batch = db.batch()
+        batch.commit()
+
+    return upsert, delete_except
+
+
+# ----- Latencias por etapa -----
+
+class SpanCollector:
+    """
+    Vacía periódicamente los spans del tracer y se queda solo con las
+    duraciones por nombre, para que la traza no crezca durante toda la ejecución.
+    Cada `progress_s` segundos imprime el avance en stderr.
+    """
+
+    def __init__(self, progress_s: float = 10.0, progress_span: str = 'scrape_event_details'):
+        self.durations: Dict[str, List[float]] = {}
+        self.progress_s = progress_s
+        self.progress_span = progress_span
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='span-collector', daemon=True)
+        self._started = time.monotonic()
+
+    def start(self):
+        TRACER.enable()
+        self._thread.start()
+
+    def _collect(self):
+        for span in TRACER.drain():
+            self.durations.setdefault(span['name'], []).append(span['dur_ns'] / 1e9)
+
+    def _loop(self):
+        last_report = time.monotonic()
+        while not self._stop.wait(0.5):
+            self._collect()
+            if time.monotonic() - last_report >= self.progress_s:
+                last_report = time.monotonic()
+                done = len(self.durations.get(self.progress_span, []))
+                print(f"   ... {time.monotonic() - self._started:6.0f}s  {done} detalles", file=sys.stderr)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._collect()
+        TRACER.enabled = False
+
+    def summary(self) -> Dict[str, Dict]:
+        result = {}
+        for name, values in self.durations.items():
+            values = sorted(values)
+            result[name] = {
+                'count': len(values),
+                'p50_ms': round(_percentile(values, 0.50) * 1000, 2),
+                'p99_ms': round(_percentile(values, 0.99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+                'total_s': round(sum(values), 2),
+            }
+        return result
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Pico de RSS del proceso y de sus hijos (pool de parseo). No disponible en Windows."""
+    try:
+        import resource
+    except ImportError:
+        return {}
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 1e6, 1),
+    }
+
+
+# ----- Ejecución -----
+
+def run_benchmark(venue_count: int, events_per_venue: int, fetch_workers: int, parse_workers: int,
+                  latency: str = '0', failure_rate: float = 0.0, seed: int = 0,
+                  include_catalog: bool = False, debug_log: bool = False) -> Dict:
+    venues = synthetic_venues(venue_count, seed)
+    if include_catalog:
+        venues = scraper.VENUE_CATALOG + venues
+    started = time.monotonic()
+    fixtures = SyntheticFixtures(venues, events_per_venue, seed)
+    setup_s = time.monotonic() - started
+
+    work_dir = tempfile.TemporaryDirectory()
+    scraper.DATA_DIR = Path(work_dir.name)
+    scraper.LOG_PATH = Path(work_dir.name) / "debug.log"
+    # El log de depuración va desactivado salvo que se quiera medir su coste (también en el pool)
+    scraper.DEBUG_LOG = debug_log
+    os.environ[scraper.DEBUG_LOG_ENV] = '1' if debug_log else '0'
+    scraper.FIRECRAWL_BACKEND['replay'] = fixtures
+    scraper.FIRECRAWL_BACKEND['replay_options'] = {**parse_latency(latency), 'failure_rate': failure_rate, 'seed': seed}
+
+    db = InMemoryFirestore()
+    upsert, delete_except = firestore_sink(db)
+    collector = SpanCollector()
+    collector.start()
+    phases = {}
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.monotonic()
+        raw_events = scraper.scrape_all_events(
+            urls=[v['url'] for v in venues], data_dir=Path(work_dir.name),
+            fetch_workers=fetch_workers, parse_workers=parse_workers)
+        phases['scrape_s'] = time.monotonic() - started
+
+        started = time.monotonic()
+        transformed = scraper.transform_to_app_format(raw_events)
+        phases['transform_s'] = time.monotonic() - started
+
+        started = time.monotonic()
+        uploaded = []
+        for i in range(0, len(transformed), scraper.SINK_BATCH_SIZE):
+            with TRACER.span('subir_lote', 'firestore'):
+                uploaded.extend(upsert(transformed[i:i + scraper.SINK_BATCH_SIZE]))
+        with TRACER.span('borrar_obsoletos', 'firestore'):
+            delete_except(uploaded)
+        phases['sink_s'] = time.monotonic() - started
+    collector.stop()
+    work_dir.cleanup()
+
+    total_s = sum(phases.values())
+    calls = len(scraper.METRICS.calls)
+    return {
+        'venues': len(venues),
+        'events_per_venue': events_per_venue,
+        'fetch_workers': fetch_workers,
+        'parse_workers': parse_workers,
+        'latency': latency,
+        'failure_rate': failure_rate,
+        'debug_log': debug_log,
+        'setup_s': round(setup_s, 2),
+        'phases_s': {k: round(v, 2) for k, v in phases.items()},
+        'total_s': round(total_s, 2),
+        'events_scraped': len(raw_events),
+        'events_expected': len(venues) * events_per_venue,
+        'events_stored': db.count('eventos'),
+        'firecrawl_calls': calls,
+        'events_per_s': round(len(raw_events) / total_s, 1) if total_s else None,
+        'pages_per_s': round(calls / phases['scrape_s'], 1) if phases['scrape_s'] else None,
+        'firestore': dict(db.stats),
+        'stages': collector.summary(),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n📈 {report['venues']} venues x {report['events_per_venue']} eventos "
+          f"(fetch_workers={report['fetch_workers']}, parse_workers={report['parse_workers']}, latencia={report['latency']})")
+    print(f"   Eventos: {report['events_scraped']}/{report['events_expected']} scrapeados, "
+          f"{report['events_stored']} en Firestore ({report['firestore']['commits']} commits)")
+    phases = report['phases_s']
+    print(f"   Tiempo: {report['total_s']:.1f}s (scrape {phases['scrape_s']:.1f}s, transformar {phases['transform_s']:.1f}s, "
+          f"subir {phases['sink_s']:.1f}s; generar corpus {report['setup_s']:.1f}s)")
+    print(f"   Rendimiento: {report['events_per_s']} eventos/s, {report['pages_per_s']} páginas/s "
+          f"({report['firecrawl_calls']} llamadas a Firecrawl)")
+    rss = report['peak_rss_mb']
+    if rss:
+        print(f"   Pico de RSS: {rss['self']:.0f} MB (procesos del pool: {rss['children']:.0f} MB)")
+
+    print(f"\n{'etapa':<30} {'llamadas':>9} {'p50':>10} {'p99':>10} {'máx':>10} {'total':>9}")
+    for name, s in sorted(report['stages'].items(), key=lambda item: item[1]['total_s'], reverse=True):
+        print(f"{name:<30} {s['count']:>9} {s['p50_ms']:>8.1f}ms {s['p99_ms']:>8.1f}ms {s['max_ms']:>8.1f}ms {s['total_s']:>8.1f}s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark de escala con venues y eventos sintéticos')
+    parser.add_argument('--venues', type=int, default=DEFAULT_VENUES, help=f'Venues sintéticos (por defecto {DEFAULT_VENUES})')
+    parser.add_argument('--events', type=int, default=DEFAULT_EVENTS, help=f'Eventos por venue (por defecto {DEFAULT_EVENTS})')
+    parser.add_argument('--include-catalog', action='store_true', help='Añadir los venues de venues.json (incluye el rawHtml de Sala Rem)')
+    parser.add_argument('--fetch-workers', type=int, default=scraper.FETCH_WORKERS, help=f'Scrapes simultáneos (por defecto {scraper.FETCH_WORKERS})')
+    parser.add_argument('--parse-workers', type=int, help='Procesos de parseo (por defecto uno por núcleo; 1 = en línea)')
+    parser.add_argument('--latency', default='0', metavar='MS', help="Latencia simulada de Firecrawl: ms fijos o 'ms+jitter' (por defecto 0)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Probabilidad de fallo inyectado por llamada')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla del corpus, la latencia y los fallos')
+    parser.add_argument('--debug-log', action='store_true', help='Activar debug_log para medir cuánto cuesta')
+    parser.add_argument('--output', metavar='FICHERO', help='Guardar el informe en JSON')
+    args = parser.parse_args()
+
+    print(f"🏗️  Benchmark de escala: {args.venues} venues x {args.events} eventos...")
+    report = run_benchmark(args.venues, args.events, args.fetch_workers, args.parse_workers,
+                           latency=args.latency, failure_rate=args.failure_rate, seed=args.seed,
+                           include_catalog=args.include_catalog, debug_log=args.debug_log)
+    print_report(report)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Informe: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
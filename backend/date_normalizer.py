@@ -0,0 +1,138 @@
+"""
+Normalización de fechas de eventos
+==================================
+Una sola referencia temporal por ejecución para todas las decisiones de fecha
+(deduplicación, orden, niveles de refresco y transformación), así el cambio de
+año es el mismo en todas partes: un mes anterior al actual es del año siguiente.
+
+Fuentes de la fecha de un evento, en orden de fiabilidad:
+- _date_parts: día, mes y año ya separados (URL o markdown de Sala Rem)
+- date_text: "26 diciembre", "3 ene" (aria-label del listado)
+- la URL: .../friday-session--sala-rem--26-12-2025-EI7Q
+
+Los patrones están precompilados y los textos ya vistos se resuelven desde una
+caché (en un listado se repiten mucho: "27 diciembre", "28 diciembre"...).
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+MONTHS = {'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
+          'jul': 7, 'ago': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dic': 12}
+MONTHS_EN = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+             'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12}
+MONTH_NAMES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+               'septiembre', 'octubre', 'noviembre', 'diciembre']
+
+_DATE_TEXT = re.compile(r'(\d{1,2})\s+(\w+)')
+_URL_DATE = re.compile(r'--(\d{1,2})-(\d{2})-(\d{4})-')
+
+# Horas de inicio que pertenecen a la noche del día anterior
+MIDNIGHT_STARTS = {'00:00', '0:00'}
+
+
+class DateNormalizer:
+    """
+    Resuelve fechas de eventos respecto a un instante de referencia fijo
+    (por defecto, el momento en que se crea).
+    """
+
+    def __init__(self, reference: datetime = None):
+        self.reference = reference or datetime.now()
+        self.today = self.reference.date()
+        self._text_cache: Dict[str, Optional[date]] = {}
+        self._url_cache: Dict[str, Optional[date]] = {}
+
+    @classmethod
+    @lru_cache(maxsize=4)
+    def for_day(cls, today: date) -> 'DateNormalizer':
+        """Normalizador compartido para un día (mantiene la caché entre llamadas)."""
+        return cls(datetime.combine(today, datetime.min.time()))
+
+    def year_for(self, month: int) -> int:
+        # Si el mes ya pasó, es del año siguiente
+        return self.today.year + 1 if month < self.today.month else self.today.year
+
+    # ----- Fuentes -----
+
+    @staticmethod
+    def from_parts(parts: Dict) -> Optional[date]:
+        try:
+            return date(int(parts['year']), int(parts['month']), int(parts['day']))
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    def from_text(self, text: str) -> Optional[date]:
+        if text in self._text_cache:
+            return self._text_cache[text]
+        result = None
+        match = _DATE_TEXT.search(text)
+        if match:
+            month = MONTHS.get(match.group(2).lower()[:3])
+            if month:
+                try:
+                    result = date(self.year_for(month), month, int(match.group(1)))
+                except ValueError:
+                    pass
+        self._text_cache[text] = result
+        return result
+
+    def from_url(self, url: str) -> Optional[date]:
+        match = _URL_DATE.search(url)
+        if not match:
+            return None
+        key = match.group(0)
+        if key not in self._url_cache:
+            try:
+                self._url_cache[key] = date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+            except ValueError:
+                self._url_cache[key] = None
+        return self._url_cache[key]
+
+    def from_day_month(self, day: int, month_abbr: str) -> Optional[date]:
+        """Día + mes abreviado en inglés (markdown de Sala Rem: "Fri26Dec")."""
+        month = MONTHS_EN.get(month_abbr.lower()[:3])
+        if not month:
+            return None
+        try:
+            return date(self.year_for(month), month, int(day))
+        except ValueError:
+            return None
+
+    # ----- Evento -----
+
+    def event_date(self, event: Dict) -> Optional[date]:
+        """Fecha del evento según _date_parts, date_text o la URL. None si no se sabe."""
+        parts = event.get('_date_parts')
+        if parts:
+            result = self.from_parts(parts)
+            if result:
+                return result
+        text = event.get('date_text')
+        if text:
+            result = self.from_text(text)
+            if result:
+                return result
+        url = event.get('url')
+        return self.from_url(url) if url else None
+
+    def app_date(self, event: Dict) -> str:
+        """
+        Fecha 'YYYY-MM-DD' para la app. Un evento que empieza a las 00:00 es
+        de la noche del día anterior. Sin fecha conocida, la de referencia.
+        """
+        event_day = self.event_date(event) or self.today
+        if event.get('hora_inicio', '23:00') in MIDNIGHT_STARTS:
+            event_day -= timedelta(days=1)
+        return event_day.isoformat()
+
+    def app_dates(self, events: Iterable[Dict]) -> List[str]:
+        """app_date de un lote de eventos en una sola pasada."""
+        return [self.app_date(event) for event in events]
+
+
+def date_text_for(day: date) -> str:
+    """date_text al estilo de FourVenues: "26 diciembre"."""
+    return f"{day.day} {MONTH_NAMES[day.month - 1]}"
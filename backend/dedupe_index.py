@@ -0,0 +1,222 @@
+"""
+Índice de deduplicación aproximada
+==================================
+EventDeduplicator solo reconoce duplicados exactos (URL, código o nombre +
+fecha en Sala Rem). La misma fiesta publicada por dos promotoras, o un venue
+que cambia de slug, llega con otra URL y otro código. Este índice compara los
+nombres de eventos del mismo día por similitud:
+
+- Nombre normalizado: minúsculas, sin tildes, emojis ni signos.
+- Shingles de 3 caracteres del nombre y su firma MinHash (NUM_PERM mínimos).
+- LSH por bandas: dos firmas son candidatas si coinciden en alguna banda
+  entera. Los buckets van por fecha, así que cada evento solo se compara con
+  unos pocos candidatos del mismo día, no con todo el catálogo.
+
+El índice se guarda en data/dedupe_index.json entre ejecuciones (los eventos ya
+pasados se purgan). Un evento que coincide con otro de esta ejecución es un
+duplicado; si coincide con uno de una ejecución anterior bajo otra clave (un
+slug renombrado), se conserva y se anota la clave anterior en `_dedupe_of`.
+
+En el mismo venue solo se descarta un nombre casi idéntico (una errata, otro
+emoji) o uno parecido con las mismas entradas: "Sábado Luminata VIP" y
+"Sábado Luminata" el mismo día pueden ser dos eventos.
+
+Entre venues distintos solo se descarta un evento si los dos venues están en
+el mismo sitio según la caché de venues (venue_cache.py): dos discotecas con
+una "Fiesta Reggaeton" la misma noche son dos fiestas distintas.
+"""
+
+import hashlib
+import json
+import re
+import struct
+import unicodedata
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEDUPE_INDEX_PATH = Path(__file__).parent / "data" / "dedupe_index.json"
+
+NUM_PERM = 32
+BANDS = 8                           # 8 bandas de 4 filas: candidatos a partir de ~0.6 de similitud
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Similitud (Jaccard estimada) para considerar dos nombres el mismo evento.
+# En el mismo venue, casi idénticos; con las mismas entradas basta con parecidos.
+# Entre venues distintos se exige un nombre no genérico ("Viernes").
+SIMILARITY = 0.95
+SAME_TICKETS_SIMILARITY = 0.8
+CROSS_VENUE_SIMILARITY = 0.9
+CROSS_VENUE_MIN_CHARS = 12
+
+# Los eventos ya pasados se conservan un día por si la ejecución cruza medianoche
+KEEP_PAST = timedelta(days=1)
+
+# Cada shingle da NUM_PERM valores de 32 bits con blake2b (16 por digest de 64 bytes,
+# uno por "persona"): hace de NUM_PERM funciones hash independientes
+_PERSONAS = [f"pf-minhash-{i}".encode('ascii') for i in range(NUM_PERM // 16)]
+_UNPACK = struct.Struct('<16I').unpack
+
+
+def normalize_name(name: str) -> str:
+    text = unicodedata.normalize('NFKD', (name or '').lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def shingles(normalized: str) -> set:
+    padded = f" {normalized} "
+    if len(padded) <= SHINGLE_SIZE:
+        return {padded}
+    return {padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1)}
+
+
+def minhash(normalized: str) -> List[int]:
+    """Firma MinHash estable entre procesos (blake2b, no hash() de Python)."""
+    rows = []
+    for shingle in shingles(normalized):
+        data = shingle.encode('utf-8')
+        row = ()
+        for persona in _PERSONAS:
+            row += _UNPACK(hashlib.blake2b(data, digest_size=64, person=persona).digest())
+        rows.append(row)
+    return [min(column) for column in zip(*rows)]
+
+
+def place_key(venue_info: Optional[Dict]) -> Optional[str]:
+    """Sitio físico de un venue: coordenadas a ~100 m o, si no hay, la dirección."""
+    if not venue_info:
+        return None
+    try:
+        return f"{float(venue_info['latitud']):.3f},{float(venue_info['longitud']):.3f}"
+    except (KeyError, TypeError, ValueError):
+        return normalize_name(venue_info.get('direccion', '')) or None
+
+
+def ticket_signature(event: Dict) -> Optional[str]:
+    """Tipos y precios de las entradas del evento, o None si el listado no las trae."""
+    tickets = sorted((normalize_name(str(t.get('tipo') or t.get('name') or '')), str(t.get('precio') or t.get('price') or ''))
+                     for t in event.get('tickets') or [] if isinstance(t, dict))
+    if not tickets:
+        return None
+    return hashlib.sha1(json.dumps(tickets).encode('utf-8')).hexdigest()[:16]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class DedupeIndex:
+    """
+    Entradas {clave: {"venue", "date", "name", "sig", "first_seen", "last_seen"}}
+    con buckets LSH por (fecha, banda) reconstruidos al cargar.
+    """
+
+    def __init__(self, path: Optional[Path] = DEDUPE_INDEX_PATH, now: datetime = None, venues=None):
+        # Sin path el índice solo vive en memoria (p. ej. al fusionar shards)
+        self.path = Path(path) if path else None
+        # VenueCache (o None): sin ella no se descartan duplicados entre venues
+        self.venues = venues
+        self.now = now or datetime.now()
+        self.run_stamp = self.now.isoformat(timespec='seconds')
+        self.entries: Dict[str, Dict] = {}
+        self.buckets: Dict[Tuple[str, int, Tuple[int, ...]], List[str]] = {}
+        self.current_run = set()
+        self.stats = {'fuzzy_duplicates': 0, 'renamed': 0, 'comparisons': 0}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                for key, entry in stored.get('entries', {}).items():
+                    self._index(key, entry)
+            except Exception as e:
+                print(f"   ⚠️ Índice de deduplicación ilegible, se ignora: {e}")
+                self.entries, self.buckets = {}, {}
+
+    def _bands(self, entry: Dict):
+        sig = entry['sig']
+        for band in range(BANDS):
+            yield (entry['date'], band, tuple(sig[band * ROWS:(band + 1) * ROWS]))
+
+    def _index(self, key: str, entry: Dict):
+        old = self.entries.get(key)
+        if old:
+            for bucket in self._bands(old):
+                keys = self.buckets.get(bucket)
+                if keys and key in keys:
+                    keys.remove(key)
+        self.entries[key] = entry
+        for bucket in self._bands(entry):
+            self.buckets.setdefault(bucket, []).append(key)
+
+    def _matches(self, a: Dict, b: Dict, score: float, same_run: bool) -> bool:
+        if a['venue'] == b['venue']:
+            same_tickets = a.get('tickets') is not None and a.get('tickets') == b.get('tickets')
+            return score >= (SAME_TICKETS_SIMILARITY if same_tickets else SIMILARITY)
+        if score < CROSS_VENUE_SIMILARITY or min(len(a['name']), len(b['name'])) < CROSS_VENUE_MIN_CHARS:
+            return False
+        if a.get('place') and a.get('place') == b.get('place'):
+            return True
+        # Un slug nuevo aún no tiene sitio en la caché: basta para anotarlo, no para descartarlo
+        return not same_run and not (a.get('place') and b.get('place'))
+
+    def find(self, key: str, entry: Dict) -> Optional[str]:
+        """Clave de la entrada más parecida del mismo día (que no sea la propia), o None."""
+        candidates = set()
+        for bucket in self._bands(entry):
+            candidates.update(self.buckets.get(bucket, ()))
+        candidates.discard(key)
+        best, best_score = None, 0.0
+        for other_key in candidates:
+            other = self.entries[other_key]
+            self.stats['comparisons'] += 1
+            score = 1.0 if other['name'] == entry['name'] else similarity(entry['sig'], other['sig'])
+            if score > best_score and self._matches(entry, other, score, other_key in self.current_run):
+                best, best_score = other_key, score
+        return best
+
+    def check(self, key: str, event: Dict, event_day: Optional[date]) -> Optional[str]:
+        """
+        Registra el evento y devuelve la clave del evento de esta ejecución del
+        que es duplicado, o None si es nuevo. Sin fecha no se compara.
+        """
+        name = normalize_name(event.get('name', ''))
+        if not event_day or not name:
+            return None
+        venue = event.get('venue_slug', '')
+        entry = {
+            'venue': venue,
+            'place': place_key(self.venues.info(venue)) if self.venues else None,
+            'date': event_day.isoformat(),
+            'name': name,
+            'sig': minhash(name),
+            'tickets': ticket_signature(event),
+            'first_seen': self.run_stamp,
+            'last_seen': self.run_stamp,
+        }
+        match = self.find(key, entry)
+        if match in self.current_run:
+            self.stats['fuzzy_duplicates'] += 1
+            return match
+        if match:
+            # Mismo evento que en una ejecución anterior con otra clave (slug o URL nuevos)
+            self.stats['renamed'] += 1
+            event['_dedupe_of'] = match
+            entry['first_seen'] = self.entries[match].get('first_seen', self.run_stamp)
+        elif key in self.entries:
+            entry['first_seen'] = self.entries[key].get('first_seen', self.run_stamp)
+        self._index(key, entry)
+        self.current_run.add(key)
+        return None
+
+    def save(self):
+        """Guarda el índice sin los eventos ya pasados."""
+        if not self.path:
+            return
+        cutoff = (self.now - KEEP_PAST).date().isoformat()
+        entries = {k: e for k, e in self.entries.items() if e['date'] >= cutoff}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': entries}, f, ensure_ascii=False)
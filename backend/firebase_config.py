@@ -1,9 +1,12 @@
 import firebase_admin
 from firebase_admin import credentials
 from firebase_admin import firestore
+import hashlib
 import os
 import sys
 
+from tracing import traced
+
 # Configuración
 current_dir = os.path.dirname(os.path.abspath(__file__))
 cred_path = os.path.join(current_dir, 'serviceAccountKey.json')
@@ -26,6 +29,7 @@ def get_db():
         print(f"❌ Error conectando a Firestore: {e}")
         return None
 
+@traced('firestore')
 def delete_old_events():
     """
     BORRADO COMPLETO: Elimina TODOS los eventos existentes en la colección 'eventos'.
@@ -63,6 +67,7 @@ def delete_old_events():
     except Exception as e:
         print(f"❌ Error borrando eventos: {e}")
 
+@traced('firestore')
 def upload_events_to_firestore(events_data):
     """
     Sube la lista de eventos a Firestore.
@@ -106,3 +111,91 @@ def upload_events_to_firestore(events_data):
         batch.commit()
         
     print(f"✅ Carga completada con éxito: {count} eventos activos.")
+
+def event_document_id(event_dict):
+    """
+    ID de documento determinista para un evento: el mismo evento se sobrescribe
+    en cada subida en lugar de duplicarse. Se basa en la URL del evento o,
+    si no la hay, en lugar + código + fecha.
+    """
+    key = event_dict.get('url_evento') or '|'.join([
+        event_dict.get('lugar', {}).get('nombre', ''),
+        event_dict.get('code', ''),
+        event_dict.get('fecha', ''),
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+@traced('firestore')
+def upsert_events(events_data):
+    """
+    Sube (o sobrescribe) un lote de eventos con IDs deterministas.
+    A diferencia de upload_events_to_firestore no requiere borrar antes, así que
+    se puede llamar varias veces durante el scraping. Devuelve los IDs escritos.
+    """
+    db = get_db()
+    if not db or not events_data: return []
+
+    events_ref = db.collection('eventos')
+    batch = db.batch()
+    ids = []
+    
+    for item in events_data:
+        event_dict = dict(item.get('evento', item))
+        event_dict['last_updated'] = firestore.SERVER_TIMESTAMP
+        doc_id = event_document_id(event_dict)
+        batch.set(events_ref.document(doc_id), event_dict)
+        ids.append(doc_id)
+        
+        if len(ids) % 400 == 0:
+            batch.commit()
+            batch = db.batch()
+    
+    if len(ids) % 400 != 0:
+        batch.commit()
+    
+    return ids
+
+@traced('firestore')
+def delete_events(ids):
+    """
+    Borra los eventos con esos IDs (eventos retirados en el modo demonio).
+    """
+    db = get_db()
+    if not db or not ids: return
+
+    events_ref = db.collection('eventos')
+    batch = db.batch()
+    for count, doc_id in enumerate(ids, 1):
+        batch.delete(events_ref.document(doc_id))
+        if count % 400 == 0:
+            batch.commit()
+            batch = db.batch()
+    if len(ids) % 400 != 0:
+        batch.commit()
+
+@traced('firestore')
+def delete_events_except(keep_ids):
+    """
+    Borra los eventos cuyo ID no está en keep_ids (los que ya no aparecen en
+    la web). Complementa a upsert_events al final de una subida incremental.
+    """
+    db = get_db()
+    if not db: return
+
+    keep_ids = set(keep_ids)
+    try:
+        batch = db.batch()
+        count = 0
+        for doc in db.collection('eventos').stream():
+            if doc.id in keep_ids:
+                continue
+            batch.delete(doc.reference)
+            count += 1
+            if count % 400 == 0:
+                batch.commit()
+                batch = db.batch()
+        if count % 400 != 0:
+            batch.commit()
+        print(f"✅ Limpieza completada: {count} eventos obsoletos eliminados.")
+    except Exception as e:
+        print(f"❌ Error borrando eventos obsoletos: {e}")
@@ -0,0 +1,282 @@
+"""
+Métricas de las llamadas a Firecrawl
+====================================
+Cada firecrawl.scrape cuesta créditos y hasta ahora solo dejaba un status y
+unos bytes en el log. MeteredFirecrawl envuelve el cliente y registra, por
+llamada: latencia, formatos, bytes recibidos, créditos estimados, intento
+(reintentos de la escalera) y resultado, agrupado por venue y etapa.
+El scraper añade los eventos obtenidos para calcular el coste por evento.
+
+Al final de cada ejecución se escriben:
+- firecrawl_metrics.json: resumen por venue y etapa
+- firecrawl_metrics.prom: fichero de texto para el textfile collector de
+  Prometheus (node_exporter)
+- firecrawl_metrics_history.jsonl: créditos por evento de cada venue y
+  ejecución, para avisar cuando el coste de un venue crece
+
+El venue y la etapa se fijan con metrics_scope() en el código que llama
+(contextvars, así que vale para cada hilo por separado).
+"""
+
+import contextvars
+import json
+import re
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# Créditos por scrape (estimación según la tarifa de Firecrawl: 1 por página,
+# el formato json cobra extra)
+BASE_CREDITS = 1
+FORMAT_EXTRA_CREDITS = {'json': 4}
+
+# Cubetas del histograma de latencia (segundos)
+LATENCY_BUCKETS = [1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120]
+
+# Aviso cuando los créditos por evento superan esta proporción de la mediana histórica
+COST_GROWTH_RATIO = 1.5
+HISTORY_RUNS = 10
+
+_scope: contextvars.ContextVar = contextvars.ContextVar('firecrawl_scope', default={})
+
+
+@contextmanager
+def metrics_scope(**labels):
+    """
+    Fija venue / etapa / intento para las llamadas a Firecrawl dentro del bloque.
+    """
+    token = _scope.set({**_scope.get(), **labels})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def venue_from_url(url: str) -> str:
+    match = re.search(r'fourvenues\.com/[a-z]{2}/([^/]+)', url or '')
+    return match.group(1) if match else 'desconocido'
+
+
+def estimate_credits(formats: List[str]) -> int:
+    return BASE_CREDITS + sum(FORMAT_EXTRA_CREDITS.get(f, 0) for f in formats or [])
+
+
+def _payload_bytes(result) -> int:
+    total = 0
+    for field in ('html', 'raw_html', 'markdown'):
+        value = getattr(result, field, None)
+        if value:
+            total += len(value.encode('utf-8')) if isinstance(value, str) else len(value)
+    return total
+
+
+class FirecrawlMetrics:
+    """
+    Registro de llamadas por (venue, etapa). Seguro entre hilos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: List[Dict] = []
+        self.events: Dict[tuple, int] = {}
+
+    def wrap(self, firecrawl) -> 'MeteredFirecrawl':
+        if isinstance(firecrawl, MeteredFirecrawl):
+            return firecrawl
+        return MeteredFirecrawl(firecrawl, self)
+
+    def record_call(self, call: Dict):
+        with self._lock:
+            self.calls.append(call)
+
+    def record_events(self, venue: str, stage: str, count: int):
+        with self._lock:
+            key = (venue, stage)
+            self.events[key] = self.events.get(key, 0) + count
+
+    def credits_since(self, index: int) -> int:
+        """Créditos estimados de las llamadas a partir de la posición index."""
+        with self._lock:
+            return sum(call['credits'] for call in self.calls[index:])
+
+    def reset(self):
+        """Empieza un registro nuevo (el modo demonio escribe uno por día)."""
+        with self._lock:
+            self.calls = []
+            self.events = {}
+
+    # ----- Agregados -----
+
+    def summary(self) -> Dict:
+        groups: Dict[tuple, List[Dict]] = {}
+        with self._lock:
+            for call in self.calls:
+                groups.setdefault((call['venue'], call['stage']), []).append(call)
+            events = dict(self.events)
+
+        by_group = {}
+        for key in sorted(set(groups) | set(events)):
+            calls = groups.get(key, [])
+            latencies = sorted(c['latency_s'] for c in calls)
+            credits = sum(c['credits'] for c in calls)
+            produced = events.get(key, 0)
+            by_group[key] = {
+                'venue': key[0],
+                'stage': key[1],
+                'calls': len(calls),
+                'errors': sum(1 for c in calls if not c['ok']),
+                'retries': sum(1 for c in calls if c['attempt'] > 1),
+                'credits': credits,
+                'bytes': sum(c['bytes'] for c in calls),
+                'events': produced,
+                'credits_per_event': round(credits / produced, 3) if produced else None,
+                'latency_s': {
+                    'sum': round(sum(latencies), 3),
+                    'p50': round(latencies[len(latencies) // 2], 3) if latencies else None,
+                    'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+                    'max': round(latencies[-1], 3) if latencies else None,
+                    'buckets': [sum(1 for l in latencies if l <= b) for b in LATENCY_BUCKETS],
+                },
+                'formats': sorted({f for c in calls for f in c['formats']}),
+            }
+
+        venues = {}
+        for group in by_group.values():
+            venue = venues.setdefault(group['venue'], {'credits': 0, 'calls': 0, 'events': 0})
+            venue['credits'] += group['credits']
+            venue['calls'] += group['calls']
+            # El rendimiento de un venue se mide con los eventos de su listado
+            if group['stage'] == 'listado':
+                venue['events'] += group['events']
+        for venue in venues.values():
+            venue['credits_per_event'] = round(venue['credits'] / venue['events'], 3) if venue['events'] else None
+
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'total_calls': sum(g['calls'] for g in by_group.values()),
+            'total_credits': sum(g['credits'] for g in by_group.values()),
+            'venues': venues,
+            'groups': list(by_group.values()),
+        }
+
+    def to_prometheus(self, summary: Dict = None) -> str:
+        summary = summary or self.summary()
+        lines = [
+            '# HELP partyfinder_firecrawl_calls_total Llamadas a Firecrawl.',
+            '# TYPE partyfinder_firecrawl_calls_total counter',
+        ]
+        def labels(g, **extra):
+            pairs = {'venue': g['venue'], 'stage': g['stage'], **extra}
+            return ','.join(f'{k}="{v}"' for k, v in pairs.items())
+
+        for g in summary['groups']:
+            lines.append(f"partyfinder_firecrawl_calls_total{{{labels(g)}}} {g['calls']}")
+        for metric, field, help_text in [
+            ('errors_total', 'errors', 'Llamadas fallidas.'),
+            ('retries_total', 'retries', 'Llamadas que son reintentos de la escalera.'),
+            ('credits_total', 'credits', 'Créditos estimados.'),
+            ('bytes_total', 'bytes', 'Bytes recibidos.'),
+            ('events_total', 'events', 'Eventos obtenidos.'),
+        ]:
+            lines.append(f'# HELP partyfinder_firecrawl_{metric} {help_text}')
+            lines.append(f'# TYPE partyfinder_firecrawl_{metric} counter')
+            for g in summary['groups']:
+                lines.append(f"partyfinder_firecrawl_{metric}{{{labels(g)}}} {g[field]}")
+
+        lines.append('# HELP partyfinder_firecrawl_latency_seconds Latencia de las llamadas a Firecrawl.')
+        lines.append('# TYPE partyfinder_firecrawl_latency_seconds histogram')
+        for g in summary['groups']:
+            if not g['calls']:
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, g['latency_s']['buckets']):
+                lines.append(f"partyfinder_firecrawl_latency_seconds_bucket{{{labels(g, le=bound)}}} {count}")
+            lines.append(f"partyfinder_firecrawl_latency_seconds_bucket{{{labels(g, le='+Inf')}}} {g['calls']}")
+            lines.append(f"partyfinder_firecrawl_latency_seconds_sum{{{labels(g)}}} {g['latency_s']['sum']}")
+            lines.append(f"partyfinder_firecrawl_latency_seconds_count{{{labels(g)}}} {g['calls']}")
+
+        lines.append('# HELP partyfinder_firecrawl_credits_per_event Créditos por evento del listado.')
+        lines.append('# TYPE partyfinder_firecrawl_credits_per_event gauge')
+        for venue, v in sorted(summary['venues'].items()):
+            if v['credits_per_event'] is not None:
+                lines.append(f'partyfinder_firecrawl_credits_per_event{{venue="{venue}"}} {v["credits_per_event"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, out_dir: Path) -> Dict:
+        """
+        Escribe el resumen JSON, el fichero Prometheus y el histórico; avisa de
+        los venues cuyo coste por evento crece respecto a ejecuciones anteriores.
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        with open(out_dir / 'firecrawl_metrics.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        # Escritura atómica: el textfile collector puede leer en cualquier momento
+        prom_tmp = out_dir / 'firecrawl_metrics.prom.tmp'
+        with open(prom_tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(summary))
+        prom_tmp.replace(out_dir / 'firecrawl_metrics.prom')
+
+        history_path = out_dir / 'firecrawl_metrics_history.jsonl'
+        history = []
+        if history_path.exists():
+            with open(history_path, 'r', encoding='utf-8') as f:
+                history = [json.loads(line) for line in f if line.strip()]
+        for venue, v in sorted(summary['venues'].items()):
+            past = [h['credits_per_event'] for h in history
+                    if h['venue'] == venue and h.get('credits_per_event')][-HISTORY_RUNS:]
+            current = v['credits_per_event']
+            if current and past and current > COST_GROWTH_RATIO * statistics.median(past):
+                print(f"   💸 {venue}: {current:.2f} créditos/evento (mediana anterior {statistics.median(past):.2f})")
+        with open(history_path, 'a', encoding='utf-8') as f:
+            for venue, v in sorted(summary['venues'].items()):
+                f.write(json.dumps({'run': summary['generated_at'], 'venue': venue, **v}, ensure_ascii=False) + '\n')
+        return summary
+
+
+class MeteredFirecrawl:
+    """
+    Envoltorio del cliente de Firecrawl que registra cada scrape. El resto de
+    atributos se delegan en el cliente original.
+    """
+
+    def __init__(self, firecrawl, metrics: FirecrawlMetrics):
+        self._firecrawl = firecrawl
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._firecrawl, name)
+
+    def scrape(self, url: str, **kwargs):
+        scope = _scope.get()
+        formats = [f if isinstance(f, str) else str(f) for f in kwargs.get('formats') or ['markdown']]
+        call = {
+            'venue': scope.get('venue') or venue_from_url(url),
+            'stage': scope.get('stage', 'otro'),
+            'attempt': scope.get('attempt', 1),
+            'formats': formats,
+            'credits': 0,
+            'ok': False,
+            'status': None,
+            'bytes': 0,
+        }
+        started = time.monotonic()
+        try:
+            result = self._firecrawl.scrape(url, **kwargs)
+            metadata = getattr(result, 'metadata', None)
+            call['status'] = getattr(metadata, 'status_code', None)
+            call['bytes'] = _payload_bytes(result)
+            call['ok'] = not (isinstance(call['status'], int) and call['status'] >= 400)
+            # Firecrawl solo cobra las llamadas que devuelven respuesta
+            call['credits'] = estimate_credits(formats)
+            return result
+        finally:
+            call['latency_s'] = round(time.monotonic() - started, 3)
+            self._metrics.record_call(call)
+
+
+METRICS = FirecrawlMetrics()
@@ -0,0 +1,233 @@
+"""
+Grabación y reproducción de respuestas de Firecrawl
+===================================================
+Para probar y medir el scraper sin red ni créditos:
+
+- RecordingFirecrawl envuelve el cliente real y guarda cada respuesta de
+  firecrawl.scrape (html, rawHtml, markdown, metadata y latencia) en un
+  fichero JSON por URL dentro del directorio de fixtures.
+- ReplayFirecrawl implementa la misma interfaz leyendo esos fixtures, con
+  latencia artificial (fija + jitter, o la grabada) e inyección de fallos
+  (excepciones o códigos HTTP). Con la misma semilla, la secuencia de
+  latencias y fallos es la misma en cada ejecución.
+
+Si una URL se scrapea varias veces (reintentos de la escalera del listado),
+se graban todas las respuestas en orden y la reproducción las devuelve en el
+mismo orden, repitiendo la última. Una URL sin fixture responde 404 vacío.
+
+    python scraper_firecrawl.py --record fixtures/   # en vivo, grabando
+    python scraper_firecrawl.py --replay fixtures/ --replay-latency 500 --replay-failure-rate 0.05
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DOCUMENT_FIELDS = ('html', 'raw_html', 'markdown', 'links')
+
+# Estados HTTP que se inyectan por defecto como fallo de Firecrawl
+FAILURE_STATUS = [429, 500, 502]
+
+
+class ReplayFailure(Exception):
+    """Fallo inyectado por ReplayFirecrawl (simula un timeout o error de la API)."""
+
+
+def fixture_name(url: str) -> str:
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.json'
+
+
+def serialize_document(result) -> Dict:
+    """Documento de Firecrawl -> dict serializable en JSON."""
+    data = {field: getattr(result, field, None) for field in DOCUMENT_FIELDS}
+    metadata = getattr(result, 'metadata', None)
+    if metadata is None:
+        data['metadata'] = {}
+    elif hasattr(metadata, 'model_dump'):
+        data['metadata'] = metadata.model_dump(exclude_none=True)
+    elif isinstance(metadata, dict):
+        data['metadata'] = dict(metadata)
+    else:
+        data['metadata'] = {k: v for k, v in vars(metadata).items() if v is not None}
+    return data
+
+
+class ReplayObject:
+    """Objeto con atributos; los que no existen valen None (como en el SDK)."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return None
+
+
+def build_document(data: Dict) -> ReplayObject:
+    fields = {field: data.get(field) for field in DOCUMENT_FIELDS}
+    return ReplayObject(**fields, metadata=ReplayObject(**(data.get('metadata') or {})))
+
+
+class DirectoryFixtures:
+    """
+    Fixtures en disco: un JSON por URL con la lista de respuestas grabadas.
+    La primera grabación de una URL en la sesión sustituye a las anteriores.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._recorded: set = set()
+        self._cache: Dict[str, List[Dict]] = {}
+
+    def responses(self, url: str) -> List[Dict]:
+        with self._lock:
+            if url not in self._cache:
+                file = self.path / fixture_name(url)
+                if file.exists():
+                    with open(file, 'r', encoding='utf-8') as f:
+                        self._cache[url] = json.load(f)['responses']
+                else:
+                    self._cache[url] = []
+            return self._cache[url]
+
+    def record(self, url: str, response: Dict):
+        with self._lock:
+            if url not in self._recorded:
+                self._recorded.add(url)
+                self._cache[url] = []
+            self._cache[url].append(response)
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(self.path / fixture_name(url), 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'responses': self._cache[url]}, f, ensure_ascii=False)
+
+    def urls(self) -> List[str]:
+        urls = []
+        for file in sorted(self.path.glob('*.json')):
+            with open(file, 'r', encoding='utf-8') as f:
+                urls.append(json.load(f)['url'])
+        return urls
+
+
+_stores: Dict[Path, DirectoryFixtures] = {}
+_stores_lock = threading.Lock()
+
+
+def open_fixtures(source):
+    """
+    Directorio (ruta) -> DirectoryFixtures compartido por todos los clientes
+    de la ejecución. Cualquier objeto con responses(url) se usa tal cual.
+    """
+    if hasattr(source, 'responses'):
+        return source
+    path = Path(source).resolve()
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = DirectoryFixtures(path)
+        return _stores[path]
+
+
+class RecordingFirecrawl:
+    """
+    Envoltorio del cliente real que graba cada respuesta de scrape.
+    """
+
+    def __init__(self, firecrawl, fixtures):
+        self._firecrawl = firecrawl
+        self.fixtures = open_fixtures(fixtures)
+
+    def __getattr__(self, name):
+        return getattr(self._firecrawl, name)
+
+    def scrape(self, url: str, **kwargs):
+        started = time.monotonic()
+        result = self._firecrawl.scrape(url, **kwargs)
+        response = serialize_document(result)
+        response['latency_s'] = round(time.monotonic() - started, 3)
+        response['request'] = {k: v for k, v in kwargs.items() if k in ('formats', 'actions', 'wait_for', 'timeout')}
+        response['recorded_at'] = datetime.now().isoformat(timespec='seconds')
+        self.fixtures.record(url, response)
+        return result
+
+
+class ReplayFirecrawl:
+    """
+    Backend sin red con la interfaz de scrape del SDK.
+
+    latency_s / jitter_s: espera fija más un extra uniforme en [0, jitter_s];
+    con recorded_latency se usa la latencia grabada (multiplicada por latency_scale).
+    failure_rate: probabilidad de fallo por llamada; failure_status elige si el
+    fallo es una excepción (None) o una respuesta con esos códigos HTTP.
+    """
+
+    # El scraper no hace peticiones directas (sonda HTTP) con este backend
+    offline = True
+
+    def __init__(self, fixtures, latency_s: float = 0.0, jitter_s: float = 0.0,
+                 recorded_latency: bool = False, latency_scale: float = 1.0,
+                 failure_rate: float = 0.0, failure_status: Optional[List[int]] = None,
+                 seed: int = 0):
+        self.fixtures = open_fixtures(fixtures)
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.recorded_latency = recorded_latency
+        self.latency_scale = latency_scale
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.seed = seed
+        self.stats = {'calls': 0, 'missing': 0, 'failures': 0, 'slept_s': 0.0}
+        self._lock = threading.Lock()
+        self._calls_per_url: Dict[str, int] = {}
+
+    def _rng(self, url: str, n: int) -> random.Random:
+        # Aleatoriedad por (url, nº de llamada): no depende del orden entre hilos
+        return random.Random(f"{self.seed}:{url}:{n}")
+
+    def scrape(self, url: str, **kwargs):
+        with self._lock:
+            n = self._calls_per_url.get(url, 0)
+            self._calls_per_url[url] = n + 1
+            self.stats['calls'] += 1
+        rng = self._rng(url, n)
+        responses = self.fixtures.responses(url)
+        response = responses[min(n, len(responses) - 1)] if responses else None
+
+        if self.recorded_latency and response:
+            delay = response.get('latency_s', 0.0) * self.latency_scale
+        else:
+            delay = self.latency_s + (rng.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.stats['slept_s'] += delay
+
+        if self.failure_rate and rng.random() < self.failure_rate:
+            with self._lock:
+                self.stats['failures'] += 1
+            if not self.failure_status:
+                raise ReplayFailure(f"Fallo inyectado en {url}")
+            return build_document({'metadata': {'status_code': rng.choice(self.failure_status), 'source_url': url}})
+
+        if response is None:
+            with self._lock:
+                self.stats['missing'] += 1
+            return build_document({'metadata': {'status_code': 404, 'source_url': url}})
+        return build_document(response)
+
+
+def parse_latency(value: str) -> Dict:
+    """
+    Argumento de --replay-latency -> opciones de ReplayFirecrawl:
+    'recorded', 'recorded*0.5', '500' (ms) o '500+200' (ms fijos + jitter).
+    """
+    if value.startswith('recorded'):
+        _, _, scale = value.partition('*')
+        return {'recorded_latency': True, 'latency_scale': float(scale) if scale else 1.0}
+    fixed, _, jitter = value.partition('+')
+    return {'latency_s': float(fixed) / 1000, 'jitter_s': float(jitter) / 1000 if jitter else 0.0}
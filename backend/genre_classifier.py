@@ -0,0 +1,118 @@
+"""
+Clasificador de géneros musicales
+=================================
+Los géneros y sus sinónimos viven en genres.json:
+
+    {"genres": {"Reggaeton": ["reggaeton", "reguetón", "perreo"], ...}}
+
+Con todos los sinónimos se compila un autómata de Aho-Corasick una vez por
+proceso, y cada texto (aria-labels, nombre, descripción) se recorre una sola
+vez: el coste es lineal en el tamaño del texto, crezca lo que crezca la
+taxonomía. Solo cuentan las palabras completas ("pop" no casa con "popular")
+y se ignoran mayúsculas y tildes.
+
+Uso:
+    classifier = load_genre_classifier()
+    classifier.classify([*labels, name, description])   # ['Reggaeton', 'Latin']
+"""
+
+import json
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+GENRES_PATH = Path(__file__).parent / "genres.json"
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes, para casar "Reguetón" con "regueton"."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+class GenreClassifier:
+    """
+    Autómata de Aho-Corasick sobre los sinónimos de cada género.
+    Los tags salen en el orden de los textos y, dentro de cada texto, en el de la taxonomía.
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.genres = list(taxonomy)
+        # Nodo i: transiciones, enlace de fallo y (género, longitud) que terminan en él
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]
+        for genre_id, genre in enumerate(self.genres):
+            for pattern in {fold(p) for p in [genre, *taxonomy[genre]] if p.strip()}:
+                self._add(pattern, genre_id)
+        self._link()
+
+    def _add(self, pattern: str, genre_id: int):
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((genre_id, len(pattern)))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def matches(self, text: str) -> List[int]:
+        """Ids de los géneros presentes en el texto (palabras completas), en orden de taxonomía."""
+        text = fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for genre_id, length in out[node]:
+                if genre_id not in found and _is_boundary(text, i - length) and _is_boundary(text, i + 1):
+                    found.add(genre_id)
+        return sorted(found)
+
+    def classify(self, texts: Iterable[str]) -> List[str]:
+        """Tags sin repetir de todos los textos."""
+        seen = set()
+        tags = []
+        for text in texts:
+            if not text:
+                continue
+            for genre_id in self.matches(text):
+                if genre_id not in seen:
+                    seen.add(genre_id)
+                    tags.append(self.genres[genre_id])
+        return tags
+
+
+@lru_cache(maxsize=4)
+def load_genre_classifier(path: Path = GENRES_PATH) -> GenreClassifier:
+    """Clasificador compilado de la taxonomía (uno por proceso y fichero)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        taxonomy = json.load(f).get('genres', {})
+    for genre, synonyms in taxonomy.items():
+        if not isinstance(synonyms, list):
+            raise ValueError(f"Sinónimos de '{genre}' en {path}: se esperaba una lista")
+    return GenreClassifier(taxonomy)
@@ -0,0 +1,201 @@
+"""
+Índice geográfico de eventos
+============================
+Índice por geohash que se genera con cada exportación (data/geo_index.json,
+junto a events.json) para responder "eventos a menos de 2 km esta noche" o
+"eventos en este rectángulo del mapa" sin recorrer todos los eventos.
+
+    {"version": 1, "precision": 6, "generated_at": iso,
+     "bbox": [lat_min, lon_min, lat_max, lon_max],   # metadatos del shard
+     "coverage": ["eyk9", ...],                      # celdas de precisión 4 con eventos
+     "cells": {"eyk9q2": [posición en events.json, ...], ...},
+     "docs": [url_evento, ...]}                      # posición = índice en events.json
+
+Una consulta calcula las celdas que cubren la zona (con la precisión que deja
+como mucho MAX_QUERY_CELLS celdas), toma los eventos de esas celdas por
+prefijo y filtra por distancia real o por el rectángulo. `bbox` y `coverage`
+dicen, sin abrir los eventos, qué zona cubre cada shard.
+"""
+
+import bisect
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+GEO_INDEX_VERSION = 1
+PRECISION = 6               # celdas de ~1.2 x 0.6 km
+COVERAGE_PRECISION = 4      # celdas de ~39 x 20 km para los metadatos del shard
+MAX_QUERY_CELLS = 64
+EARTH_RADIUS_KM = 6371.0
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+BBox = Tuple[float, float, float, float]
+
+
+def encode(lat: float, lon: float, precision: int = PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, rng = (lon, lon_range) if even else (lat, lat_range)
+        mid = (rng[0] + rng[1]) / 2
+        if target >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(alto en grados de latitud, ancho en grados de longitud) de una celda."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> BBox:
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-6)))
+    return (max(lat - dlat, -90.0), max(lon - dlon, -180.0), min(lat + dlat, 90.0), min(lon + dlon, 180.0))
+
+
+def covering_cells(bbox: BBox, max_precision: int = PRECISION) -> List[str]:
+    """Celdas que cubren el rectángulo, con la mayor precisión que no pase de MAX_QUERY_CELLS."""
+    lat_min, lon_min, lat_max, lon_max = bbox
+    for precision in range(max_precision, 0, -1):
+        height, width = cell_size(precision)
+        rows = int(lat_max // height - lat_min // height) + 1
+        cols = int(lon_max // width - lon_min // width) + 1
+        if rows * cols <= MAX_QUERY_CELLS or precision == 1:
+            break
+    cells = set()
+    for r in range(rows):
+        lat = min(lat_min + r * height, lat_max)
+        for c in range(cols):
+            cells.add(encode(lat, min(lon_min + c * width, lon_max), precision))
+        cells.add(encode(lat, lon_max, precision))
+    for c in range(cols):
+        cells.add(encode(lat_max, min(lon_min + c * width, lon_max), precision))
+    cells.add(encode(lat_max, lon_max, precision))
+    return sorted(cells)
+
+
+def event_coordinates(event: Dict) -> Optional[Tuple[float, float]]:
+    lugar = event.get('evento', event).get('lugar') or {}
+    try:
+        lat, lon = float(lugar['latitud']), float(lugar['longitud'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return None
+    return lat, lon
+
+
+def build_geo_index(events: List[Dict], generated_at: datetime = None) -> Dict:
+    """Índice de un events.json ya transformado (formato de la app)."""
+    cells: Dict[str, List[int]] = {}
+    coverage = set()
+    bbox = None
+    docs = []
+    for doc, event in enumerate(events):
+        docs.append(event.get('evento', event).get('url_evento', ''))
+        coords = event_coordinates(event)
+        if coords is None:
+            continue
+        lat, lon = coords
+        cells.setdefault(encode(lat, lon), []).append(doc)
+        coverage.add(encode(lat, lon, COVERAGE_PRECISION))
+        bbox = (lat, lon, lat, lon) if bbox is None else (
+            min(bbox[0], lat), min(bbox[1], lon), max(bbox[2], lat), max(bbox[3], lon))
+    return {
+        'version': GEO_INDEX_VERSION,
+        'precision': PRECISION,
+        'generated_at': (generated_at or datetime.now()).isoformat(timespec='seconds'),
+        'bbox': list(bbox) if bbox else None,
+        'coverage': sorted(coverage),
+        'cells': dict(sorted(cells.items())),
+        'docs': docs,
+    }
+
+
+def write_geo_index(events: List[Dict], path: Path) -> Dict:
+    index = build_geo_index(events)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    tmp.replace(path)
+    return index
+
+
+class GeoIndex:
+    """Índice cargado en memoria junto a los eventos que indexa."""
+
+    def __init__(self, data: Dict, events: List[Dict]):
+        if data.get('version') != GEO_INDEX_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+        self.precision = data['precision']
+        self.bbox = data.get('bbox')
+        self.keys = sorted(data['cells'])
+        self.cells = data['cells']
+        # Índices anteriores sin docs: no se puede comprobar que cuadren con events.json
+        self.docs = data.get('docs')
+        self.events = events
+        # Coordenadas precalculadas para el filtro fino
+        self.coords = {doc: event_coordinates(events[doc]) for docs in self.cells.values() for doc in docs
+                       if doc < len(events)}
+
+    @classmethod
+    def load(cls, path: Path, events: List[Dict]) -> 'GeoIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), events)
+
+    def _candidates(self, bbox: BBox) -> List[int]:
+        docs = []
+        for prefix in covering_cells(bbox, self.precision):
+            i = bisect.bisect_left(self.keys, prefix)
+            while i < len(self.keys) and self.keys[i].startswith(prefix):
+                docs.extend(self.cells[self.keys[i]])
+                i += 1
+        return docs
+
+    def within_bbox(self, bbox: BBox, fecha: str = None) -> List[int]:
+        lat_min, lon_min, lat_max, lon_max = bbox
+        found = []
+        for doc in self._candidates(bbox):
+            coords = self.coords.get(doc)
+            if coords and lat_min <= coords[0] <= lat_max and lon_min <= coords[1] <= lon_max \
+                    and self._on_date(doc, fecha):
+                found.append(doc)
+        return found
+
+    def nearby(self, lat: float, lon: float, radius_km: float, fecha: str = None) -> List[Tuple[int, float]]:
+        """[(posición en events.json, distancia en km)] ordenados por distancia."""
+        found = []
+        for doc in self._candidates(radius_bbox(lat, lon, radius_km)):
+            coords = self.coords.get(doc)
+            if not coords or not self._on_date(doc, fecha):
+                continue
+            distance = haversine_km(lat, lon, coords[0], coords[1])
+            if distance <= radius_km:
+                found.append((doc, round(distance, 3)))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def _on_date(self, doc: int, fecha: Optional[str]) -> bool:
+        return not fecha or self.events[doc].get('evento', self.events[doc]).get('fecha') == fecha
@@ -0,0 +1,233 @@
+"""
+Documento HTML parseado una sola vez
+====================================
+Las páginas de detalle se parseaban varias veces (html y rawHtml cada uno con su
+BeautifulSoup) y los bloques JSON-LD se decodificaban dos veces (tickets por un
+lado, dirección y coordenadas por otro). ParsedDocument parsea el HTML una vez y
+memoriza las vistas derivadas que usa el scraper:
+
+- json_ld / json_ld_items: objetos JSON-LD ya decodificados
+- aria_labels: textos de los atributos aria-label
+- images: etiquetas <img>
+- meta(property): contenido de una etiqueta <meta property=...>
+
+Backend de parseo: lxml si está instalado (bastante más rápido sobre rawHtml de
+varios MB) y html.parser como alternativa. Se puede forzar con la variable de
+entorno PARTYFINDER_HTML_PARSER o con --html-parser en el scraper.
+
+Para comparar backends (resultados y tiempos) sobre páginas guardadas:
+    python html_document.py pagina1.html pagina2.html
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+PARSER_ENV = "PARTYFINDER_HTML_PARSER"
+BACKENDS = ['lxml', 'html.parser']
+
+# Documentos recientes por (backend, html): rawHtml suele ser igual que html
+_CACHE_SIZE = 4
+_cache: "OrderedDict[tuple, ParsedDocument]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def available_backends() -> List[str]:
+    backends = []
+    try:
+        import lxml  # noqa: F401
+        backends.append('lxml')
+    except ImportError:
+        pass
+    backends.append('html.parser')
+    return backends
+
+
+def default_backend() -> str:
+    """
+    Backend elegido: el de PARTYFINDER_HTML_PARSER si está disponible, si no el más rápido.
+    """
+    requested = os.environ.get(PARSER_ENV)
+    available = available_backends()
+    if requested:
+        if requested in available:
+            return requested
+        print(f"   ⚠️ Parser HTML '{requested}' no disponible, se usa {available[0]}")
+    return available[0]
+
+
+class ParsedDocument:
+    """
+    Un HTML parseado con vistas derivadas memorizadas. El parseo es perezoso:
+    no se hace hasta que se pide la primera vista. Varios hilos pueden compartir
+    el mismo documento (parseo en línea): cada vista se construye entera bajo el
+    lock antes de publicarse.
+    """
+
+    def __init__(self, html: str, backend: str = None):
+        self.html = html or ""
+        self.backend = backend or default_backend()
+        self._soup = None
+        self._json_ld = None
+        self._aria_labels = None
+        self._images = None
+        self._meta = None
+        self._lock = threading.RLock()
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            with self._lock:
+                if self._soup is None:
+                    self._soup = BeautifulSoup(self.html, self.backend)
+        return self._soup
+
+    def find(self, *args, **kwargs):
+        return self.soup.find(*args, **kwargs)
+
+    def find_all(self, *args, **kwargs):
+        return self.soup.find_all(*args, **kwargs)
+
+    @property
+    def json_ld(self) -> List[Any]:
+        """Contenido decodificado de cada <script type="application/ld+json"> válido."""
+        if self._json_ld is None:
+            with self._lock:
+                if self._json_ld is None:
+                    json_ld = []
+                    for script in self.soup.find_all('script', type='application/ld+json'):
+                        if not script.string:
+                            continue
+                        try:
+                            json_ld.append(json.loads(script.string.strip()))
+                        except ValueError:
+                            continue
+                    self._json_ld = json_ld
+        return self._json_ld
+
+    @staticmethod
+    def flatten_json_ld(data: Any) -> List[Any]:
+        """Schema.org suele venir como lista, como objeto con @graph o como objeto suelto."""
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            return data['@graph'] if '@graph' in data else [data]
+        return []
+
+    @property
+    def json_ld_items(self) -> List[Any]:
+        return [item for data in self.json_ld for item in self.flatten_json_ld(data)]
+
+    @property
+    def aria_labels(self) -> List[str]:
+        if self._aria_labels is None:
+            with self._lock:
+                if self._aria_labels is None:
+                    self._aria_labels = [elem.get('aria-label', '')
+                                         for elem in self.soup.find_all(attrs={'aria-label': True})]
+        return self._aria_labels
+
+    @property
+    def images(self) -> List:
+        if self._images is None:
+            with self._lock:
+                if self._images is None:
+                    self._images = self.soup.find_all('img')
+        return self._images
+
+    def meta(self, prop: str) -> Optional[str]:
+        if self._meta is None:
+            with self._lock:
+                if self._meta is None:
+                    meta = {}
+                    for tag in self.soup.find_all('meta', property=True):
+                        meta.setdefault(tag.get('property'), tag.get('content', ''))
+                    self._meta = meta
+        return self._meta.get(prop)
+
+
+def parse_document(html: str, backend: str = None) -> ParsedDocument:
+    """
+    Devuelve el ParsedDocument de un HTML, reutilizando el último parseo del
+    mismo texto (p. ej. cuando rawHtml y html son idénticos).
+    """
+    backend = backend or default_backend()
+    key = (backend, html or "")
+    with _cache_lock:
+        document = _cache.get(key)
+        if document is None:
+            document = ParsedDocument(html, backend)
+            _cache[key] = document
+            if len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+        else:
+            _cache.move_to_end(key)
+    return document
+
+
+def clear_cache():
+    """Vacía la caché de documentos (para medir parseos en frío)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _views(document: ParsedDocument) -> Dict[str, Any]:
+    return {
+        'json_ld': document.json_ld,
+        'aria_labels': document.aria_labels,
+        'images': [img.get('src', '') for img in document.images],
+        'og_image': document.meta('og:image'),
+    }
+
+
+def compare_backends(html: str, backends: List[str] = None) -> Dict[str, Dict]:
+    """
+    Parsea el mismo HTML con cada backend y devuelve, por backend, el tiempo de
+    parseo + vistas y las vistas que difieren respecto al primero.
+    """
+    backends = backends or available_backends()
+    report = {}
+    reference = None
+    for backend in backends:
+        started = time.perf_counter()
+        views = _views(ParsedDocument(html, backend))
+        elapsed = time.perf_counter() - started
+        if reference is None:
+            reference = views
+        report[backend] = {
+            'seconds': elapsed,
+            'differences': [name for name, value in views.items() if value != reference[name]],
+        }
+    return report
+
+
+def main(paths: List[str]) -> int:
+    if not paths:
+        print("Uso: python html_document.py pagina.html [pagina2.html ...]")
+        return 1
+    backends = available_backends()
+    print(f"Backends disponibles: {', '.join(backends)}")
+    totals = {backend: 0.0 for backend in backends}
+    mismatches = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        report = compare_backends(html, backends)
+        for backend, result in report.items():
+            totals[backend] += result['seconds']
+            if result['differences']:
+                mismatches += 1
+                print(f"   ⚠️ {path}: {backend} difiere en {', '.join(result['differences'])}")
+    for backend, seconds in totals.items():
+        print(f"   {backend:<12} {seconds * 1000:>8.1f} ms en {len(paths)} páginas")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
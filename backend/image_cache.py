@@ -0,0 +1,307 @@
+"""
+Caché de carteles de eventos
+============================
+`imagen_url` apunta al cartel original de FourVenues (a menudo 1-3 MB) y cada
+tarjeta de la app lo descarga entero. Esta etapa descarga cada cartel una sola
+vez, lo guarda por el hash de su contenido (dos URLs con el mismo cartel
+comparten ficheros) y genera variantes WebP redimensionadas:
+
+- thumb:  tarjetas del listado (480 px de ancho)
+- detail: pantalla de detalle (1080 px de ancho)
+
+    data/images/
+        index.json                  # {url: {"hash", "fetched_at", "last_used", ...}}
+        <sha256>-thumb.webp
+        <sha256>-detail.webp
+
+Los eventos se reescriben para apuntar a las variantes publicadas bajo
+PARTYFINDER_IMAGE_BASE_URL (el directorio se sirve o se sube tal cual a
+cualquier hosting estático). El original queda en `imagen_original_url` y,
+si algo falla (descarga, formato, sin Pillow), el evento conserva su URL.
+
+Uso:
+    cache = ImageCache(base_url='https://cdn.example.com/images')
+    cache.apply(transformed_events)
+    cache.save()
+
+Con un servidor local haciendo de FourVenues:
+    python -m http.server 8000 -d carteles/ &
+    python image_cache.py http://localhost:8000/cartel.jpg --base-url http://localhost:9000
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from tracing import TRACER
+
+IMAGE_DIR = Path(__file__).parent / "data" / "images"
+IMAGE_BASE_ENV = 'PARTYFINDER_IMAGE_BASE_URL'
+
+# Ancho máximo de cada variante (nunca se amplía una imagen más pequeña)
+VARIANTS = {'thumb': 480, 'detail': 1080}
+WEBP_QUALITY = 80
+
+# Carteles más grandes que esto no se procesan (protección ante ficheros enormes)
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# Un fallo se reintenta pasado este tiempo; una entrada sin usar se purga
+FAILED_TTL = timedelta(hours=6)
+UNUSED_TTL = timedelta(days=30)
+
+IMAGE_WORKERS = 4
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def variant_name(digest: str, variant: str) -> str:
+    return f"{digest}-{variant}.webp"
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """
+    WebP de cada variante a partir de los bytes del cartel.
+    Lanza ImportError sin Pillow y OSError/ValueError si la imagen no es válida.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        # WebP admite transparencia, pero no paletas ni CMYK
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    rendered = {}
+    for variant, width in VARIANTS.items():
+        resized = image
+        if image.width > width:
+            resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, 'WEBP', quality=WEBP_QUALITY, method=4)
+        rendered[variant] = out.getvalue()
+    return rendered
+
+
+class ImageCache:
+    """
+    Almacén direccionado por contenido de las variantes de los carteles.
+    Es seguro usarlo desde varios hilos: cada URL se descarga una sola vez
+    aunque la pidan a la vez varios eventos.
+    """
+
+    def __init__(self, store_dir: Path = IMAGE_DIR, base_url: str = None, session=None,
+                 timeout: float = 15.0, max_bytes: int = MAX_IMAGE_BYTES):
+        self.store_dir = Path(store_dir)
+        base_url = base_url if base_url is not None else os.environ.get(IMAGE_BASE_ENV, '')
+        self.base_url = base_url.rstrip('/')
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers['User-Agent'] = 'Mozilla/5.0 (PartyFinder image cache)'
+        self.session = session
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.index_path = self.store_dir / "index.json"
+        self.index: Dict[str, Dict] = {}
+        self.stats = {'hits': 0, 'fetched': 0, 'deduplicated': 0, 'failed': 0,
+                      'bytes_original': 0, 'bytes_thumb': 0}
+        self._lock = threading.Lock()
+        # Un lock por URL y por hash para no repetir descargas ni renders en paralelo
+        self._key_locks: Dict[str, threading.Lock] = {}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except Exception as e:
+                print(f"   ⚠️ Índice de imágenes ilegible, se ignora: {e}")
+                self.index = {}
+
+    # ----- Almacén -----
+
+    def path_for(self, digest: str, variant: str) -> Path:
+        return self.store_dir / variant_name(digest, variant)
+
+    def public_url(self, digest: str, variant: str) -> str:
+        return f"{self.base_url}/{variant_name(digest, variant)}"
+
+    def _stored(self, digest: str) -> bool:
+        return all(self.path_for(digest, variant).exists() for variant in VARIANTS)
+
+    def _fetch(self, url: str) -> bytes:
+        response = self.session.get(url, timeout=self.timeout, stream=True)
+        try:
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ValueError(f"imagen de más de {self.max_bytes // (1024 * 1024)} MB")
+                chunks.append(chunk)
+            return b''.join(chunks)
+        finally:
+            response.close()
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _store(self, data: bytes) -> str:
+        digest = content_hash(data)
+        # Dos URLs con el mismo cartel descargadas a la vez se renderizan una vez
+        with self._lock_for(digest):
+            if self._stored(digest):
+                # Mismo cartel bajo otra URL (o de una ejecución anterior)
+                with self._lock:
+                    self.stats['deduplicated'] += 1
+                return digest
+            try:
+                rendered = render_variants(data)
+            except OSError as e:
+                raise ValueError(f"no es una imagen válida ({type(e).__name__})") from e
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            for variant, content in rendered.items():
+                path = self.path_for(digest, variant)
+                # Escritura atómica: el directorio puede estar sirviéndose mientras tanto
+                tmp = path.with_suffix('.tmp')
+                tmp.write_bytes(content)
+                tmp.replace(path)
+        with self._lock:
+            self.stats['bytes_original'] += len(data)
+            self.stats['bytes_thumb'] += len(rendered['thumb'])
+        return digest
+
+    # ----- Resolución -----
+
+    def resolve(self, url: str, now: datetime = None) -> Optional[str]:
+        """Hash del cartel de `url`, descargándolo si hace falta. None si no se puede."""
+        if not url or not url.startswith(('http://', 'https://')):
+            return None
+        now = now or datetime.now()
+        with self._lock_for(url):
+            entry = self.index.get(url) or {}
+            digest = entry.get('hash')
+            if digest and self._stored(digest):
+                with self._lock:
+                    self.stats['hits'] += 1
+                    entry['last_used'] = now.isoformat(timespec='seconds')
+                return digest
+            failed_at = entry.get('failed_at')
+            if failed_at and now - datetime.fromisoformat(failed_at) < FAILED_TTL:
+                return None
+
+            with TRACER.span('imagen', 'imagenes', url=url):
+                try:
+                    digest = self._store(self._fetch(url))
+                except Exception as e:
+                    print(f"   ⚠️ Imagen no cacheada ({url}): {e}")
+                    with self._lock:
+                        self.stats['failed'] += 1
+                        self.index[url] = {'failed_at': now.isoformat(timespec='seconds'), 'error': str(e)[:200]}
+                    return None
+
+            stamp = now.isoformat(timespec='seconds')
+            with self._lock:
+                self.stats['fetched'] += 1
+                self.index[url] = {'hash': digest, 'fetched_at': stamp, 'last_used': stamp}
+            return digest
+
+    def rewrite(self, event: Dict) -> Dict:
+        """Apunta `imagen_url` de un evento transformado a sus variantes cacheadas."""
+        evento = event.get('evento', event)
+        original = evento.get('imagen_original_url') or evento.get('imagen_url')
+        digest = self.resolve(original)
+        if digest and self.base_url:
+            evento['imagen_original_url'] = original
+            evento['imagen_url'] = self.public_url(digest, 'thumb')
+            evento['imagen_detalle_url'] = self.public_url(digest, 'detail')
+        return event
+
+    def apply(self, events: List[Dict], workers: int = IMAGE_WORKERS) -> List[Dict]:
+        """Reescribe las imágenes de un lote de eventos (descargas en paralelo)."""
+        if not self.base_url:
+            print(f"   ⚠️ Sin {IMAGE_BASE_ENV}: se cachean las imágenes pero imagen_url no se reescribe")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(self.rewrite, events))
+        return events
+
+    def summary(self) -> str:
+        s = self.stats
+        line = (f"{s['fetched']} descargadas, {s['hits']} ya en caché, "
+                f"{s['deduplicated']} duplicadas por contenido, {s['failed']} fallidas")
+        if s['bytes_original']:
+            line += (f" · miniaturas {s['bytes_thumb'] / 1e3:.0f} KB frente a "
+                     f"{s['bytes_original'] / 1e3:.0f} KB de originales")
+        return line
+
+    def save(self, now: datetime = None):
+        """Guarda el índice, purgando entradas sin usar y variantes huérfanas."""
+        now = now or datetime.now()
+
+        def alive(entry):
+            stamp = entry.get('last_used') or entry.get('failed_at')
+            return bool(stamp) and now - datetime.fromisoformat(stamp) <= UNUSED_TTL
+
+        with self._lock:
+            self.index = {url: e for url, e in self.index.items() if alive(e)}
+            referenced = {e['hash'] for e in self.index.values() if e.get('hash')}
+            if self.store_dir.exists():
+                for path in self.store_dir.glob('*.webp'):
+                    if path.name.split('-')[0] not in referenced:
+                        path.unlink()
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2, ensure_ascii=False)
+
+
+def create_image_cache(base_url: str = None, store_dir: Path = IMAGE_DIR) -> Optional[ImageCache]:
+    """ImageCache lista para usar, o None (con aviso) si falta Pillow o WebP."""
+    try:
+        from PIL import features
+    except ImportError:
+        print("   ⚠️ Pillow no está instalado: se mantienen las imágenes originales")
+        return None
+    if not features.check('webp'):
+        print("   ⚠️ Pillow sin soporte WebP: se mantienen las imágenes originales")
+        return None
+    return ImageCache(store_dir, base_url)
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Cachear carteles y generar sus variantes WebP')
+    parser.add_argument('urls', nargs='*', help='URLs de imágenes a cachear')
+    parser.add_argument('--events', metavar='FICHERO', help='Reescribir las imágenes de un events.json ya generado')
+    parser.add_argument('--store', default=str(IMAGE_DIR), metavar='DIR', help=f'Directorio del almacén (por defecto {IMAGE_DIR})')
+    parser.add_argument('--base-url', help=f'URL pública del almacén (por defecto ${IMAGE_BASE_ENV})')
+    parser.add_argument('--workers', type=int, default=IMAGE_WORKERS, help=f'Descargas simultáneas (por defecto {IMAGE_WORKERS})')
+    args = parser.parse_args()
+
+    cache = create_image_cache(args.base_url, Path(args.store))
+    if cache is None:
+        return 1
+    if args.events:
+        with open(args.events, 'r', encoding='utf-8') as f:
+            events = json.load(f)
+        cache.apply(events, args.workers)
+        with open(args.events, 'w', encoding='utf-8') as f:
+            json.dump(events, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.events} reescrito")
+    for url in args.urls:
+        digest = cache.resolve(url)
+        print(f"   {url} -> {cache.public_url(digest, 'thumb') if digest else 'sin cachear'}")
+    cache.save()
+    print(f"🖼️ Imágenes: {cache.summary()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Recolector de enlaces a eventos en páginas de listado
+=====================================================
+extract_events_from_html prueba varias estrategias (enlaces con aria-label,
+tarjetas, fallback simple, markdown y texto crudo). Antes cada una recorría el
+documento o el texto por su cuenta (find_all con lambdas, hasta cuatro regex
+sobre rawHtml) y deduplicaba con búsquedas lineales en la lista de eventos.
+
+LinkHarvest recolecta los candidatos una sola vez por fuente para que todas
+las estrategias los consuman:
+
+- anchors: etiquetas <a> cuyo href contiene /events/ (un solo recorrido del
+  árbol). No se deduplican: una tarjeta puede repetir el enlace y solo uno
+  lleva el aria-label o la imagen; las estrategias deduplican por slug.
+- markdown_links: enlaces [texto](url) del markdown, tal cual aparecen
+- text_urls(fuente): URLs de eventos en markdown/html/rawHtml (href, data-href,
+  cadenas JSON...) con un único patrón, únicas por slug normalizado
+- event_codes(): códigos de 4 caracteres de Sala Rem en el HTML, sin repetir
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Caracteres que delimitan una URL dentro de HTML, JSON o markdown
+URL_DELIMITERS = set('"\'<>()[] \t\r\n')
+
+# El literal /events/ ancla la búsqueda; el prefijo de la URL se recupera hacia atrás
+EVENT_PATH_PATTERN = re.compile(r'/events/[^"\'\s<>()\[\]/?#]+')
+MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+
+# Códigos de evento de Sala Rem, de más a menos fiable (el grupo que casa da la prioridad)
+EVENT_CODE_PATTERN = re.compile(
+    r'sala-rem/events/[^"\s<>\)]+-([A-Z0-9]{4})'      # En URLs de eventos
+    r'|/events/[^"\s<>\)]+-([A-Z0-9]{4})'             # En URLs de eventos (sin sala-rem)
+    r'|data-code["\']?\s*[:=]\s*["\']?([A-Z0-9]{4})'  # En atributos data-code
+    r'|code["\']?\s*[:=]\s*["\']?([A-Z0-9]{4})',      # En atributos code
+    re.IGNORECASE
+)
+
+
+def normalize_slug(url: str) -> str:
+    """
+    Clave de deduplicación de una URL de evento: lo que va tras /events/, sin
+    parámetros ni fragmento y en minúsculas.
+    """
+    slug = url.split('/events/')[-1].split('?')[0].split('#')[0]
+    return slug.strip().rstrip('/').lower()
+
+
+class LinkHarvest:
+    """
+    Candidatos a enlaces de eventos de una página de listado. Cada vista se
+    calcula la primera vez que se pide y se reutiliza después.
+    """
+
+    def __init__(self, soup, html: str = '', markdown: str = '', raw_html: str = ''):
+        self.soup = soup
+        self.sources = {'html': html or '', 'markdown': markdown or '', 'raw_html': raw_html or ''}
+        self._anchors = None
+        self._markdown_links = None
+        self._text_urls: Dict[str, List[str]] = {}
+
+    @property
+    def anchors(self) -> List:
+        if self._anchors is None:
+            self._anchors = [a for a in self.soup.find_all('a', href=True) if '/events/' in a['href']]
+        return self._anchors
+
+    @property
+    def markdown_links(self) -> List[Tuple[str, str]]:
+        if self._markdown_links is None:
+            self._markdown_links = MARKDOWN_LINK_PATTERN.findall(self.sources['markdown'])
+        return self._markdown_links
+
+    def text_urls(self, source: str, marker: str = '/events/') -> List[str]:
+        """
+        URLs de eventos en el texto de una fuente ('html', 'markdown', 'raw_html'),
+        únicas por slug y en orden de aparición. marker filtra (p. ej. 'sala-rem/events/').
+        """
+        if source not in self._text_urls:
+            text = self.sources[source]
+            urls = {}
+            for match in EVENT_PATH_PATTERN.finditer(text):
+                start = match.start()
+                while start > 0 and text[start - 1] not in URL_DELIMITERS:
+                    start -= 1
+                url = text[start:match.end()]
+                urls.setdefault(normalize_slug(url), url)
+            self._text_urls[source] = list(urls.values())
+        marker = marker.lower()
+        return [url for url in self._text_urls[source] if marker in url.lower()]
+
+    def event_codes(self, source: str = 'html') -> List[str]:
+        """
+        Códigos con letras y números, ordenados por fiabilidad del patrón y luego
+        por orden de aparición, sin repetir.
+        """
+        found = []
+        for match in EVENT_CODE_PATTERN.finditer(self.sources[source]):
+            priority = match.lastindex
+            found.append((priority, match.start(), match.group(priority).upper()))
+        codes = {}
+        for _, _, code in sorted(found):
+            if any(x.isalpha() for x in code) and any(x.isdigit() for x in code):
+                codes.setdefault(code, None)
+        return list(codes)
@@ -0,0 +1,151 @@
+"""
+Archivo de páginas descargadas
+==============================
+Cada respuesta de Firecrawl (listados, detalles y sondas) se guarda en
+data/snapshots/ para poder volver a extraer los eventos sin red ni créditos
+cuando se corrige un parser (`python scraper_firecrawl.py --reparse`):
+
+    data/snapshots/
+        blobs/3f/3fa4...e1.json.gz      # documento (html, raw_html, markdown, links, metadata)
+        runs/20261019T120000.jsonl       # una línea por respuesta: {url, blob, recorded_at, latency_s}
+
+Los documentos van comprimidos y direccionados por el hash de su contenido:
+una página que no cambia entre ejecuciones ocupa un solo blob.
+
+SnapshotStore.recorder(run_at) tiene la interfaz de fixtures de
+firecrawl_replay (record / responses), así que se graba con RecordingFirecrawl
+y se reproduce con ReplayFirecrawl. Al reproducir una ejecución, una URL que
+no se descargó en ella (un detalle que no tocaba refrescar) devuelve su última
+versión anterior.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from firecrawl_replay import DOCUMENT_FIELDS
+
+SNAPSHOT_DIR = Path(__file__).parent / "data" / "snapshots"
+RUN_ID_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def run_id(run_at: datetime) -> str:
+    return run_at.strftime(RUN_ID_FORMAT)
+
+
+class SnapshotStore:
+    """Blobs comprimidos compartidos y un índice por ejecución."""
+
+    def __init__(self, path: Path = SNAPSHOT_DIR):
+        self.path = Path(path)
+        self.blob_dir = self.path / 'blobs'
+        self.run_dir = self.path / 'runs'
+        self.stats = {'pages': 0, 'new_blobs': 0, 'bytes_written': 0}
+        self._lock = threading.Lock()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.json.gz"
+
+    def put(self, document: Dict) -> str:
+        """Guarda el documento (si no existía ya) y devuelve su hash."""
+        data = json.dumps({field: document.get(field) for field in (*DOCUMENT_FIELDS, 'metadata')},
+                          ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            self.stats['pages'] += 1
+            if path.exists():
+                return digest
+            path.parent.mkdir(parents=True, exist_ok=True)
+            compressed = gzip.compress(data, mtime=0)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(compressed)
+            tmp.replace(path)
+            self.stats['new_blobs'] += 1
+            self.stats['bytes_written'] += len(compressed)
+        return digest
+
+    def get(self, digest: str) -> Dict:
+        return json.loads(gzip.decompress(self._blob_path(digest).read_bytes()).decode('utf-8'))
+
+    def runs(self, since: str = None, until: str = None) -> List[str]:
+        """Ejecuciones grabadas (ids ordenados) entre since y until (YYYY-MM-DD, inclusive)."""
+        ids = sorted(p.stem for p in self.run_dir.glob('*.jsonl'))
+        since = since.replace('-', '') if since else None
+        until = until.replace('-', '') if until else None
+        return [i for i in ids if (not since or i >= since) and (not until or i[:len(until)] <= until)]
+
+    def index(self, run: str) -> List[Dict]:
+        path = self.run_dir / f"{run}.jsonl"
+        if not path.exists():
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def recorder(self, run_at: datetime) -> 'RunSnapshots':
+        return RunSnapshots(self, run_id(run_at))
+
+    def summary(self) -> str:
+        return (f"{self.stats['pages']} páginas, {self.stats['new_blobs']} nuevas "
+                f"({self.stats['bytes_written'] / 1024:.0f} KB comprimidos)")
+
+
+class RunSnapshots:
+    """
+    Páginas de una ejecución con la interfaz de fixtures de firecrawl_replay.
+    responses(url) devuelve las respuestas de esta ejecución en orden o, si no
+    hay, la última respuesta de una ejecución anterior.
+    """
+
+    def __init__(self, store: SnapshotStore, run: str):
+        self.store = store
+        self.run = run
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[Dict]]] = None
+        self._fallback: Optional[Dict[str, Dict]] = None
+
+    @property
+    def reference(self) -> datetime:
+        return datetime.strptime(self.run, RUN_ID_FORMAT)
+
+    def record(self, url: str, response: Dict):
+        entry = {
+            'url': url,
+            'blob': self.store.put(response),
+            'recorded_at': response.get('recorded_at'),
+            'latency_s': response.get('latency_s'),
+        }
+        with self._lock:
+            self.store.run_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.store.run_dir / f"{self.run}.jsonl", 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            if self._entries is not None:
+                self._entries.setdefault(url, []).append(entry)
+
+    def _load(self):
+        with self._lock:
+            if self._entries is not None:
+                return
+            entries: Dict[str, List[Dict]] = {}
+            for entry in self.store.index(self.run):
+                entries.setdefault(entry['url'], []).append(entry)
+            fallback: Dict[str, Dict] = {}
+            for run in self.store.runs():
+                if run >= self.run:
+                    break
+                for entry in self.store.index(run):
+                    fallback[entry['url']] = entry
+            self._entries, self._fallback = entries, fallback
+
+    def urls(self) -> List[str]:
+        self._load()
+        return list(self._entries)
+
+    def responses(self, url: str) -> List[Dict]:
+        self._load()
+        entries = self._entries.get(url) or ([self._fallback[url]] if url in self._fallback else [])
+        return [dict(self.store.get(e['blob']), latency_s=e.get('latency_s') or 0.0) for e in entries]
@@ -0,0 +1,76 @@
+"""
+Pool de procesos para el parseo
+===============================
+El parseo (BeautifulSoup sobre rawHtml de varios MB, JSON-LD, markdown) es CPU
+puro y, hecho en el hilo que descarga, bloquea la red. Los hilos de descarga
+envían los payloads crudos a este pool, dimensionado al número de núcleos, y
+reciben registros planos ya extraídos.
+"""
+
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Optional
+
+from tracing import TRACER, call_with_spans
+
+
+class InlineExecutor(Executor):
+    """
+    Ejecutor síncrono con la misma interfaz que ProcessPoolExecutor.
+    Útil para depurar (--parse-workers 1) o donde no se pueden crear procesos.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class ParsePool(Executor):
+    """
+    ProcessPoolExecutor que, con las trazas activas, trae de vuelta los spans
+    registrados en los procesos hijos (ver tracing.call_with_spans).
+    """
+
+    def __init__(self, workers: int):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        inner = self.pool.submit(call_with_spans, fn, TRACER.enabled, TRACER.trace_id, *args, **kwargs)
+
+        def done(inner_future):
+            try:
+                result, spans = inner_future.result()
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            TRACER.add_spans(spans)
+            future.set_result(result)
+
+        inner.add_done_callback(done)
+        return future
+
+    def shutdown(self, wait=True, **kwargs):
+        self.pool.shutdown(wait=wait, **kwargs)
+
+
+def default_parse_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def create_parse_pool(workers: Optional[int] = None) -> Executor:
+    """
+    Crea el pool de parseo. workers=None usa todos los núcleos; 1 parsea en línea.
+    """
+    workers = workers or default_parse_workers()
+    if workers <= 1:
+        return InlineExecutor()
+    try:
+        return ParsePool(workers)
+    except (OSError, NotImplementedError) as e:
+        print(f"   ⚠️ No se pudo crear el pool de procesos ({e}), se parsea en línea")
+        return InlineExecutor()
@@ -0,0 +1,156 @@
+"""
+Pipeline por etapas con colas acotadas
+======================================
+Ejecuta una cadena de etapas (descubrir -> deduplicar -> descargar -> parsear ->
+transformar -> destino) conectadas por colas asyncio de tamaño limitado:
+
+- Cada etapa tiene su propio número de workers.
+- Si una etapa va lenta, su cola de entrada se llena y las anteriores esperan
+  al emitir (backpressure), así que la memoria no crece sin límite.
+- Las etapas trabajan a la vez: la duración total tiende a la de la etapa más
+  lenta en lugar de a la suma de todas.
+
+Un handler es `async def handler(item, emit)`; llama a `await emit(x)` por cada
+resultado que pasa a la siguiente etapa (cero, uno o varios). Un handler que
+lanza una excepción no para el pipeline: se cuenta el error y se sigue.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from tracing import TRACER
+
+# Tamaño por defecto de las colas entre etapas
+QUEUE_SIZE = 64
+
+Handler = Callable[[object, Callable[[object], Awaitable[None]]], Awaitable[None]]
+
+_STOP = object()
+
+
+class Stage:
+    """
+    Una etapa del pipeline. Con priority, su cola de entrada es una cola de
+    prioridad ordenada por priority(item) (menor primero).
+    on_close(emit) se llama cuando la etapa ha procesado todo (p. ej. vaciar lotes).
+    """
+
+    def __init__(self, name: str, handler: Handler, workers: int = 1, maxsize: int = QUEUE_SIZE,
+                 priority: Callable = None, on_close: Callable = None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self.priority = priority
+        self.on_close = on_close
+        self.stats = {'in': 0, 'out': 0, 'errors': 0, 'busy_s': 0.0, 'blocked_s': 0.0, 'max_depth': 0}
+        self.queue: Optional[asyncio.Queue] = None
+        self._seq = itertools.count()
+
+    def _make_queue(self):
+        self.queue = asyncio.PriorityQueue(self.maxsize) if self.priority else asyncio.Queue(self.maxsize)
+
+    async def put(self, item):
+        if self.priority:
+            entry = (0, self.priority(item), next(self._seq), item)
+        else:
+            entry = item
+        await self.queue.put(entry)
+        self.stats['max_depth'] = max(self.stats['max_depth'], self.queue.qsize())
+
+    async def put_stop(self):
+        # En la cola de prioridad la marca de fin va detrás de todos los items
+        await self.queue.put((1, 0, next(self._seq), _STOP) if self.priority else _STOP)
+
+    async def get(self):
+        entry = await self.queue.get()
+        return entry[-1] if self.priority else entry
+
+
+class Pipeline:
+    """
+    Cadena de etapas. run(items) mete los items en la primera etapa y espera a
+    que todas terminen; lo que emite la última etapa se descarta.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.wall_s = 0.0
+
+    async def _worker(self, stage: Stage, emit, index: int):
+        track = f"{stage.name}-{index}"
+        while True:
+            item = await stage.get()
+            if item is _STOP:
+                return
+            stage.stats['in'] += 1
+            started = time.monotonic()
+            try:
+                with TRACER.span(stage.name, 'pipeline', track=track):
+                    await stage.handler(item, emit)
+            except Exception as e:
+                stage.stats['errors'] += 1
+                print(f"   ⚠️ Error en la etapa '{stage.name}': {e}")
+            finally:
+                stage.stats['busy_s'] += time.monotonic() - started
+
+    def _emitter(self, index: int):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        async def emit(item):
+            stage.stats['out'] += 1
+            if downstream is None:
+                return
+            started = time.monotonic()
+            await downstream.put(item)
+            stage.stats['blocked_s'] += time.monotonic() - started
+        return emit
+
+    async def _run_stage(self, index: int):
+        stage = self.stages[index]
+        emit = self._emitter(index)
+        await asyncio.gather(*(self._worker(stage, emit, i) for i in range(stage.workers)))
+        if stage.on_close:
+            try:
+                await stage.on_close(emit)
+            except Exception as e:
+                stage.stats['errors'] += 1
+                print(f"   ⚠️ Error cerrando la etapa '{stage.name}': {e}")
+        # Propagar el fin a la etapa siguiente (una marca por worker)
+        if index + 1 < len(self.stages):
+            downstream = self.stages[index + 1]
+            for _ in range(downstream.workers):
+                await downstream.put_stop()
+
+    async def _feed(self, items: Iterable):
+        first = self.stages[0]
+        for item in items:
+            await first.put(item)
+        for _ in range(first.workers):
+            await first.put_stop()
+
+    async def run_async(self, items: Iterable):
+        for stage in self.stages:
+            stage._make_queue()
+        started = time.monotonic()
+        await asyncio.gather(self._feed(items), *(self._run_stage(i) for i in range(len(self.stages))))
+        self.wall_s = time.monotonic() - started
+
+    def run(self, items: Iterable):
+        asyncio.run(self.run_async(items))
+
+    def summary(self) -> List[str]:
+        lines = [f"{'etapa':<12} {'workers':>7} {'entran':>7} {'salen':>7} {'errores':>7} "
+                 f"{'ocupada':>9} {'bloqueada':>10} {'cola máx':>9}"]
+        for stage in self.stages:
+            s = stage.stats
+            lines.append(f"{stage.name:<12} {stage.workers:>7} {s['in']:>7} {s['out']:>7} {s['errors']:>7} "
+                         f"{s['busy_s']:>8.1f}s {s['blocked_s']:>9.1f}s {s['max_depth']:>9}")
+        lines.append(f"Duración total: {self.wall_s:.1f}s")
+        return lines
+
+    def stats(self) -> Dict[str, Dict]:
+        return {stage.name: dict(stage.stats, workers=stage.workers) for stage in self.stages}
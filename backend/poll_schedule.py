@@ -0,0 +1,178 @@
+"""
+Sondeo adaptativo de listados
+=============================
+Cadencia y estado del modo demonio (`python scraper_firecrawl.py --daemon`),
+alternativa a la ejecución diaria del cron: cada venue tiene su propio
+intervalo según la hora en Madrid y lo cerca que esté su próximo evento.
+
+    noche_finde      10 min   viernes y sábado de 18:00 a 05:00
+    inicio_cercano   15 min   el venue tiene un evento que empieza en menos de 6 h
+    tarde            1 h      cualquier día de 17:00 a 24:00
+    base             3 h      el resto (entre semana, de día)
+
+Cada sondeo solo descarga el listado. Se calcula una huella por evento con
+sus campos del listado (nombre, fecha, horario, imagen, precios...) y solo se
+piden los detalles de los eventos nuevos o cuya huella ha cambiado. Un evento
+que falta en MISSING_POLLS_TO_DELETE listados seguidos se da por retirado.
+
+El estado se guarda en data/poll_state.json:
+
+    {"day": "2026-10-19", "credits": 84,
+     "venues": {url: {"next_poll", "interval", "fingerprints": {clave: huella}, "missing": {clave: n}}}}
+"""
+
+import hashlib
+import json
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+    TIMEZONE = ZoneInfo('Europe/Madrid')
+except Exception:                       # Sin base de datos de zonas (tzdata): hora local
+    TIMEZONE = None
+
+POLL_STATE_PATH = Path(__file__).parent / "data" / "poll_state.json"
+
+# (nombre, intervalo), del más frecuente al menos frecuente
+POLL_INTERVALS = {
+    'noche_finde': timedelta(minutes=10),
+    'inicio_cercano': timedelta(minutes=15),
+    'tarde': timedelta(hours=1),
+    'base': timedelta(hours=3),
+}
+# Con el presupuesto diario agotado solo se sondea de vez en cuando hasta el día siguiente
+EXHAUSTED_INTERVAL = timedelta(hours=6)
+DAILY_CREDITS = 300
+
+NEAR_START = timedelta(hours=6)
+WEEKEND_EVENING = (4, 5)                # viernes y sábado (weekday)
+EVENING_START_HOUR = 17
+WEEKEND_START_HOUR = 18
+NIGHT_END_HOUR = 5
+MISSING_POLLS_TO_DELETE = 2
+
+# Campos del listado que entran en la huella (lo que cambia al editar el evento)
+LISTING_FIELDS = ('name', 'date_text', 'hora_inicio', 'hora_fin', 'image', 'code', 'prices',
+                  'age_min', 'sold_out', 'tickets')
+
+
+def madrid_now(now: datetime = None) -> datetime:
+    """Hora de Madrid (naive) para una hora local naive, o la actual."""
+    if TIMEZONE is None:
+        return now or datetime.now()
+    if now is None:
+        return datetime.now(TIMEZONE).replace(tzinfo=None)
+    return now.astimezone(TIMEZONE).replace(tzinfo=None)
+
+
+def poll_interval(local: datetime, next_start: Optional[datetime] = None) -> Tuple[str, timedelta]:
+    """Nombre e intervalo de sondeo para la hora de Madrid `local`."""
+    # La madrugada pertenece a la noche anterior
+    night = local - timedelta(hours=NIGHT_END_HOUR)
+    if night.weekday() in WEEKEND_EVENING and night.hour >= WEEKEND_START_HOUR - NIGHT_END_HOUR:
+        return 'noche_finde', POLL_INTERVALS['noche_finde']
+    if next_start is not None and timedelta(0) <= next_start - local <= NEAR_START:
+        return 'inicio_cercano', POLL_INTERVALS['inicio_cercano']
+    if local.hour >= EVENING_START_HOUR:
+        return 'tarde', POLL_INTERVALS['tarde']
+    return 'base', POLL_INTERVALS['base']
+
+
+def event_start(event_day: Optional[date], hora_inicio: str) -> Optional[datetime]:
+    if event_day is None:
+        return None
+    try:
+        hour, minute = (int(part) for part in (hora_inicio or '23:00').split(':')[:2])
+        return datetime.combine(event_day, time(hour, minute))
+    except ValueError:
+        return datetime.combine(event_day, time(23, 0))
+
+
+def listing_fingerprint(event: Dict) -> str:
+    data = {field: event.get(field) for field in LISTING_FIELDS if event.get(field) not in (None, '', [])}
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+                        .encode('utf-8')).hexdigest()[:16]
+
+
+class PollState:
+    """Próximo sondeo, huellas del último listado y créditos gastados hoy."""
+
+    def __init__(self, path: Optional[Path] = POLL_STATE_PATH):
+        self.path = Path(path) if path else None
+        self.venues: Dict[str, Dict] = {}
+        self.day = None
+        self.credits = 0
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                self.venues = stored.get('venues', {})
+                self.day, self.credits = stored.get('day'), stored.get('credits', 0)
+            except Exception as e:
+                print(f"   ⚠️ Estado del sondeo ilegible, se reinicia: {e}")
+
+    def spend(self, credits: int, local: datetime) -> bool:
+        """Suma los créditos del día; devuelve True si ha empezado un día nuevo."""
+        today = local.date().isoformat()
+        new_day = self.day is not None and self.day != today
+        if self.day != today:
+            self.day, self.credits = today, 0
+        self.credits += credits
+        return new_day
+
+    def due(self, urls: List[str], now: datetime) -> List[str]:
+        """Venues a los que les toca sondeo, del más atrasado al menos."""
+        def next_poll(url):
+            value = self.venues.get(url, {}).get('next_poll')
+            return datetime.fromisoformat(value) if value else datetime.min
+        return sorted((url for url in urls if next_poll(url) <= now), key=next_poll)
+
+    def next_wakeup(self, urls: List[str]) -> Optional[datetime]:
+        polls = [self.venues.get(url, {}).get('next_poll') for url in urls]
+        if not all(polls):
+            return None
+        return min(datetime.fromisoformat(p) for p in polls)
+
+    def diff(self, url: str, events: List[Dict], key) -> Tuple[List[Dict], List[str]]:
+        """
+        Compara el listado con el anterior: (eventos nuevos o cambiados, claves
+        retiradas). Un listado vacío no retira nada (puede ser un fallo).
+        """
+        venue = self.venues.setdefault(url, {})
+        old = venue.get('fingerprints', {})
+        missing = venue.get('missing', {})
+        # Una clave por evento (la primera aparición), como en raw_events.json
+        by_key: Dict[str, Dict] = {}
+        for event in events:
+            by_key.setdefault(key(event), event)
+        fingerprints = {k: listing_fingerprint(e) for k, e in by_key.items()}
+        changed = [e for k, e in by_key.items() if old.get(k) != fingerprints[k]]
+        removed = []
+        if events:
+            for k in old:
+                if k in fingerprints:
+                    continue
+                missing[k] = missing.get(k, 0) + 1
+                if missing[k] >= MISSING_POLLS_TO_DELETE:
+                    removed.append(k)
+            for k in removed:
+                missing.pop(k)
+            kept = {k: fp for k, fp in old.items() if k not in fingerprints and k not in removed}
+            venue['fingerprints'] = {**kept, **fingerprints}
+            venue['missing'] = {k: n for k, n in missing.items() if k not in fingerprints}
+        return changed, removed
+
+    def schedule(self, url: str, now: datetime, name: str, interval: timedelta):
+        venue = self.venues.setdefault(url, {})
+        venue['interval'] = name
+        venue['last_poll'] = now.isoformat(timespec='seconds')
+        venue['next_poll'] = (now + interval).isoformat(timespec='seconds')
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'day': self.day, 'credits': self.credits, 'venues': self.venues}, f, ensure_ascii=False)
@@ -0,0 +1,159 @@
+"""
+Modo de perfilado por etapas (--profile)
+========================================
+Ejecuta cada etapa del scraper (listados, deduplicación, sondas, detalles,
+transformación, guardado, subida) bajo cProfile y tracemalloc y deja en
+DATA_DIR/profile/:
+
+- <etapa>.txt: tiempo de pared y CPU, pico de memoria, top-N funciones por
+  tiempo acumulado y por tiempo propio, y top-N líneas que más memoria retienen
+- <etapa>.prof: estadísticas crudas de cProfile (snakeviz, pstats...)
+- stacks.collapsed: pilas muestreadas en formato "a;b;c N" para flamegraph.pl
+  o speedscope, con la etapa como raíz
+- summary.json: resumen por etapa
+
+El perfilado solo ve el hilo principal, así que --profile fuerza la ejecución
+secuencial con descargas y parseo en línea.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_TOP_N = 30
+SAMPLE_INTERVAL_S = 0.005
+
+
+class StageProfiler:
+    """
+    Perfilador por etapas. Desactivado, stage() no hace nada.
+    Las etapas no se anidan: una etapa dentro de otra cuenta para la exterior.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.out_dir: Optional[Path] = None
+        self.top_n = DEFAULT_TOP_N
+        self.results: Dict[str, Dict] = {}
+        self.stacks: Counter = Counter()
+        self._active: Optional[str] = None
+        self._main_thread_id = threading.main_thread().ident
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self, out_dir: Path, top_n: int = DEFAULT_TOP_N):
+        self.enabled = True
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.top_n = top_n
+        tracemalloc.start(10)
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='profile-sampler', daemon=True)
+        self._sampler.start()
+
+    # ----- Muestreo de pilas -----
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL_S):
+            stage = self._active
+            if stage is None:
+                continue
+            frame = sys._current_frames().get(self._main_thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(stage)
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    # ----- Etapas -----
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled or self._active is not None:
+            yield
+            return
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        snapshot_before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        self._active = name
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = None
+            wall_s = time.perf_counter() - wall_started
+            cpu_s = time.process_time() - cpu_started
+            memory_after, peak = tracemalloc.get_traced_memory()
+            snapshot_after = tracemalloc.take_snapshot()
+            self.results[name] = {
+                'wall_s': round(wall_s, 3),
+                'cpu_s': round(cpu_s, 3),
+                'peak_bytes': peak,
+                'peak_over_start_bytes': peak - memory_before,
+                'retained_bytes': memory_after - memory_before,
+            }
+            self._write_stage(name, profile, snapshot_before, snapshot_after)
+
+    def _write_stage(self, name: str, profile: cProfile.Profile, before, after):
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')]
+        allocations = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+
+        profile.dump_stats(str(self.out_dir / f"{name}.prof"))
+        buffer = io.StringIO()
+        stats = pstats.Stats(profile, stream=buffer).strip_dirs()
+        buffer.write(f"=== Top {self.top_n} por tiempo acumulado ===\n")
+        stats.sort_stats('cumulative').print_stats(self.top_n)
+        buffer.write(f"\n=== Top {self.top_n} por tiempo propio ===\n")
+        stats.sort_stats('tottime').print_stats(self.top_n)
+
+        result = self.results[name]
+        with open(self.out_dir / f"{name}.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Etapa: {name}\n")
+            f.write(f"Tiempo de pared: {result['wall_s']:.3f}s  CPU: {result['cpu_s']:.3f}s\n")
+            f.write(f"Pico de memoria: {result['peak_bytes'] / 1e6:.1f} MB "
+                    f"(+{result['peak_over_start_bytes'] / 1e6:.1f} MB sobre el inicio de la etapa)\n\n")
+            f.write(buffer.getvalue())
+            f.write(f"\n=== Top {self.top_n} líneas por memoria retenida ===\n")
+            for stat in allocations[:self.top_n]:
+                f.write(f"{stat}\n")
+
+    # ----- Cierre -----
+
+    def finish(self) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        tracemalloc.stop()
+        self.enabled = False
+
+        with open(self.out_dir / 'stacks.collapsed', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(self.out_dir / 'summary.json', 'w', encoding='utf-8') as f:
+            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        return self.out_dir
+
+    def summary(self):
+        for name, r in self.results.items():
+            yield (f"{name:<14} {r['wall_s']:>8.2f}s pared {r['cpu_s']:>8.2f}s CPU "
+                   f"{r['peak_bytes'] / 1e6:>8.1f} MB pico")
+
+
+PROFILER = StageProfiler()
@@ -0,0 +1,116 @@
+"""
+Cadencia de refresco por niveles
+================================
+No todos los eventos necesitan el scrape de detalles en cada ejecución: los de
+esta noche cambian (precios, entradas agotadas) y los de dentro de tres meses
+casi nunca. Cada evento recibe un nivel según:
+
+- Días que faltan para el evento.
+- Volatilidad observada: cuántas veces cambiaron sus entradas (precio o
+  agotadas) entre scrapes anteriores. Un evento volátil sube un nivel y uno
+  que nunca cambia baja un nivel.
+
+El estado se guarda en data/refresh_state.json por clave de evento.
+"""
+
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# (nombre, días máximos hasta el evento, intervalo mínimo entre refrescos)
+# Ordenados del más frecuente al menos frecuente.
+REFRESH_TIERS = [
+    ('inminente', 2, timedelta(0)),
+    ('semana', 7, timedelta(hours=20)),
+    ('mes', 30, timedelta(days=3)),
+    ('lejano', None, timedelta(days=7)),
+]
+
+VOLATILE_RATIO = 0.5        # Cambios / observaciones para considerar un evento volátil
+MIN_OBSERVATIONS = 2        # Observaciones necesarias antes de aplicar la volatilidad
+STABLE_OBSERVATIONS = 4     # Observaciones sin cambios para considerarlo estable
+
+
+def tickets_fingerprint(tickets: List[Dict]) -> str:
+    """
+    Huella de las entradas de un evento (tipo, precio y agotadas), independiente del orden.
+    """
+    items = sorted(
+        (str(t.get('tipo', '')).strip().lower(), str(t.get('precio', '')), bool(t.get('agotadas')))
+        for t in tickets or []
+    )
+    return hashlib.sha1(json.dumps(items, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+class RefreshState:
+    """
+    Historial de refrescos por evento: último scrape, huella de entradas y cambios vistos.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, Dict] = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"   ⚠️ Estado de refresco ilegible, se reinicia: {e}")
+                self.entries = {}
+
+    def volatility(self, key: str) -> Optional[float]:
+        entry = self.entries.get(key)
+        if not entry or entry.get('observations', 0) < MIN_OBSERVATIONS:
+            return None
+        return entry['changes'] / (entry['observations'] - 1)
+
+    def tier_for(self, key: str, event_date: Optional[date], today: date) -> int:
+        """
+        Índice en REFRESH_TIERS. Sin fecha conocida se trata como 'semana' por prudencia.
+        """
+        if event_date is None:
+            tier = 1
+        else:
+            days = (event_date - today).days
+            tier = next(i for i, (_, max_days, _) in enumerate(REFRESH_TIERS)
+                        if max_days is None or days <= max_days)
+
+        entry = self.entries.get(key, {})
+        volatility = self.volatility(key)
+        if volatility is not None and volatility >= VOLATILE_RATIO:
+            tier = max(0, tier - 1)
+        elif entry.get('observations', 0) >= STABLE_OBSERVATIONS and entry.get('changes', 0) == 0 and tier > 0:
+            tier = min(len(REFRESH_TIERS) - 1, tier + 1)
+        return tier
+
+    def is_due(self, key: str, tier: int, now: datetime) -> bool:
+        entry = self.entries.get(key)
+        if not entry or not entry.get('last_fetched'):
+            return True
+        last_fetched = datetime.fromisoformat(entry['last_fetched'])
+        return now - last_fetched >= REFRESH_TIERS[tier][2]
+
+    def record_fetch(self, key: str, tickets: List[Dict], now: datetime):
+        entry = self.entries.setdefault(key, {'observations': 0, 'changes': 0, 'fingerprint': None})
+        fingerprint = tickets_fingerprint(tickets)
+        if entry['fingerprint'] is not None and entry['fingerprint'] != fingerprint:
+            entry['changes'] += 1
+        entry['fingerprint'] = fingerprint
+        entry['observations'] += 1
+        entry['last_fetched'] = now.isoformat(timespec='seconds')
+
+    def prune(self, now: datetime, max_age: timedelta = timedelta(days=120)):
+        """Olvida eventos que llevan mucho tiempo sin scrapearse (ya pasados o retirados)."""
+        self.entries = {
+            k: v for k, v in self.entries.items()
+            if v.get('last_fetched') and now - datetime.fromisoformat(v['last_fetched']) <= max_age
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Archivo histórico de ejecuciones
+================================
+events.json y raw_events.json se sobrescriben en cada ejecución. Este archivo
+guarda, solo añadiendo, los eventos y entradas de todas las ejecuciones en un
+formato columnar comprimido para analítica:
+
+    data/archive/
+        manifest.jsonl                 # una línea por ejecución: {run, file, events, tickets, bytes}
+        2026/run-20261019T120000.pfa   # un segmento por ejecución
+        2026/run-20261019T120000.r20261102T093000.pfa   # la misma, re-extraída (--reparse)
+
+Un segmento es una cabecera JSON con la ubicación de cada columna seguida de
+un bloque zlib por columna. Las columnas de texto repetitivo (venue, ciudad,
+tags, tipo de entrada...) van codificadas con diccionario: el bloque guarda
+ids enteros y la cabecera el diccionario. Leer una columna solo descomprime su
+bloque, así que recorrer meses de precios no toca los nombres ni las URLs.
+
+Tablas:
+    events   key, code, venue, ciudad, fecha, hora_inicio, nombre, tags, edad_minima
+    tickets  event (fila en events), tipo, precio, agotadas
+
+Uso:
+    python run_archive.py stats
+    python run_archive.py column tickets.precio --since 2026-01-01
+    python run_archive.py prices --venue sala-rem --since 2026-01-01
+"""
+
+import argparse
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_DIR = Path(__file__).parent / "data" / "archive"
+MAGIC = b'PFA1'
+COMPRESSION_LEVEL = 6
+
+# (tabla, columna) -> tipo de codificación
+SCHEMA = {
+    'events': {
+        'key': 'str', 'code': 'str', 'venue': 'dict', 'ciudad': 'dict', 'fecha': 'dict',
+        'hora_inicio': 'dict', 'nombre': 'str', 'tags': 'dict_list', 'edad_minima': 'int',
+    },
+    'tickets': {
+        'event': 'int', 'tipo': 'dict', 'precio': 'float', 'agotadas': 'bool',
+    },
+}
+
+_LITTLE = sys.byteorder == 'little'
+
+
+def _array_bytes(typecode: str, values) -> bytes:
+    data = array(typecode, values)
+    if not _LITTLE:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _array_from(typecode: str, raw: bytes) -> array:
+    data = array(typecode)
+    data.frombytes(raw)
+    if not _LITTLE:
+        data.byteswap()
+    return data
+
+
+def encode_column(kind: str, values: List) -> Tuple[bytes, Dict]:
+    """(bloque sin comprimir, metadatos para la cabecera) de una columna."""
+    if kind == 'int':
+        return _array_bytes('q', (int(v or 0) for v in values)), {}
+    if kind == 'float':
+        return _array_bytes('d', (float('nan') if v is None else float(v) for v in values)), {}
+    if kind == 'bool':
+        return bytes(1 if v else 0 for v in values), {}
+    if kind == 'str':
+        return json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), {}
+    if kind == 'dict':
+        dictionary: Dict[str, int] = {}
+        ids = [dictionary.setdefault('' if v is None else str(v), len(dictionary)) for v in values]
+        return _array_bytes('I', ids), {'dictionary': list(dictionary)}
+    if kind == 'dict_list':
+        dictionary = {}
+        offsets, ids = [0], []
+        for items in values:
+            ids.extend(dictionary.setdefault(str(item), len(dictionary)) for item in items or [])
+            offsets.append(len(ids))
+        return _array_bytes('I', offsets) + _array_bytes('I', ids), {'dictionary': list(dictionary),
+                                                                      'offsets': len(offsets)}
+    raise ValueError(f"Tipo de columna desconocido: {kind}")
+
+
+def decode_column(kind: str, raw: bytes, meta: Dict) -> List:
+    if kind == 'int':
+        return _array_from('q', raw).tolist()
+    if kind == 'float':
+        return _array_from('d', raw).tolist()
+    if kind == 'bool':
+        return [b == 1 for b in raw]
+    if kind == 'str':
+        return json.loads(raw.decode('utf-8'))
+    if kind == 'dict':
+        dictionary = meta['dictionary']
+        return [dictionary[i] for i in _array_from('I', raw)]
+    if kind == 'dict_list':
+        dictionary = meta['dictionary']
+        offsets = _array_from('I', raw[:meta['offsets'] * 4])
+        ids = _array_from('I', raw[meta['offsets'] * 4:])
+        return [[dictionary[i] for i in ids[offsets[n]:offsets[n + 1]]] for n in range(len(offsets) - 1)]
+    raise ValueError(f"Tipo de columna desconocido: {kind}")
+
+
+def _price(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def rows_from_run(raw_events: List[Dict], transformed: List[Dict]) -> Dict[str, Dict[str, List]]:
+    """Columnas de las tablas events y tickets a partir de la salida de una ejecución."""
+    tables = {table: {column: [] for column in columns} for table, columns in SCHEMA.items()}
+    events, tickets = tables['events'], tables['tickets']
+    for row, (raw, app) in enumerate(zip(raw_events, transformed)):
+        evento = app.get('evento', app)
+        lugar = evento.get('lugar') or {}
+        events['key'].append(evento.get('url_evento') or raw.get('url', ''))
+        events['code'].append(evento.get('code', ''))
+        events['venue'].append(raw.get('venue_slug', ''))
+        events['ciudad'].append(lugar.get('ciudad', ''))
+        events['fecha'].append(evento.get('fecha', ''))
+        events['hora_inicio'].append(evento.get('hora_inicio', ''))
+        events['nombre'].append(evento.get('nombreEvento', ''))
+        events['tags'].append(evento.get('tags') or [])
+        events['edad_minima'].append(_int(evento.get('edad_minima')))
+        for entrada in evento.get('entradas') or []:
+            tickets['event'].append(row)
+            tickets['tipo'].append(entrada.get('tipo', ''))
+            tickets['precio'].append(_price(entrada.get('precio')))
+            tickets['agotadas'].append(bool(entrada.get('agotadas')))
+    return tables
+
+
+def write_segment(path: Path, tables: Dict[str, Dict[str, List]], run_at: datetime) -> int:
+    """
+    Escribe un segmento: MAGIC, longitud de la cabecera (uint32), cabecera JSON
+    y los bloques. Devuelve el tamaño en bytes.
+    """
+    blocks = []
+    header = {'run': run_at.isoformat(timespec='seconds'), 'tables': {}}
+    offset = 0
+    for table, columns in tables.items():
+        rows = len(next(iter(columns.values()), []))
+        header['tables'][table] = {'rows': rows, 'columns': {}}
+        for column, values in columns.items():
+            kind = SCHEMA[table][column]
+            raw, meta = encode_column(kind, values)
+            block = zlib.compress(raw, COMPRESSION_LEVEL)
+            header['tables'][table]['columns'][column] = {'kind': kind, 'offset': offset, 'length': len(block), **meta}
+            blocks.append(block)
+            offset += len(block)
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for block in blocks:
+            f.write(block)
+    tmp.replace(path)
+    return path.stat().st_size
+
+
+class Segment:
+    """Segmento abierto: la cabecera se lee al abrirlo, cada columna bajo demanda."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"{self.path} no es un segmento del archivo")
+            (length,) = struct.unpack('<I', f.read(4))
+            self.header = json.loads(f.read(length).decode('utf-8'))
+        self.data_start = 8 + length
+        self.run = self.header['run']
+
+    def rows(self, table: str) -> int:
+        return self.header['tables'].get(table, {}).get('rows', 0)
+
+    def column(self, table: str, column: str) -> List:
+        meta = self.header['tables'][table]['columns'][column]
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_start + meta['offset'])
+            raw = zlib.decompress(f.read(meta['length']))
+        return decode_column(meta['kind'], raw, meta)
+
+
+class RunArchive:
+    """Archivo de ejecuciones: añadir segmentos y recorrer columnas por rango de fechas."""
+
+    def __init__(self, path: Path = ARCHIVE_DIR):
+        self.path = Path(path)
+        self.manifest_path = self.path / 'manifest.jsonl'
+
+    def append(self, raw_events: List[Dict], transformed: List[Dict], run_at: datetime = None,
+               reparsed_at: datetime = None) -> Dict:
+        """
+        Añade la ejecución run_at. Con reparsed_at es una nueva extracción de una
+        ejecución ya archivada: va en otro segmento y sustituye a la anterior al leer.
+        """
+        run_at = run_at or datetime.now()
+        tables = rows_from_run(raw_events, transformed)
+        name = f"run-{run_at:%Y%m%dT%H%M%S}" + (f".r{reparsed_at:%Y%m%dT%H%M%S}" if reparsed_at else '')
+        relative = Path(f"{run_at:%Y}") / f"{name}.pfa"
+        size = write_segment(self.path / relative, tables, run_at)
+        entry = {
+            'run': run_at.isoformat(timespec='seconds'),
+            'file': relative.as_posix(),
+            'events': len(tables['events']['key']),
+            'tickets': len(tables['tickets']['event']),
+            'bytes': size,
+        }
+        if reparsed_at:
+            entry['reparsed_at'] = reparsed_at.isoformat(timespec='seconds')
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def runs(self, since: str = None, until: str = None) -> List[Dict]:
+        """
+        Entradas del manifiesto con run en [since, until] (fechas ISO, comparadas
+        como texto). De una ejecución re-extraída cuenta solo la última entrada.
+        """
+        if not self.manifest_path.exists():
+            return []
+        entries = {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if since and entry['run'] < since:
+                    continue
+                if until and entry['run'][:len(until)] > until:
+                    continue
+                entries[entry['run']] = entry
+        return sorted(entries.values(), key=lambda e: e['run'])
+
+    def segments(self, since: str = None, until: str = None) -> Iterator[Segment]:
+        for entry in self.runs(since, until):
+            path = self.path / entry['file']
+            if path.exists():
+                yield Segment(path)
+
+    def scan(self, table: str, columns: List[str], since: str = None,
+             until: str = None) -> Iterator[Tuple[str, Dict[str, List]]]:
+        """(run, {columna: valores}) por ejecución, decodificando solo las columnas pedidas."""
+        for segment in self.segments(since, until):
+            if segment.rows(table):
+                yield segment.run, {column: segment.column(table, column) for column in columns}
+
+
+def price_history(archive: RunArchive, venue: str = None, since: str = None,
+                  until: str = None) -> Dict[str, Dict]:
+    """Precio medio, mínimo y máximo de las entradas por mes (y opcionalmente por venue)."""
+    months = defaultdict(lambda: {'n': 0, 'sum': 0.0, 'min': None, 'max': None})
+    for segment in archive.segments(since, until):
+        if not segment.rows('tickets'):
+            continue
+        prices = segment.column('tickets', 'precio')
+        if venue:
+            venues = segment.column('events', 'venue')
+            rows = segment.column('tickets', 'event')
+            prices = [p for p, row in zip(prices, rows) if venues[row] == venue]
+        stats = months[segment.run[:7]]
+        for price in prices:
+            if price != price or price <= 0:   # NaN o entrada gratuita
+                continue
+            stats['n'] += 1
+            stats['sum'] += price
+            stats['min'] = price if stats['min'] is None else min(stats['min'], price)
+            stats['max'] = price if stats['max'] is None else max(stats['max'], price)
+    return {month: {'entradas': s['n'], 'media': round(s['sum'] / s['n'], 2), 'min': s['min'], 'max': s['max']}
+            for month, s in sorted(months.items()) if s['n']}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Consultas sobre el archivo histórico de ejecuciones')
+    parser.add_argument('--archive', default=str(ARCHIVE_DIR), metavar='DIR', help=f'Directorio del archivo (por defecto {ARCHIVE_DIR})')
+    parser.add_argument('--since', help='Desde esta fecha (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Hasta esta fecha (YYYY-MM-DD)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='Ejecuciones, filas y tamaño')
+    column = sub.add_parser('column', help='Valores de una columna (tabla.columna)')
+    column.add_argument('name', metavar='TABLA.COLUMNA')
+    prices = sub.add_parser('prices', help='Precio de las entradas por mes')
+    prices.add_argument('--venue', help='Solo este venue_slug')
+    args = parser.parse_args()
+
+    archive = RunArchive(Path(args.archive))
+    if args.command == 'stats':
+        runs = archive.runs(args.since, args.until)
+        total = sum(r['bytes'] for r in runs)
+        print(f"📚 {len(runs)} ejecuciones, {sum(r['events'] for r in runs)} eventos, "
+              f"{sum(r['tickets'] for r in runs)} entradas, {total / 1024:.1f} KB")
+        if runs:
+            print(f"   {runs[0]['run']} → {runs[-1]['run']}")
+    elif args.command == 'column':
+        table, _, name = args.name.partition('.')
+        if name not in SCHEMA.get(table, {}):
+            print(f"❌ Columna desconocida: {args.name} (ver SCHEMA)")
+            return 1
+        for run, columns in archive.scan(table, [name], args.since, args.until):
+            for value in columns[name]:
+                print(f"{run}\t{value}")
+    elif args.command == 'prices':
+        for month, stats in price_history(archive, args.venue, args.since, args.until).items():
+            print(f"{month}  {stats['entradas']:>7} entradas  media {stats['media']:>7.2f}€  "
+                  f"min {stats['min']:>6.2f}€  max {stats['max']:>7.2f}€")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Planificador de ejecución con fecha límite
+==========================================
+El scraper corre una vez al día en GitHub Actions. Si una ejecución se alarga,
+preferimos perder la frescura de un evento dentro de dos meses antes que la de
+uno de esta noche. Este módulo aporta:
+
+- RunDeadline: presupuesto total de la ejecución con una reserva final para la
+  subida a Firebase y las notificaciones.
+- LatencyEstimator: estimación móvil de lo que tarda un scrape de detalles,
+  para no empezar uno que no va a terminar a tiempo.
+- run_with_budget: ejecución concurrente y por prioridad de los scrapes dentro
+  del presupuesto.
+- Carga de la ejecución anterior para arrastrar sus datos a los eventos que no
+  dé tiempo a refrescar.
+"""
+
+import json
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+class RunDeadline:
+    """
+    Fecha límite de una ejecución. total_seconds=None significa sin límite.
+    reserve_seconds se descuenta del presupuesto de trabajo y queda libre para
+    las etapas finales (subida, notificaciones).
+    """
+
+    def __init__(self, total_seconds: Optional[float] = None, reserve_seconds: float = 0.0, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.total_seconds = total_seconds
+        self.reserve_seconds = reserve_seconds
+
+    @property
+    def unlimited(self) -> bool:
+        return self.total_seconds is None
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def remaining(self) -> float:
+        if self.unlimited:
+            return float('inf')
+        return self.total_seconds - self.elapsed()
+
+    def work_remaining(self) -> float:
+        """Tiempo disponible para scrapear, descontando la reserva final."""
+        return self.remaining() - self.reserve_seconds
+
+    def can_afford(self, estimated_seconds: float) -> bool:
+        return self.work_remaining() >= estimated_seconds
+
+    def describe(self) -> str:
+        if self.unlimited:
+            return "sin límite"
+        return f"{self.work_remaining() / 60:.1f} min de trabajo + {self.reserve_seconds / 60:.1f} min de reserva"
+
+
+class LatencyEstimator:
+    """
+    Media móvil exponencial de latencias. Se usa un valor inicial conservador
+    hasta tener observaciones reales.
+    """
+
+    def __init__(self, initial_seconds: float, alpha: float = 0.3):
+        self.value = initial_seconds
+        self.alpha = alpha
+        self.samples = 0
+
+    def observe(self, seconds: float):
+        if self.samples == 0:
+            self.value = seconds
+        else:
+            self.value = self.alpha * seconds + (1 - self.alpha) * self.value
+        self.samples += 1
+
+    def estimate(self) -> float:
+        return self.value
+
+
+def event_key(event: Dict) -> str:
+    """
+    Clave estable de un evento entre ejecuciones: URL si existe, si no venue + código.
+    """
+    return event.get('url') or f"{event.get('venue_slug', '')}:{event.get('code', '')}"
+
+
+def load_previous_events(path: Path) -> Dict[str, Dict]:
+    """
+    Carga raw_events.json de la ejecución anterior indexado por event_key.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            events = json.load(f)
+    except Exception as e:
+        print(f"   ⚠️ No se pudo leer la ejecución anterior ({path.name}): {e}")
+        return {}
+    return {event_key(e): e for e in events if isinstance(e, dict)}
+
+
+def carry_forward(event: Dict, previous: Dict[str, Dict]) -> Dict:
+    """
+    Devuelve el evento con los detalles de la ejecución anterior si existen.
+    Los datos del listado actual (nombre, fecha, horario...) tienen prioridad;
+    de la ejecución anterior solo se toma lo que aporta el scrape de detalles.
+    """
+    # Con _dedupe_of (ver dedupe_index.py) el evento venía de otra URL en la ejecución anterior
+    old = previous.get(event_key(event)) or previous.get(event.get('_dedupe_of', ''))
+    if not old:
+        return {**event, '_details_pending': True}
+
+    merged = dict(old)
+    merged.update({k: v for k, v in event.items() if v not in (None, '', [], {})})
+    for field in ('tickets', 'description', 'tags', 'venue_info', 'image'):
+        if old.get(field):
+            merged[field] = old[field]
+    merged['_carried_forward'] = True
+    merged.pop('_details_pending', None)
+    return merged
+
+
+def run_with_budget(items: List, work: Callable, max_workers: int, deadline: RunDeadline,
+                    estimator: LatencyEstimator, on_done: Callable, on_skipped: Callable):
+    """
+    Ejecuta work(item) en un pool de hilos con como máximo max_workers tareas en
+    vuelo, respetando el orden de prioridad de items. Antes de lanzar cada tarea
+    comprueba que queda presupuesto para otra (según la latencia estimada); cuando
+    se agota, el resto de items se pasa a on_skipped(item) sin ejecutarse.
+    on_done(item, resultado) se llama en el hilo que invoca, a medida que terminan.
+    Con max_workers <= 1 todo se ejecuta en el hilo que invoca.
+    """
+    if max_workers <= 1:
+        # En línea, sin hilos (lo usa --profile para que cProfile vea todo el trabajo)
+        pending = deque(items)
+        while pending:
+            if not deadline.can_afford(estimator.estimate()):
+                print(f"\n⏰ Presupuesto agotado ({deadline.describe()}): "
+                      f"{len(pending)} tareas no se ejecutan")
+                while pending:
+                    on_skipped(pending.popleft())
+                return
+            item = pending.popleft()
+            started = time.monotonic()
+            result = work(item)
+            estimator.observe(time.monotonic() - started)
+            on_done(item, result)
+        return
+    
+    pending = deque(items)
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or in_flight:
+            while pending and len(in_flight) < max_workers:
+                if not deadline.can_afford(estimator.estimate()):
+                    print(f"\n⏰ Presupuesto agotado ({deadline.describe()}): "
+                          f"{len(pending)} tareas no se ejecutan")
+                    while pending:
+                        on_skipped(pending.popleft())
+                    break
+                item = pending.popleft()
+                in_flight[pool.submit(work, item)] = (item, time.monotonic())
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item, started = in_flight.pop(future)
+                estimator.observe(time.monotonic() - started)
+                on_done(item, future.result())
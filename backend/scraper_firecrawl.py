@@ -4,27 +4,70 @@ Scraper de eventos para PartyFinder usando Firecrawl
 =====================================================
 Utiliza Firecrawl para bypass Cloudflare y extrae eventos del HTML.
 
-Este scraper se ejecuta automáticamente mediante GitHub Actions 3 veces al día.
+Se ejecuta de dos formas:
+- programado: GitHub Actions (.github/workflows/scrape.yml) lanza una pasada
+  completa con --upload una vez al día, a las 12:00 UTC;
+- demonio (--daemon): en un servidor propio, sondea los listados con la
+  cadencia de poll_schedule.py y publica los cambios según aparecen.
 No requiere navegador local ya que utiliza la API de Firecrawl.
 
 Uso:
     python3 scraper_firecrawl.py                    # Scraping completo
     python3 scraper_firecrawl.py --test             # Solo test de conexión
     python3 scraper_firecrawl.py --upload           # Scraping + Firebase
+    python3 scraper_firecrawl.py --daemon --upload  # Sondeo continuo
 """
 
+import asyncio
+import contextvars
 import json
 import os
 import re
 import sys
 import copy
-from datetime import datetime
-from typing import List, Dict, Optional
+import time
+import signal
+import tempfile
+import threading
+from datetime import datetime, date
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
 from bs4 import BeautifulSoup
+from link_harvester import LinkHarvest, normalize_slug
+from tracing import TRACER, TRACE_FORMATS, traced
+from profiling import PROFILER, DEFAULT_TOP_N
+from firecrawl_metrics import METRICS, metrics_scope
+from firecrawl_replay import RecordingFirecrawl, ReplayFirecrawl, FAILURE_STATUS, parse_latency
+from html_document import ParsedDocument, parse_document, PARSER_ENV, available_backends
+from date_normalizer import DateNormalizer, MIDNIGHT_STARTS
+from image_cache import IMAGE_BASE_ENV, IMAGE_WORKERS, create_image_cache
+from venue_cache import VenueCache
+from genre_classifier import load_genre_classifier
+from dedupe_index import DedupeIndex
+from search_index import write_search_index
+from geo_index import write_geo_index
+from run_archive import RunArchive
+from page_snapshots import SnapshotStore, RunSnapshots
+from url_probe import ProbePages
+from poll_schedule import (PollState, DAILY_CREDITS, EXHAUSTED_INTERVAL, event_start,
+                           madrid_now, poll_interval)
+
+from venue_ladder import LISTING_STEPS, VenueStats, get_listing_config
+from venue_catalog import load_venue_catalog, find_venue, parse_shard, select_shard
+from run_scheduler import (RunDeadline, LatencyEstimator, load_previous_events, carry_forward,
+                           run_with_budget, event_key)
+from parse_pool import create_parse_pool, default_parse_workers
+from pipeline import Pipeline, Stage, QUEUE_SIZE
+from refresh_tiers import REFRESH_TIERS, RefreshState
 
 # #region agent log
-# Configuración de logging para debug
+# Configuración de logging para debug. Desactivado salvo con PARTYFINDER_DEBUG_LOG=1:
+# escribe y muestra una línea por evento (y por línea de markdown) y los datos
+# que recibe se construyen solo si está activo. Es una variable de entorno para
+# que la vean también los procesos del pool de parseo.
+DEBUG_LOG_ENV = 'PARTYFINDER_DEBUG_LOG'
+DEBUG_LOG = os.environ.get(DEBUG_LOG_ENV) == '1'
 LOG_PATH = Path(__file__).parent.parent / ".cursor" / "debug.log"
 def debug_log(session_id, run_id, hypothesis_id, location, message, data):
     try:
@@ -55,9 +98,8 @@ def debug_log(session_id, run_id, hypothesis_id, location, message, data):
 try:
     from firecrawl import Firecrawl
 except ImportError:
-    print("❌ Error: firecrawl-py no está instalado")
-    print("   Instalar con: pip install firecrawl-py")
-    sys.exit(1)
+    # Sin el SDK solo funciona el modo --replay (ver create_firecrawl)
+    Firecrawl = None
 
 # Configuración
 API_KEY = os.environ.get("FIRECRAWL_API_KEY")
@@ -67,27 +109,67 @@ if not API_KEY:
 
 DATA_DIR = Path(__file__).parent / "data"
 
-# URLs de las discotecas a scrapear
-VENUE_URLS = [
-    "https://site.fourvenues.com/es/luminata-disco/events",
-    "https://site.fourvenues.com/es/el-club-by-odiseo/events",
-    "https://site.fourvenues.com/es/dodo-club/events",
-    "https://web.fourvenues.com/es/sala-rem/events"
-]
+# Estimaciones iniciales para el planificador (se ajustan con latencias reales)
+LISTING_SCRAPE_ESTIMATE_S = 45
+DETAIL_SCRAPE_ESTIMATE_S = 15
+
+# Scrapes simultáneos contra Firecrawl (limitado por el plan contratado)
+FETCH_WORKERS = 2
+
+# Eventos por lote en la subida incremental del pipeline
+SINK_BATCH_SIZE = 25
+
+# Discotecas a scrapear (ver venues.json / venue_catalog.py)
+VENUE_CATALOG = load_venue_catalog()
+VENUE_URLS = [venue['url'] for venue in VENUE_CATALOG]
+
+
+# Backend de Firecrawl: en vivo, grabando fixtures o reproduciéndolos (ver firecrawl_replay.py).
+# 'snapshots' archiva cada página descargada en vivo (ver page_snapshots.py)
+FIRECRAWL_BACKEND = {'record': None, 'replay': None, 'replay_options': {}, 'snapshots': None}
+
+# Páginas de detalle que ya descargaron las sondas de URLs construidas (ver url_probe.py)
+PROBE_PAGES = ProbePages()
+
 
+def create_firecrawl():
+    """
+    Cliente de Firecrawl con métricas por llamada (ver firecrawl_metrics.py).
+    Con FIRECRAWL_BACKEND['replay'] no usa la red ni la API key.
+    """
+    if FIRECRAWL_BACKEND['replay']:
+        return METRICS.wrap(ReplayFirecrawl(FIRECRAWL_BACKEND['replay'], **FIRECRAWL_BACKEND['replay_options']))
+    if Firecrawl is None:
+        print("❌ Error: firecrawl-py no está instalado")
+        print("   Instalar con: pip install firecrawl-py")
+        sys.exit(1)
+    client = Firecrawl(api_key=API_KEY)
+    if FIRECRAWL_BACKEND['record']:
+        client = RecordingFirecrawl(client, FIRECRAWL_BACKEND['record'])
+    if FIRECRAWL_BACKEND['snapshots']:
+        client = RecordingFirecrawl(client, FIRECRAWL_BACKEND['snapshots'])
+    return METRICS.wrap(client)
 
-def extract_events_from_html(html: str, venue_url: str, markdown: str = None, raw_html: str = None) -> List[Dict]:
+
+@traced('parseo')
+def extract_events_from_html(html: str, venue_url: str, markdown: str = None, raw_html: str = None,
+                             today: date = None) -> List[Dict]:
     """
     Extrae eventos del HTML de FourVenues de forma robusta.
     Si se proporciona markdown, también se usa para extraer información.
     raw_html puede contener más información después de que el JavaScript se ejecuta.
+    today es el día de referencia de la ejecución (por defecto, hoy) para
+    completar el año de las fechas sin año.
     """
     events = []
     soup = BeautifulSoup(html, 'html.parser')
     venue_slug = venue_url.split('/')[-2] if '/events' in venue_url else ''
     
+    # Todos los candidatos se recolectan una vez y las estrategias los reutilizan
+    harvest = LinkHarvest(soup, html, markdown, raw_html)
+    
     # Debug: contar enlaces potenciales
-    all_event_links = soup.find_all('a', href=lambda x: x and '/events/' in x)
+    all_event_links = harvest.anchors
     print(f"   🔍 Debug: {len(all_event_links)} enlaces con '/events/' encontrados")
     
     # ESTRATEGIA 1: Enlaces con aria-label (Luminata, Odiseo)
@@ -96,11 +178,11 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
     
     if is_sala_rem:
         # Para Sala Rem, buscar cualquier enlace con /events/ (más permisivo)
-        event_links = soup.find_all('a', href=lambda x: x and '/events/' in x)
+        event_links = all_event_links
         print(f"   🔍 Debug Estrategia 1 (Sala Rem): {len(event_links)} enlaces con '/events/' encontrados")
     else:
         # Para otras discotecas, buscar con aria-label
-        event_links = soup.find_all('a', href=lambda x: x and '/events/' in x and x.count('/') >= 4)
+        event_links = [link for link in all_event_links if link['href'].count('/') >= 4]
         print(f"   🔍 Debug Estrategia 1: {len(event_links)} enlaces con 4+ '/' encontrados")
     
     for link in event_links:
@@ -181,6 +263,9 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
         except:
             continue
 
+    # URLs ya añadidas, por slug normalizado
+    seen_slugs = set()
+    
     # ESTRATEGIA 2: Componentes personalizados / data-testid (Dodo Club)
     if not events:
         event_cards = soup.find_all(attrs={"data-testid": ["event-card", "event-card-name"]})
@@ -196,7 +281,8 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                 
                 href = link_elem.get('href', '')
                 if not href or '/events/' not in href: continue
-                if any(e['url'] == href for e in events): continue
+                if normalize_slug(href) in seen_slugs: continue
+                seen_slugs.add(normalize_slug(href))
 
                 # Extraer código del evento
                 if 'sala-rem' in venue_slug.lower():
@@ -223,9 +309,10 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
     # ESTRATEGIA 3: Fallback Simple (más permisivo - cualquier enlace con /events/)
     if not events:
         print(f"   🔍 Debug Estrategia 3: Intentando fallback simple...")
-        for link in soup.find_all('a', href=lambda x: x and '/events/' in x):
+        for link in all_event_links:
             href = link.get('href', '')
-            if any(e['url'] == href for e in events): continue
+            if normalize_slug(href) in seen_slugs: continue
+            seen_slugs.add(normalize_slug(href))
             
             # Extraer código del evento de la URL
             code = href.split('/')[-1] if '/' in href else href
@@ -256,7 +343,7 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
             print(f"   🔍 Markdown preview: {preview[:200]}...")
         
         # Buscar enlaces en markdown (formato: [texto](url))
-        markdown_links = re.findall(r'\[([^\]]+)\]\(([^)]+)\)', markdown)
+        markdown_links = harvest.markdown_links
         print(f"   🔍 Markdown links encontrados: {len(markdown_links)}")
         # Debug: mostrar los primeros enlaces encontrados
         if markdown_links:
@@ -307,18 +394,14 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
             print(f"   🔍 Buscando URLs de eventos directamente en markdown y HTML...")
             if 'sala-rem' in venue_slug.lower():
                 # Buscar en markdown primero
-                event_urls_md = re.findall(r'/es/sala-rem/events/([^/\s\)]+)', markdown)
+                event_urls_md = harvest.text_urls('markdown', 'sala-rem/events/')
                 print(f"   🔍 URLs encontradas en markdown: {len(event_urls_md)}")
                 
                 # También buscar en HTML (puede tener más información)
-                if html:
-                    # Buscar enlaces <a> con href que contenga /events/
-                    html_links = re.findall(r'href=["\']([^"\']*sala-rem/events/[^"\']+)["\']', html, re.IGNORECASE)
-                    print(f"   🔍 URLs encontradas en HTML: {len(html_links)}")
-                    # Combinar ambas fuentes
-                    all_urls = set(event_urls_md + [url.split('/events/')[-1] if '/events/' in url else url for url in html_links])
-                else:
-                    all_urls = set(event_urls_md)
+                html_links = harvest.text_urls('html', 'sala-rem/events/')
+                print(f"   🔍 URLs encontradas en HTML: {len(html_links)}")
+                # Combinar ambas fuentes (slugs únicos, en orden de aparición)
+                all_urls = list(dict.fromkeys(url.split('/events/')[-1] for url in event_urls_md + html_links))
                 
                 codes_found = set()
                 for url_slug in all_urls:
@@ -343,35 +426,24 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                 # ESTRATEGIA: Buscar URLs completas en rawHtml primero (más información después del JS)
                 # Si no hay eventos, buscar URLs completas directamente en el HTML/rawHtml
                 if not events:
-                    html_to_search = raw_html if raw_html and len(raw_html) > len(html) else html
-                    if html_to_search:
-                        print(f"   🔍 Buscando URLs completas de eventos en {'rawHtml' if raw_html and len(raw_html) > len(html) else 'HTML'}...")
-                        # Buscar todas las URLs que contengan sala-rem/events con múltiples patrones
-                        # Patrón 1: URLs completas con https://
-                        html_event_urls = re.findall(r'https?://[^"\s<>\)]+sala-rem/events/[^"\s<>\)]+', html_to_search, re.IGNORECASE)
-                        # Patrón 2: URLs relativas /es/sala-rem/events/
-                        html_event_urls += re.findall(r'/es/sala-rem/events/[^"\s<>\)]+', html_to_search, re.IGNORECASE)
-                        # Patrón 3: URLs en atributos href, data-href, etc.
-                        html_event_urls += re.findall(r'(?:href|data-href|data-url|url)["\']?\s*[:=]\s*["\']?([^"\']*sala-rem/events/[^"\']+)', html_to_search, re.IGNORECASE)
-                        # Patrón 4: URLs en JSON/JavaScript (más común en rawHtml después del JS)
-                        html_event_urls += re.findall(r'["\']([^"\']*sala-rem/events/[^"\']+)["\']', html_to_search, re.IGNORECASE)
+                    search_raw = bool(raw_html) and len(raw_html) > len(html)
+                    if raw_html if search_raw else html:
+                        print(f"   🔍 Buscando URLs completas de eventos en {'rawHtml' if search_raw else 'HTML'}...")
+                        # URLs absolutas, relativas, en atributos (href, data-href...) o en JSON/JavaScript,
+                        # ya únicas por slug (un solo patrón sobre el texto)
+                        html_event_urls = harvest.text_urls('raw_html' if search_raw else 'html', 'sala-rem/events/')
                         
                         print(f"   🔍 URLs de eventos encontradas en HTML: {len(html_event_urls)}")
                         
                         # Si encontramos URLs completas, usarlas directamente (más confiable)
-                        # Filtrar y normalizar URLs
+                        # Normalizar URLs
                         unique_urls = []
-                        seen_slugs = set()
                         for event_url in html_event_urls:
                             # Hacer URL absoluta si es relativa
                             if not event_url.startswith('http'):
                                 event_url = f"https://web.fourvenues.com{event_url}" if event_url.startswith('/') else f"https://web.fourvenues.com/{event_url}"
                             
-                            # Extraer slug único para deduplicar
                             url_slug = event_url.split('/events/')[-1].split('?')[0].split('#')[0]
-                            if url_slug in seen_slugs:
-                                continue
-                            seen_slugs.add(url_slug)
                             
                             # Validar que el slug tiene el formato correcto (termina con código de 4 caracteres)
                             parts = url_slug.split('-')
@@ -407,6 +479,7 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                     event_info = []
                     lines = markdown.split('\n')
                     current_date = None
+                    dates = DateNormalizer.for_day(today or datetime.now().date())
                     for i, line in enumerate(lines):
                         # Detectar fechas (## Fri26Dec)
                         date_match = re.search(r'##\s*(\w{3})(\d{1,2})(\w{3})', line)
@@ -414,11 +487,9 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                             day_name = date_match.group(1)  # Fri, Sat, Wed
                             day_num = date_match.group(2)   # 26, 27, 31
                             month = date_match.group(3)     # Dec
-                            # Convertir a formato fecha
-                            month_map = {'Jan': '01', 'Feb': '02', 'Mar': '03', 'Apr': '04', 'May': '05', 'Jun': '06',
-                                       'Jul': '07', 'Aug': '08', 'Sep': '09', 'Oct': '10', 'Nov': '11', 'Dec': '12'}
-                            month_num = month_map.get(month, '12')
-                            current_date = f"{day_num}-{month_num}-2025"
+                            # Convertir a formato fecha (el año sale del cambio de año común)
+                            event_day = dates.from_day_month(day_num, month)
+                            current_date = f"{day_num}-{event_day.month:02d}-{event_day.year}" if event_day else None
                         
                         # Detectar nombres de eventos (líneas que no son fechas ni horas)
                         if current_date and line.strip() and not line.startswith('##') and not re.match(r'^\d{1,2}:\d{2}', line.strip()):
@@ -447,22 +518,9 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                         print(f"   🔍   - {evt['name']} ({evt['date']})")
                     
                     # Buscar códigos de 4 caracteres en el HTML que puedan ser códigos de eventos
-                    # PRIORIDAD 1: Buscar códigos cerca de "sala-rem/events" (más confiable)
-                    event_code_patterns = [
-                        r'sala-rem/events/[^"\s<>\)]+-([A-Z0-9]{4})',  # En URLs de eventos
-                        r'/events/[^"\s<>\)]+-([A-Z0-9]{4})',  # En URLs de eventos (sin sala-rem)
-                        r'data-code["\']?\s*[:=]\s*["\']?([A-Z0-9]{4})',  # En atributos data-code
-                        r'code["\']?\s*[:=]\s*["\']?([A-Z0-9]{4})',  # En atributos code
-                    ]
-                    
-                    valid_codes = []
-                    for pattern in event_code_patterns:
-                        matches = re.findall(pattern, html, re.IGNORECASE)
-                        for code in matches:
-                            # Validar que el código tiene letras Y números (más probable que sea un código de evento)
-                            if any(x.isalpha() for x in code) and any(x.isdigit() for x in code):
-                                if code.upper() not in valid_codes:
-                                    valid_codes.append(code.upper())
+                    # PRIORIDAD 1: códigos en URLs de eventos o atributos data-code/code (un solo patrón,
+                    # ordenados por fiabilidad; solo los que tienen letras Y números)
+                    valid_codes = harvest.event_codes('html')
                     
                     # PRIORIDAD 2: Si no encontramos códigos cerca de eventos, buscar en todo el HTML
                     if not valid_codes:
@@ -549,7 +607,8 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                                 'name': evt['name'],
                                 'code': code,
                                 'date_text': date_text,
-                                '_date_parts': {'day': day, 'month': month, 'year': year}
+                                '_date_parts': {'day': day, 'month': month, 'year': year},
+                                '_url_constructed': True  # URL deducida, se valida con una sonda antes de scrapear
                             })
                             print(f"   🔍 URL construida (orden {i+1}): {evt['name']} - {code} - fecha: {date_text} - {test_url[:100]}...")
                         
@@ -562,14 +621,19 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
                     
             else:
                 # Para otras discotecas: buscar /events/CODIGO
-                event_url_patterns = re.findall(r'/events/([A-Z0-9-]{4,})', markdown)
-                for code in set(event_url_patterns):
+                event_url_patterns = []
+                for url in harvest.text_urls('markdown'):
+                    code_match = re.match(r'[A-Z0-9-]{4,}', url.split('/events/')[-1])
+                    if code_match:
+                        event_url_patterns.append(code_match.group(0))
+                for code in dict.fromkeys(event_url_patterns):
                     event_url = f"https://site.fourvenues.com/es/{venue_slug}/events/{code}"
                     events.append({
                         'url': event_url,
                         'venue_slug': venue_slug,
                         'name': f"Evento {code}",
-                        'code': code
+                        'code': code,
+                        '_url_constructed': True
                     })
                 print(f"   🔍 URLs directas encontradas: {len(event_url_patterns)}")
         
@@ -578,148 +642,140 @@ def extract_events_from_html(html: str, venue_url: str, markdown: str = None, ra
     return events
 
 
-def scrape_venue(firecrawl: Firecrawl, url: str) -> List[Dict]:
+def listing_html(url: str, html: str, raw_html: str) -> str:
+    """HTML del listado que se extrae: en Sala Rem el rawHtml si trae más (el estado del JS)."""
+    if 'sala-rem' in url.lower() and raw_html and len(raw_html) > len(html):
+        return raw_html
+    return html
+
+
+@traced('firecrawl')
+def scrape_venue(firecrawl: Firecrawl, url: str, stats: VenueStats = None, ignore_breaker: bool = False,
+                 parse_pool: Executor = None, today: date = None) -> List[Dict]:
     """
-    Scrapea eventos de una URL de venue con lógica agresiva de bypass.
+    Scrapea eventos de una URL de venue subiendo por la escalera de reintentos
+    (ver venue_ladder.py) hasta que algún escalón devuelve eventos.
+    Si el circuit breaker del venue está abierto, se omite sin gastar créditos.
+    Con parse_pool, la extracción de eventos se hace en el pool de procesos.
+    today es el día de referencia de la ejecución (ver extract_events_from_html).
     """
     print(f"\n📡 Scrapeando: {url}")
     
-    try:
-        # Para Sala Rem, usar más tiempo y formatos adicionales ya que el contenido se carga dinámicamente
-        is_sala_rem = "sala-rem" in url.lower()
-        
-        if is_sala_rem:
-            # Sala Rem necesita más tiempo y formato markdown para mejor extracción
-            # Usar rawHtml también para obtener más información antes del procesamiento
-            result = firecrawl.scrape(
-                url,
-                formats=["html", "markdown", "rawHtml"],  # rawHtml puede tener más información
-                actions=[
-                    {"type": "wait", "milliseconds": 20000},  # Más tiempo inicial para que cargue JS
-                    {"type": "scroll", "direction": "down", "amount": 1500},
-                    {"type": "wait", "milliseconds": 8000},
-                    {"type": "scroll", "direction": "down", "amount": 1500},
-                    {"type": "wait", "milliseconds": 8000},
-                    {"type": "scroll", "direction": "down", "amount": 1500},
-                    {"type": "wait", "milliseconds": 8000}
-                ],
-                wait_for=20000  # Esperar más tiempo para que cargue el contenido dinámico
-            )
-        else:
-            # Para Dodo Club y otros que puedan tener Queue-Fair, subimos el tiempo
-            # y añadimos un wait_for para asegurar que el contenido esté ahí.
-            result = firecrawl.scrape(
-                url,
-                formats=["html"],
-                actions=[
-                    {"type": "wait", "milliseconds": 8000},
-                    {"type": "scroll", "direction": "down", "amount": 500},
-                    {"type": "wait", "milliseconds": 2000}
-                ],
-                # Si vemos que falla por Queue-Fair, Firecrawl suele esperar automáticamente
-                # pero podemos forzar que espere a que aparezca un card de evento
-                wait_for=5000 
-            )
+    stats = stats or VenueStats()
+    venue = find_venue(VENUE_CATALOG, url) or {}
+    venue_slug = venue.get('slug') or url.rstrip('/').removesuffix('/events').rsplit('/', 1)[-1]
+    
+    open_until = None if ignore_breaker else stats.breaker_open_until(venue_slug)
+    if open_until:
+        print(f"   ⛔ Circuito abierto hasta {open_until.strftime('%Y-%m-%d %H:%M')}: venue omitido")
+        return []
+    
+    config = get_listing_config(url, venue.get('listing'))
+    ladder = stats.ladder_for(venue_slug, config['ladder'])
+    if len(ladder) < len(config['ladder']):
+        print(f"   💤 Sin eventos en las últimas ejecuciones: solo escalón '{ladder[0]}'")
+    
+    events = []
+    attempted = 0
+    hard_failures = 0
+    
+    for step_index, step_name in enumerate(ladder):
+        is_last_step = step_index == len(ladder) - 1
+        # Nunca saltar el último escalón: al menos un intento por ejecución
+        if not is_last_step and stats.should_skip(venue_slug, step_name):
+            print(f"   ⏭️  Escalón '{step_name}' omitido (nunca ha funcionado para este venue)")
+            continue
+        if attempted:
+            print(f"   ⚠️ Sin eventos. Escalando a '{step_name}'...")
         
-        html = result.html or ""
-        raw_html = getattr(result, 'raw_html', None) or ""
-        markdown = result.markdown or "" if hasattr(result, 'markdown') else ""
-        status = result.metadata.status_code if result.metadata else "N/A"
+        step = LISTING_STEPS[step_name]
+        attempted += 1
+        hard_failure = False
+        started = time.monotonic()
         
-        print(f"   Status: {status}")
-        print(f"   HTML: {len(html)} bytes")
-        if raw_html:
-            print(f"   Raw HTML: {len(raw_html)} bytes")
-        if markdown:
-            print(f"   Markdown: {len(markdown)} caracteres")
-        
-        if not html and not raw_html:
-            print("   ❌ No se recibió HTML")
-            return []
-        
-        # Para Sala Rem, usar raw_html si está disponible (puede tener más información después del JS)
-        html_to_use = raw_html if is_sala_rem and raw_html and len(raw_html) > len(html) else html
-        events = extract_events_from_html(html_to_use, url, markdown, raw_html=raw_html)
-        
-        # Si sigue sin pillar nada, intentar un segundo intento con JS más agresivo
-        # Aplicar a Dodo Club y Sala Rem (ambos pueden tener estructuras similares o necesitar más tiempo)
-        if not events and ("dodo" in url.lower() or "sala-rem" in url.lower()):
-            print("   ⚠️ No detectados en primer intento. Reintentando con scroll profundo...")
-            # Para Sala Rem, usar también markdown en el segundo intento
-            is_sala_rem_retry = "sala-rem" in url.lower()
-            result = firecrawl.scrape(
-                url,
-                formats=["html", "markdown", "rawHtml"] if is_sala_rem_retry else ["html"],
-                actions=[
-                    {"type": "wait", "milliseconds": 20000},  # Más tiempo para Sala Rem
-                    {"type": "scroll", "direction": "down", "amount": 1500},
-                    {"type": "wait", "milliseconds": 8000},
-                    {"type": "scroll", "direction": "down", "amount": 1500},
-                    {"type": "wait", "milliseconds": 8000},
-                    {"type": "scroll", "direction": "down", "amount": 1500},
-                    {"type": "wait", "milliseconds": 8000}
-                ],
-                wait_for=20000 if is_sala_rem_retry else 10000
-            )
+        try:
+            with metrics_scope(venue=venue_slug, stage='listado', attempt=attempted):
+                result = firecrawl.scrape(
+                    url,
+                    formats=config['formats'],
+                    actions=step['actions'],
+                    wait_for=step['wait_for']
+                )
+            
             html = result.html or ""
             raw_html = getattr(result, 'raw_html', None) or ""
             markdown = result.markdown or "" if hasattr(result, 'markdown') else ""
-            print(f"   HTML segundo intento: {len(html)} bytes")
+            status = result.metadata.status_code if result.metadata else "N/A"
+            
+            print(f"   [{step_name}] Status: {status}")
+            print(f"   HTML: {len(html)} bytes")
             if raw_html:
-                print(f"   Raw HTML segundo intento: {len(raw_html)} bytes")
+                print(f"   Raw HTML: {len(raw_html)} bytes")
             if markdown:
-                print(f"   Markdown segundo intento: {len(markdown)} caracteres")
-            # Usar raw_html si está disponible y es más grande
-            html_to_use = raw_html if is_sala_rem_retry and raw_html and len(raw_html) > len(html) else html
-            events = extract_events_from_html(html_to_use, url, markdown, raw_html=raw_html)
-
-        print(f"   ✅ {len(events)} eventos encontrados")
+                print(f"   Markdown: {len(markdown)} caracteres")
+            
+            if not html and not raw_html:
+                print("   ❌ No se recibió HTML")
+                hard_failure = True
+            elif isinstance(status, int) and status >= 400:
+                print(f"   ❌ Respuesta HTTP {status}")
+                hard_failure = True
+            else:
+                html_to_use = listing_html(url, html, raw_html)
+                if parse_pool is not None:
+                    events = parse_pool.submit(extract_events_from_html, html_to_use, url, markdown, raw_html,
+                                               today).result()
+                else:
+                    events = extract_events_from_html(html_to_use, url, markdown, raw_html=raw_html, today=today)
+        except Exception as e:
+            print(f"   ❌ Error: {type(e).__name__}: {e}")
+            hard_failure = True
         
-        return events
+        latency = time.monotonic() - started
+        if hard_failure:
+            hard_failures += 1
+        stats.record_attempt(venue_slug, step_name, latency, success=bool(events), hard_failure=hard_failure)
         
-    except Exception as e:
-        print(f"   ❌ Error: {type(e).__name__}: {e}")
-        return []
+        if events:
+            break
+    
+    # Fallo duro = todos los escalones intentados fallaron sin llegar a devolver HTML
+    stats.record_run(venue_slug, hard_failure=attempted > 0 and hard_failures == attempted,
+                     empty=attempted > hard_failures and not events)
+    METRICS.record_events(venue_slug, 'listado', len(events))
+    
+    print(f"   ✅ {len(events)} eventos encontrados")
+    
+    return events
 
 
-def extract_tickets_from_schema(html: str) -> List[Dict]:
+@traced('parseo')
+def extract_tickets_from_schema(html: str, document: ParsedDocument = None) -> List[Dict]:
     """
     Extrae URLs precisas de tickets desde los bloques JSON-LD (Schema.org) en el HTML.
+    Si ya se tiene el documento parseado, se reutiliza su JSON-LD.
     """
     tickets_from_schema = []
     
     if not html:
         return tickets_from_schema
     
-    # Buscar bloques script con application/ld+json
-    soup = BeautifulSoup(html, 'html.parser')
-    scripts = soup.find_all('script', type='application/ld+json')
+    # Bloques script con application/ld+json (ya decodificados)
+    document = document or parse_document(html)
+    scripts = document.json_ld
     
     # #region agent log
-    debug_log("debug-session", "run1", "I", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Buscando tickets en schema.org", {
-        "html_length": len(html),
-        "scripts_found": len(scripts)
-    })
+    if DEBUG_LOG:
+        debug_log("debug-session", "run1", "I", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Buscando tickets en schema.org", {
+            "html_length": len(html),
+            "scripts_found": len(scripts)
+        })
     # #endregion
     
-    for script in scripts:
+    for data in scripts:
         try:
-            if not script.string:
-                continue
-            
-            # Limpiar posibles comentarios o espacios extra
-            content = script.string.strip()
-            data = json.loads(content)
-            
             # Schema.org suele tener una lista o un objeto @graph
-            items = []
-            if isinstance(data, list):
-                items = data
-            elif isinstance(data, dict):
-                if '@graph' in data:
-                    items = data['@graph']
-                else:
-                    items = [data]
+            items = ParsedDocument.flatten_json_ld(data)
             
             for item in items:
                 # El evento suele tener un campo 'offers' que es una lista de tickets
@@ -734,12 +790,13 @@ def extract_tickets_from_schema(html: str) -> List[Dict]:
                         price = offer.get('price')
                         
                         # #region agent log
-                        debug_log("debug-session", "run1", "J", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Offer encontrado en schema", {
-                            "url": url[:100] if url else None,
-                            "name": name,
-                            "price": price,
-                            "has_tickets_url": url and '/tickets/' in url if url else False
-                        })
+                        if DEBUG_LOG:
+                            debug_log("debug-session", "run1", "J", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Offer encontrado en schema", {
+                                "url": url[:100] if url else None,
+                                "name": name,
+                                "price": price,
+                                "has_tickets_url": url and '/tickets/' in url if url else False
+                            })
                         # #endregion
                         
                         if url and '/tickets/' in url:
@@ -784,7 +841,8 @@ def extract_tickets_from_schema(html: str) -> List[Dict]:
     return tickets_from_schema
 
 
-def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
+@traced('firecrawl')
+def scrape_event_details(firecrawl: Firecrawl, event: Dict, parse_pool: Executor = None) -> Dict:
     """
     Scrapea detalles completos de un evento específico.
     
@@ -793,23 +851,45 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
     - Tickets con precios reales y descripciones
     - Géneros musicales / tags
     - Información del venue (dirección, coordenadas, etc.)
+    
+    La descarga (fetch_event_details_page) ocurre en el hilo actual y el parseo
+    (parse_event_details) en parse_pool si se proporciona, para no bloquear la red con CPU.
     """
     # #region agent log
     session_id = "debug-session"
     run_id = "run1"
-    debug_log(session_id, run_id, "A", "scraper_firecrawl.py:269", "scrape_event_details START", {
-        "event_name": event.get('name', 'N/A'),
-        "event_url": event.get('url', 'N/A'),
-        "event_code": event.get('code', 'N/A')
-    })
+    if DEBUG_LOG:
+        debug_log(session_id, run_id, "A", "scraper_firecrawl.py:269", "scrape_event_details START", {
+            "event_name": event.get('name', 'N/A'),
+            "event_url": event.get('url', 'N/A'),
+            "event_code": event.get('code', 'N/A')
+        })
     # #endregion
     
+    event, page = fetch_event_details_page(firecrawl, event)
+    if page is None:
+        return event
+    
+    if parse_pool is not None:
+        return parse_pool.submit(parse_event_details, event, page).result()
+    return parse_event_details(event, page)
+
+
+def fetch_event_details_page(firecrawl: Firecrawl, event: Dict) -> Tuple[Dict, Optional[Dict]]:
+    """
+    Prepara una copia del evento (URL absoluta, fecha de la URL en Sala Rem) y
+    descarga su página de detalle. Devuelve (evento, página) o (evento, None) si
+    no hay URL o la descarga falla.
+    """
+    session_id = "debug-session"
+    run_id = "run1"
+    
     # Crear una copia profunda del evento para evitar mutaciones del original
     event = copy.deepcopy(event)
     
     event_url = event.get('url', '')
     if not event_url:
-        return event
+        return event, None
     
     # Hacer URL absoluta si es relativa
     # Detectar el dominio correcto basándose en el venue_slug o la URL original
@@ -837,26 +917,74 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
             print(f"      📅 Fecha extraída de URL: {event['date_text']}")
     
     try:
-        # Solicitar HTML, MARKDOWN y RAWHTML
-        # - markdown: descripciones legibles
-        # - raw_html: metadatos JSON-LD con URLs exactas de tickets
-        result = firecrawl.scrape(
-            event_url,
-            formats=["html", "markdown", "rawHtml"],
-            actions=[{"type": "wait", "milliseconds": 8000}]
-        )
-        
-        html = result.html or ""
-        raw_html = getattr(result, 'raw_html', None) or html or ""
-        markdown = result.markdown or ""
-        
+        with metrics_scope(venue=event.get('venue_slug') or None, stage='detalle'):
+            return event, fetch_event_page(firecrawl, event_url)
+    except Exception as e:
+        print(f"      ⚠️ Error detalles: {e}")
         # #region agent log
-        debug_log(session_id, run_id, "A", "scraper_firecrawl.py:297", "Markdown recibido", {
-            "markdown_length": len(markdown),
-            "html_length": len(html),
-            "raw_html_length": len(raw_html),
-            "markdown_preview": markdown[:500] if markdown else ""
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "E", "scraper_firecrawl.py:496", "ERROR en scrape_event_details", {
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "event_url": event_url
+            })
+        # #endregion
+        return event, None
+    
+
+
+@traced('firecrawl')
+def fetch_event_page(firecrawl: Firecrawl, event_url: str) -> Dict:
+    """
+    Descarga la página de detalle de un evento (solo E/S, sin parseo).
+    Devuelve un payload plano y serializable para el pool de parseo.
+    Si una sonda ya la descargó en esta ejecución, se reutiliza sin gastar crédito.
+    """
+    page = PROBE_PAGES.take(event_url)
+    if page is not None:
+        return page
+    # Solicitar HTML, MARKDOWN y RAWHTML
+    # - markdown: descripciones legibles
+    # - raw_html: metadatos JSON-LD con URLs exactas de tickets
+    result = firecrawl.scrape(
+        event_url,
+        formats=["html", "markdown", "rawHtml"],
+        actions=[{"type": "wait", "milliseconds": 8000}]
+    )
+    
+    html = result.html or ""
+    return {
+        'url': event_url,
+        'html': html,
+        'raw_html': getattr(result, 'raw_html', None) or html or "",
+        'markdown': result.markdown or "",
+        'status_code': result.metadata.status_code if getattr(result, 'metadata', None) else None,
+    }
+
+
+@traced('parseo')
+def parse_event_details(event: Dict, page: Dict) -> Dict:
+    """
+    Extrae descripción, tickets, imagen, tags e información del venue de una
+    página de detalle ya descargada (solo CPU, sin red). Es una función de nivel
+    de módulo con entradas y salidas planas para poder ejecutarse en un pool de procesos.
+    """
+    session_id = "debug-session"
+    run_id = "run1"
+    event_url = page['url']
+    html = page['html']
+    raw_html = page['raw_html']
+    markdown = page['markdown']
+    
+    try:
+        # #region agent log
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "A", "scraper_firecrawl.py:297", "Markdown recibido", {
+                "markdown_length": len(markdown),
+                "html_length": len(html),
+                "raw_html_length": len(raw_html),
+                "markdown_preview": markdown[:500] if markdown else ""
+            })
         # #endregion
         
         # Validar que la URL es válida: si no hay HTML ni markdown, la URL probablemente es inválida
@@ -867,7 +995,9 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
             event['_invalid'] = True
             return event
         
-        soup = BeautifulSoup(html, 'html.parser') if html else None
+        # Cada página se parsea una sola vez; si rawHtml es igual que html se reutiliza el documento
+        document = parse_document(html) if html else None
+        raw_document = parse_document(raw_html) if raw_html else None
         
         # ===== EXTRAER DESCRIPCIÓN Y TICKETS DESDE MARKDOWN =====
         # El markdown de Firecrawl contiene descripciones legibles de tickets
@@ -891,23 +1021,25 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                     ticket_lines.append(j)
             
             # #region agent log
-            debug_log(session_id, run_id, "A", "scraper_firecrawl.py:312", "Iniciando parsing markdown", {
-                "total_lines": len(lines),
-                "lines_preview": lines[:10]
-            })
+            if DEBUG_LOG:
+                debug_log(session_id, run_id, "A", "scraper_firecrawl.py:312", "Iniciando parsing markdown", {
+                    "total_lines": len(lines),
+                    "lines_preview": lines[:10]
+                })
             # #endregion
             
             for i, line in enumerate(lines):
                 line = line.strip()
                 
                 # #region agent log
-                debug_log(session_id, run_id, "A", f"scraper_firecrawl.py:316", f"Procesando línea {i}", {
-                    "line_number": i,
-                    "line_content": line,
-                    "current_ticket_before": current_ticket.copy() if current_ticket else None,
-                    "ticket_start_line": ticket_start_line,
-                    "last_ticket_end_line": last_ticket_end_line
-                })
+                if DEBUG_LOG:
+                    debug_log(session_id, run_id, "A", f"scraper_firecrawl.py:316", f"Procesando línea {i}", {
+                        "line_number": i,
+                        "line_content": line,
+                        "current_ticket_before": current_ticket.copy() if current_ticket else None,
+                        "ticket_start_line": ticket_start_line,
+                        "last_ticket_end_line": last_ticket_end_line
+                    })
                 # #endregion
                 
                 # Buscar tickets (formato: "- ENTRADA(S) ..." o "- PROMOCIÓN ..." o "- VIP")
@@ -918,9 +1050,10 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                 if is_ticket_line:
                     if current_ticket:
                         # #region agent log
-                        debug_log(session_id, run_id, "A", f"scraper_firecrawl.py:325", "Guardando ticket anterior", {
-                            "ticket_guardado": current_ticket.copy()
-                        })
+                        if DEBUG_LOG:
+                            debug_log(session_id, run_id, "A", f"scraper_firecrawl.py:325", "Guardando ticket anterior", {
+                                "ticket_guardado": current_ticket.copy()
+                            })
                         # #endregion
                         tickets.append(current_ticket)
                         last_ticket_end_line = i - 1  # Marcar dónde terminó el ticket anterior
@@ -955,12 +1088,13 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                     ticket_start_line = i  # Marcar dónde empezó este ticket
                     
                     # #region agent log
-                    debug_log(session_id, run_id, "A", f"scraper_firecrawl.py:336", "Nuevo ticket creado", {
-                        "ticket_nuevo": current_ticket.copy(),
-                        "precio_inline": inline_price,
-                        "ticket_start_line": ticket_start_line,
-                        "last_ticket_end_line": last_ticket_end_line
-                    })
+                    if DEBUG_LOG:
+                        debug_log(session_id, run_id, "A", f"scraper_firecrawl.py:336", "Nuevo ticket creado", {
+                            "ticket_nuevo": current_ticket.copy(),
+                            "precio_inline": inline_price,
+                            "ticket_start_line": ticket_start_line,
+                            "last_ticket_end_line": last_ticket_end_line
+                        })
                     # #endregion
                 
                 # Detectar precio (formato: "X €") - Solo si no tiene precio inline
@@ -993,39 +1127,42 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                                     current_ticket['precio'] = price_match.group(1)
                                     current_ticket['_candidate_price_line'] = i  # Marcar línea del precio asignado
                                     # #region agent log
-                                    debug_log(session_id, run_id, "B", f"scraper_firecrawl.py:345", "Precio asignado desde línea", {
-                                        "line_number": i,
-                                        "line_content": line,
-                                        "ticket_tipo": current_ticket['tipo'],
-                                        "precio_anterior": old_price,
-                                        "precio_nuevo": current_ticket['precio'],
-                                        "distance_from_current": distance_from_current,
-                                        "distance_from_previous": distance_from_previous,
-                                        "next_ticket_line": next_ticket_line,
-                                        "max_allowed_distance": max_allowed_distance
-                                    })
+                                    if DEBUG_LOG:
+                                        debug_log(session_id, run_id, "B", f"scraper_firecrawl.py:345", "Precio asignado desde línea", {
+                                            "line_number": i,
+                                            "line_content": line,
+                                            "ticket_tipo": current_ticket['tipo'],
+                                            "precio_anterior": old_price,
+                                            "precio_nuevo": current_ticket['precio'],
+                                            "distance_from_current": distance_from_current,
+                                            "distance_from_previous": distance_from_previous,
+                                            "next_ticket_line": next_ticket_line,
+                                            "max_allowed_distance": max_allowed_distance
+                                        })
                                     # #endregion
                         else:
                             # #region agent log
-                            debug_log(session_id, run_id, "B", f"scraper_firecrawl.py:345", "Precio IGNORADO (validación de proximidad falló)", {
+                            if DEBUG_LOG:
+                                debug_log(session_id, run_id, "B", f"scraper_firecrawl.py:345", "Precio IGNORADO (validación de proximidad falló)", {
+                                    "line_number": i,
+                                    "line_content": line,
+                                    "ticket_tipo": current_ticket['tipo'],
+                                    "distance_from_current": distance_from_current,
+                                    "distance_from_previous": distance_from_previous,
+                                    "next_ticket_line": next_ticket_line,
+                                    "max_allowed_distance": max_allowed_distance,
+                                    "max_distance": MAX_DISTANCE
+                                })
+                            # #endregion
+                    else:
+                        # #region agent log
+                        if DEBUG_LOG:
+                            debug_log(session_id, run_id, "B", f"scraper_firecrawl.py:345", "Precio IGNORADO (ya tiene precio inline)", {
                                 "line_number": i,
                                 "line_content": line,
                                 "ticket_tipo": current_ticket['tipo'],
-                                "distance_from_current": distance_from_current,
-                                "distance_from_previous": distance_from_previous,
-                                "next_ticket_line": next_ticket_line,
-                                "max_allowed_distance": max_allowed_distance,
-                                "max_distance": MAX_DISTANCE
+                                "precio_actual": current_ticket['precio']
                             })
-                            # #endregion
-                    else:
-                        # #region agent log
-                        debug_log(session_id, run_id, "B", f"scraper_firecrawl.py:345", "Precio IGNORADO (ya tiene precio inline)", {
-                            "line_number": i,
-                            "line_content": line,
-                            "ticket_tipo": current_ticket['tipo'],
-                            "precio_actual": current_ticket['precio']
-                        })
                         # #endregion
                 
                 # Detectar si está agotada - solo si está cerca del ticket
@@ -1048,15 +1185,16 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                     if distance_from_current <= max_allowed_distance and distance_from_previous >= MIN_DISTANCE_FROM_PREVIOUS:
                         current_ticket['agotadas'] = True
                         # #region agent log
-                        debug_log(session_id, run_id, "C", f"scraper_firecrawl.py:353", "Estado agotado asignado", {
-                            "line_number": i,
-                            "line_content": line,
-                            "ticket_tipo": current_ticket['tipo'],
-                            "distance_from_current": distance_from_current,
-                            "distance_from_previous": distance_from_previous,
-                            "next_ticket_line": next_ticket_line,
-                            "max_allowed_distance": max_allowed_distance
-                        })
+                        if DEBUG_LOG:
+                            debug_log(session_id, run_id, "C", f"scraper_firecrawl.py:353", "Estado agotado asignado", {
+                                "line_number": i,
+                                "line_content": line,
+                                "ticket_tipo": current_ticket['tipo'],
+                                "distance_from_current": distance_from_current,
+                                "distance_from_previous": distance_from_previous,
+                                "next_ticket_line": next_ticket_line,
+                                "max_allowed_distance": max_allowed_distance
+                            })
                         # #endregion
                 
                 # Capturar descripción del ticket (texto con info de consumición) - solo si está cerca
@@ -1083,17 +1221,18 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                             current_ticket['descripcion'] = line
                             ticket_descriptions.append(line)
                             # #region agent log
-                            debug_log(session_id, run_id, "C", f"scraper_firecrawl.py:357", "Descripción asignada", {
-                                "line_number": i,
-                                "line_content": line,
-                                "ticket_tipo": current_ticket['tipo'],
-                                "descripcion_anterior": old_desc,
-                                "descripcion_nueva": current_ticket['descripcion'],
-                                "distance_from_current": distance_from_current,
-                                "distance_from_previous": distance_from_previous,
-                                "next_ticket_line": next_ticket_line,
-                                "max_allowed_distance": max_allowed_distance
-                            })
+                            if DEBUG_LOG:
+                                debug_log(session_id, run_id, "C", f"scraper_firecrawl.py:357", "Descripción asignada", {
+                                    "line_number": i,
+                                    "line_content": line,
+                                    "ticket_tipo": current_ticket['tipo'],
+                                    "descripcion_anterior": old_desc,
+                                    "descripcion_nueva": current_ticket['descripcion'],
+                                    "distance_from_current": distance_from_current,
+                                    "distance_from_previous": distance_from_previous,
+                                    "next_ticket_line": next_ticket_line,
+                                    "max_allowed_distance": max_allowed_distance
+                                })
                             # #endregion
             
             # Añadir último ticket
@@ -1104,10 +1243,11 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                 tickets.append(current_ticket)
             
             # #region agent log
-            debug_log(session_id, run_id, "A", "scraper_firecrawl.py:361", "Tickets antes de deduplicación", {
-                "total_tickets": len(tickets),
-                "tickets": [t.copy() for t in tickets]
-            })
+            if DEBUG_LOG:
+                debug_log(session_id, run_id, "A", "scraper_firecrawl.py:361", "Tickets antes de deduplicación", {
+                    "total_tickets": len(tickets),
+                    "tickets": [t.copy() for t in tickets]
+                })
             # #endregion
             
             # --- DEDUPLICACIÓN DE TICKETS ---
@@ -1126,20 +1266,22 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                     unique_tickets.append(t)
                 else:
                     # #region agent log
-                    debug_log(session_id, run_id, "D", "scraper_firecrawl.py:370", "Ticket DUPLICADO eliminado", {
-                        "ticket_duplicado": t.copy(),
-                        "ticket_id": ticket_id
-                    })
+                    if DEBUG_LOG:
+                        debug_log(session_id, run_id, "D", "scraper_firecrawl.py:370", "Ticket DUPLICADO eliminado", {
+                            "ticket_duplicado": t.copy(),
+                            "ticket_id": ticket_id
+                        })
                     # #endregion
             
             tickets = unique_tickets
             # --------------------------------
             
             # #region agent log
-            debug_log(session_id, run_id, "A", "scraper_firecrawl.py:380", "Tickets después de deduplicación", {
-                "total_tickets": len(tickets),
-                "tickets": [t.copy() for t in tickets]
-            })
+            if DEBUG_LOG:
+                debug_log(session_id, run_id, "A", "scraper_firecrawl.py:380", "Tickets después de deduplicación", {
+                    "total_tickets": len(tickets),
+                    "tickets": [t.copy() for t in tickets]
+                })
             # #endregion
             
             # Usar la primera descripción de ticket como descripción general del evento
@@ -1171,9 +1313,9 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
         image_found = False
         
         # 1. Meta og:image (más confiable)
-        og_image = soup.find('meta', {'property': 'og:image'}) if soup else None
-        if og_image:
-            img_url = og_image.get('content', '')
+        og_image = document.meta('og:image') if document else None
+        if og_image is not None:
+            img_url = og_image
             if img_url and 'fourvenues.com' in img_url:
                 event['image'] = img_url
                 image_found = True
@@ -1181,36 +1323,22 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
         
         # 2. Buscar en schema.org JSON-LD específicamente en el objeto Event (más preciso)
         if not image_found and raw_html:
-            # Buscar bloques script con application/ld+json
-            soup_temp = BeautifulSoup(raw_html, 'html.parser')
-            scripts = soup_temp.find_all('script', type='application/ld+json')
-            
-            for script in scripts:
+            # Bloques script con application/ld+json (ya decodificados)
+            for data in raw_document.json_ld:
                 try:
-                    if not script.string:
-                        continue
-                    content = script.string.strip()
-                    data = json.loads(content)
-                    
                     # Schema.org suele tener una lista o un objeto @graph
-                    items = []
-                    if isinstance(data, list):
-                        items = data
-                    elif isinstance(data, dict):
-                        if '@graph' in data:
-                            items = data['@graph']
-                        else:
-                            items = [data]
+                    items = ParsedDocument.flatten_json_ld(data)
                     
                     # Buscar específicamente en objetos de tipo Event
                     for item in items:
                         item_type = item.get('@type', '')
                         # #region agent log
-                        debug_log("debug-session", "run1", "G", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Buscando imagen en schema.org", {
-                            "item_type": item_type,
-                            "has_image": 'image' in item,
-                            "image_value": str(item.get('image', ''))[:100] if item.get('image') else None
-                        })
+                        if DEBUG_LOG:
+                            debug_log("debug-session", "run1", "G", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Buscando imagen en schema.org", {
+                                "item_type": item_type,
+                                "has_image": 'image' in item,
+                                "image_value": str(item.get('image', ''))[:100] if item.get('image') else None
+                            })
                         # #endregion
                         
                         if item.get('@type') == 'Event' or 'Event' in str(item.get('@type', '')):
@@ -1228,10 +1356,11 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                                     continue
                                 
                                 # #region agent log
-                                debug_log("debug-session", "run1", "H", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Imagen encontrada en schema Event", {
-                                    "img_url": img_url[:150],
-                                    "is_fourvenues": 'fourvenues.com' in img_url if img_url else False
-                                })
+                                if DEBUG_LOG:
+                                    debug_log("debug-session", "run1", "H", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Imagen encontrada en schema Event", {
+                                        "img_url": img_url[:150],
+                                        "is_fourvenues": 'fourvenues.com' in img_url if img_url else False
+                                    })
                                 # #endregion
                                 
                                 if img_url and 'fourvenues.com' in img_url:
@@ -1256,11 +1385,13 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                         print(f"      📷 Imagen encontrada (schema fallback): {img_url[:80]}...")
         
         # 3. Buscar imagen principal en el HTML (fallback)
-        if not image_found and soup:
-            main_image = soup.find('img', {'class': lambda x: x and ('hero' in str(x).lower() or 'main' in str(x).lower() or 'event' in str(x).lower())})
+        if not image_found and document:
+            main_image = next((img for img in document.images
+                               if any(k in ' '.join(img.get('class') or []).lower() for k in ('hero', 'main', 'event'))), None)
             if not main_image:
                 # Buscar cualquier imagen grande en el contenido principal
-                main_image = soup.find('img', src=lambda x: x and 'fourvenues.com' in x and ('cdn-cgi' in x or 'imagedelivery' in x))
+                main_image = next((img for img in document.images
+                                   if 'fourvenues.com' in img.get('src', '') and ('cdn-cgi' in img.get('src', '') or 'imagedelivery' in img.get('src', ''))), None)
             if main_image:
                 img_url = main_image.get('src', '')
                 if img_url:
@@ -1278,15 +1409,16 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
             print(f"      ⚠️ No se encontró imagen para el evento")
         
         # ===== INTEGRAR URLs EXACTAS DESDE SCHEMA/RAW =====
-        schema_tickets = extract_tickets_from_schema(raw_html)
+        schema_tickets = extract_tickets_from_schema(raw_html, raw_document)
         
         # #region agent log
-        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:413", "Schema tickets extraídos", {
-            "schema_tickets_count": len(schema_tickets),
-            "schema_tickets": [t.copy() if isinstance(t, dict) else str(t) for t in schema_tickets],
-            "raw_html_length": len(raw_html),
-            "event_url": event_url[:100]
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:413", "Schema tickets extraídos", {
+                "schema_tickets_count": len(schema_tickets),
+                "schema_tickets": [t.copy() if isinstance(t, dict) else str(t) for t in schema_tickets],
+                "raw_html_length": len(raw_html),
+                "event_url": event_url[:100]
+            })
         # #endregion
         
         # Función para normalizar nombres para matching flexible (definir antes de usar)
@@ -1306,20 +1438,22 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
             markdown_has_prices = any(t.get('precio') and str(t.get('precio')).strip() not in ['0', 'None', ''] for t in tickets)
             
             # #region agent log
-            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:657", "Evaluando estrategia de matching", {
-                "schema_tickets_count": len(schema_tickets),
-                "markdown_tickets_count": len(tickets),
-                "schema_has_prices": schema_has_prices,
-                "markdown_has_prices": markdown_has_prices
-            })
+            if DEBUG_LOG:
+                debug_log(session_id, run_id, "B", "scraper_firecrawl.py:657", "Evaluando estrategia de matching", {
+                    "schema_tickets_count": len(schema_tickets),
+                    "markdown_tickets_count": len(tickets),
+                    "schema_has_prices": schema_has_prices,
+                    "markdown_has_prices": markdown_has_prices
+                })
             # #endregion
             
             # Si el schema tiene precios y el markdown no, priorizar schema
             if schema_has_prices and not markdown_has_prices:
                 # #region agent log
-                debug_log(session_id, run_id, "B", "scraper_firecrawl.py:670", "Schema tiene precios, markdown no - priorizando schema", {
-                    "schema_tickets": [st.copy() for st in schema_tickets[:3]]
-                })
+                if DEBUG_LOG:
+                    debug_log(session_id, run_id, "B", "scraper_firecrawl.py:670", "Schema tiene precios, markdown no - priorizando schema", {
+                        "schema_tickets": [st.copy() for st in schema_tickets[:3]]
+                    })
                 # #endregion
                 # Usar schema como base y enriquecer con nombres del markdown si coinciden
                 schema_tickets_dict = {normalize_name(st['tipo']): st for st in schema_tickets}
@@ -1337,12 +1471,13 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                         if t.get('agotadas') is True:
                             enriched_ticket['agotadas'] = True
                         # #region agent log
-                        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:695", "Enriqueciendo ticket desde schema", {
-                            "ticket_markdown": t.copy(),
-                            "ticket_schema": st.copy(),
-                            "enriched_ticket": enriched_ticket.copy(),
-                            "agotadas_preservada": enriched_ticket.get('agotadas', False)
-                        })
+                        if DEBUG_LOG:
+                            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:695", "Enriqueciendo ticket desde schema", {
+                                "ticket_markdown": t.copy(),
+                                "ticket_schema": st.copy(),
+                                "enriched_ticket": enriched_ticket.copy(),
+                                "agotadas_preservada": enriched_ticket.get('agotadas', False)
+                            })
                         # #endregion
                         enriched_tickets.append(enriched_ticket)
                     else:
@@ -1381,10 +1516,11 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                 
                 for t in tickets:
                     # #region agent log
-                    debug_log(session_id, run_id, "B", "scraper_firecrawl.py:418", "Buscando match para ticket", {
-                        "ticket": t.copy(),
-                        "schema_tickets_disponibles": [st.copy() for st in schema_tickets]
-                    })
+                    if DEBUG_LOG:
+                        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:418", "Buscando match para ticket", {
+                            "ticket": t.copy(),
+                            "schema_tickets_disponibles": [st.copy() for st in schema_tickets]
+                        })
                     # #endregion
                     
                     # Buscar coincidencia: PRIORIZAR match por nombre (flexible), luego por precio
@@ -1506,34 +1642,37 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                                     t['agotadas'] = st['agotadas']
                         
                         # #region agent log
-                        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:421", "MATCH encontrado", {
-                            "ticket_tipo": t['tipo'],
-                            "ticket_precio_antes": old_price,
-                            "ticket_precio_despues": t['precio'],
-                            "schema_tipo": st['tipo'],
-                            "schema_precio": st['precio'],
-                            "match_type": match_type,
-                            "url_anterior": old_url,
-                            "url_nueva": t['url_compra'],
-                            "precio_actualizado": old_price != t['precio'],
-                            "agotadas_actualizada": t.get('agotadas', False)
-                        })
+                        if DEBUG_LOG:
+                            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:421", "MATCH encontrado", {
+                                "ticket_tipo": t['tipo'],
+                                "ticket_precio_antes": old_price,
+                                "ticket_precio_despues": t['precio'],
+                                "schema_tipo": st['tipo'],
+                                "schema_precio": st['precio'],
+                                "match_type": match_type,
+                                "url_anterior": old_url,
+                                "url_nueva": t['url_compra'],
+                                "precio_actualizado": old_price != t['precio'],
+                                "agotadas_actualizada": t.get('agotadas', False)
+                            })
                         # #endregion
                     else:
                         # #region agent log
-                        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:421", "NO se encontró match", {
-                            "ticket": t.copy(),
-                            "reason": "no_match" if not matched else "ambiguous_price"
-                        })
+                        if DEBUG_LOG:
+                            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:421", "NO se encontró match", {
+                                "ticket": t.copy(),
+                                "reason": "no_match" if not matched else "ambiguous_price"
+                            })
                         # #endregion
             else:
                 # Si no hay tickets del markdown, usar directamente los del schema
                 tickets = schema_tickets
                 # #region agent log
-                debug_log(session_id, run_id, "B", "scraper_firecrawl.py:674", "Usando tickets directamente del schema (sin markdown)", {
-                    "schema_tickets_count": len(schema_tickets),
-                    "schema_tickets": [st.copy() for st in schema_tickets]
-                })
+                if DEBUG_LOG:
+                    debug_log(session_id, run_id, "B", "scraper_firecrawl.py:674", "Usando tickets directamente del schema (sin markdown)", {
+                        "schema_tickets_count": len(schema_tickets),
+                        "schema_tickets": [st.copy() for st in schema_tickets]
+                    })
                 # #endregion
 
         if tickets:
@@ -1541,33 +1680,19 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
             event['tickets'] = [copy.deepcopy(t) for t in tickets]
         
         # #region agent log
-        debug_log(session_id, run_id, "A", "scraper_firecrawl.py:428", "Tickets finales", {
-            "total_tickets": len(event.get('tickets', [])),
-            "tickets_finales": [copy.deepcopy(t) for t in event.get('tickets', [])],
-            "event_name": event.get('name', 'N/A'),
-            "event_code": event.get('code', 'N/A')
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "A", "scraper_firecrawl.py:428", "Tickets finales", {
+                "total_tickets": len(event.get('tickets', [])),
+                "tickets_finales": [copy.deepcopy(t) for t in event.get('tickets', [])],
+                "event_name": event.get('name', 'N/A'),
+                "event_code": event.get('code', 'N/A')
+            })
         # #endregion
         
         # ===== GÉNEROS MUSICALES / TAGS =====
-        tags = []
-        
-        # Buscar en aria-labels que mencionen géneros
-        all_labels = soup.find_all(attrs={'aria-label': True})
-        genre_keywords = ['reggaeton', 'comercial', 'latin', 'techno', 'house', 'electro', 
-                         'hip hop', 'trap', 'remember', 'indie', 'pop', 'rock', 'r&b']
-        
-        for elem in all_labels:
-            label = elem.get('aria-label', '').lower()
-            for genre in genre_keywords:
-                if genre in label and genre.title() not in tags:
-                    tags.append(genre.title())
-        
-        # Analizar el nombre del evento para tags
+        # Una pasada por texto con el autómata de la taxonomía (genres.json)
         event_name = event.get('name', '').lower()
-        for genre in genre_keywords:
-            if genre in event_name and genre.title() not in tags:
-                tags.append(genre.title())
+        tags = load_genre_classifier().classify([*document.aria_labels, event_name, event.get('description', '')])
         
         if tags:
             event['tags'] = tags
@@ -1581,45 +1706,47 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
                 event['tags'] = ['Fiesta']
         
         # ===== INFORMACIÓN DEL VENUE =====
-        venue_info = {}
+        # Igual para todos los eventos del venue: se omite si ya está en la caché (venue_cache.py)
+        if not event.get('_venue_cached'):
+            venue_info = {}
         
-        # Buscar dirección (suele estar en elementos con address o location)
-        address_elem = soup.find(attrs={'class': lambda x: x and 'address' in str(x).lower()})
-        if address_elem:
-            venue_info['direccion'] = address_elem.get_text(strip=True)
+            # Buscar dirección (suele estar en elementos con address o location)
+            address_elem = document.find(attrs={'class': lambda x: x and 'address' in str(x).lower()})
+            if address_elem:
+                venue_info['direccion'] = address_elem.get_text(strip=True)
         
-        # Buscar en schema.org o meta tags
-        for script in soup.find_all('script', type='application/ld+json'):
-            try:
-                ld_data = json.loads(script.string)
-                if isinstance(ld_data, dict):
-                    location = ld_data.get('location', {})
-                    if isinstance(location, dict):
-                        address = location.get('address', {})
-                        if isinstance(address, dict):
-                            venue_info['direccion'] = address.get('streetAddress', '')
-                            venue_info['ciudad'] = address.get('addressLocality', '')
-                            venue_info['codigo_postal'] = address.get('postalCode', '')
-                        elif isinstance(address, str):
-                            venue_info['direccion'] = address
+            # Buscar en schema.org o meta tags
+            for ld_data in document.json_ld:
+                try:
+                    if isinstance(ld_data, dict):
+                        location = ld_data.get('location', {})
+                        if isinstance(location, dict):
+                            address = location.get('address', {})
+                            if isinstance(address, dict):
+                                venue_info['direccion'] = address.get('streetAddress', '')
+                                venue_info['ciudad'] = address.get('addressLocality', '')
+                                venue_info['codigo_postal'] = address.get('postalCode', '')
+                            elif isinstance(address, str):
+                                venue_info['direccion'] = address
                         
-                        geo = location.get('geo', {})
-                        if geo:
-                            venue_info['latitud'] = geo.get('latitude')
-                            venue_info['longitud'] = geo.get('longitude')
-            except:
-                continue
+                            geo = location.get('geo', {})
+                            if geo:
+                                venue_info['latitud'] = geo.get('latitude')
+                                venue_info['longitud'] = geo.get('longitude')
+                except:
+                    continue
         
-        if venue_info:
-            event['venue_info'] = venue_info
+            if venue_info:
+                event['venue_info'] = venue_info
         
         # #region agent log
-        debug_log(session_id, run_id, "A", "scraper_firecrawl.py:494", "scrape_event_details END", {
-            "event_name": event.get('name', 'N/A'),
-            "tickets_count": len(event.get('tickets', [])),
-            "tickets": [t.copy() for t in event.get('tickets', [])],
-            "description": event.get('description', '')[:100]
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "A", "scraper_firecrawl.py:494", "scrape_event_details END", {
+                "event_name": event.get('name', 'N/A'),
+                "tickets_count": len(event.get('tickets', [])),
+                "tickets": [t.copy() for t in event.get('tickets', [])],
+                "description": event.get('description', '')[:100]
+            })
         # #endregion
         
         return event
@@ -1627,77 +1754,62 @@ def scrape_event_details(firecrawl: Firecrawl, event: Dict) -> Dict:
     except Exception as e:
         print(f"      ⚠️ Error detalles: {e}")
         # #region agent log
-        debug_log(session_id, run_id, "E", "scraper_firecrawl.py:496", "ERROR en scrape_event_details", {
-            "error": str(e),
-            "error_type": type(e).__name__,
-            "event_url": event_url
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "E", "scraper_firecrawl.py:496", "ERROR en scrape_event_details", {
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "event_url": event_url
+            })
         # #endregion
         return event
 
 
-def transform_to_app_format(events: List[Dict]) -> List[Dict]:
+
+def infer_event_date(event: Dict, today: date = None) -> Optional[date]:
+    """
+    Fecha aproximada de un evento antes de scrapear sus detalles, a partir de
+    _date_parts, date_text o la fecha embebida en la URL. None si no se puede saber.
+    """
+    return DateNormalizer.for_day(today or datetime.now().date()).event_date(event)
+
+
+def order_by_event_date(events: List[Dict], today: date = None) -> List[Dict]:
+    """
+    Ordena los eventos del más inminente al más lejano. Los que no tienen fecha
+    conocida van al final (orden estable para el resto).
+    """
+    today = today or datetime.now().date()
+    return sorted(events, key=lambda e: infer_event_date(e, today) or date.max)
+
+
+@traced('transformar')
+def transform_to_app_format(events: List[Dict], dates: DateNormalizer = None,
+                            venues: VenueCache = None) -> List[Dict]:
     """
     Transforma los eventos al formato de la app PartyFinder.
+    dates es la referencia temporal de la ejecución (por defecto, ahora) y
+    venues, si se da, tiene prioridad sobre el venue_info de cada evento.
     """
     transformed = []
+    dates = dates or DateNormalizer()
+    # Fechas del lote en una pasada (patrones precompilados y caché de textos)
+    fechas = dates.app_dates(events)
+    catalog_by_slug = {venue['slug']: venue for venue in VENUE_CATALOG}
     
-    for event in events:
-        # Parsear fecha - priorizar _date_parts si está disponible (más confiable)
-        fecha = datetime.now().strftime('%Y-%m-%d')
-        
-        # Si tenemos las partes de la fecha directamente (de la URL o markdown), usarlas
-        if event.get('_date_parts'):
-            date_parts = event['_date_parts']
-            day = date_parts['day'].zfill(2)
-            month = date_parts['month']
-            year = date_parts['year']
-            fecha = f"{year}-{month}-{day}"
-        else:
-            # Intentar parsear desde date_text
-            date_text = event.get('date_text', '')
-            months = {
-                'ene': '01', 'feb': '02', 'mar': '03', 'abr': '04',
-                'may': '05', 'jun': '06', 'jul': '07', 'ago': '08',
-                'sep': '09', 'oct': '10', 'nov': '11', 'dic': '12',
-                'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
-                'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
-                'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'
-            }
-            
-            match = re.search(r'(\d{1,2})\s+(\w+)', date_text, re.IGNORECASE)
-            if match:
-                day = match.group(1).zfill(2)
-                month_str = match.group(2).lower()[:3]
-                month = months.get(month_str, '12')
-                year = datetime.now().year
-                # Si el mes ya pasó, es del año siguiente
-                if int(month) < datetime.now().month:
-                    year += 1
-                fecha = f"{year}-{month}-{day}"
-            
-            # Si aún no tenemos fecha, intentar extraer de la URL
-            if fecha == datetime.now().strftime('%Y-%m-%d') and event.get('url'):
-                url = event.get('url', '')
-                date_match = re.search(r'--(\d{1,2})-(\d{2})-(\d{4})-', url)
-                if date_match:
-                    day = date_match.group(1).zfill(2)
-                    month = date_match.group(2)
-                    year = date_match.group(3)
-                    fecha = f"{year}-{month}-{day}"
-        
+    for event, fecha in zip(events, fechas):
         # Construir entradas desde tickets extraídos
         entradas = []
         
         # #region agent log
         session_id = "debug-session"
         run_id = "run1"
-        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:804", "ANTES de transformar entradas", {
-            "event_name": event.get('name', 'N/A'),
-            "event_code": event.get('code', 'N/A'),
-            "tickets_from_event": [copy.deepcopy(t) for t in event.get('tickets', [])] if event.get('tickets') else None,
-            "prices_from_event": event.get('prices', [])
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:804", "ANTES de transformar entradas", {
+                "event_name": event.get('name', 'N/A'),
+                "event_code": event.get('code', 'N/A'),
+                "tickets_from_event": [copy.deepcopy(t) for t in event.get('tickets', [])] if event.get('tickets') else None,
+                "prices_from_event": event.get('prices', [])
+            })
         # #endregion
         
         # Usar tickets extraídos si existen (hacer copia profunda para evitar mutaciones)
@@ -1722,33 +1834,25 @@ def transform_to_app_format(events: List[Dict]) -> List[Dict]:
             }]
         
         # #region agent log
-        debug_log(session_id, run_id, "B", "scraper_firecrawl.py:832", "DESPUÉS de transformar entradas", {
-            "event_name": event.get('name', 'N/A'),
-            "event_code": event.get('code', 'N/A'),
-            "entradas_finales": [copy.deepcopy(e) for e in entradas]
-        })
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "B", "scraper_firecrawl.py:832", "DESPUÉS de transformar entradas", {
+                "event_name": event.get('name', 'N/A'),
+                "event_code": event.get('code', 'N/A'),
+                "entradas_finales": [copy.deepcopy(e) for e in entradas]
+            })
         # #endregion
         
-        # Ajustar fecha si la hora de inicio es 00:00
-        # Un evento que empieza a las 00:00 pertenece al día anterior
-        # Ejemplo: Si la URL dice --28-12-2025- y el evento empieza a las 00:00,
-        # el evento realmente es del 27 (sábado 27 a las 00:00 = inicio del sábado 27)
+        # Un evento que empieza a las 00:00 pertenece al día anterior (ya aplicado en app_dates)
         hora_inicio = event.get('hora_inicio', '23:00')
-        if hora_inicio == '00:00' or hora_inicio == '0:00':
-            try:
-                from datetime import timedelta
-                fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
-                fecha_obj = fecha_obj - timedelta(days=1)
-                fecha = fecha_obj.strftime('%Y-%m-%d')
-                print(f"      🔧 Ajuste de fecha por hora 00:00: {event.get('name', 'Evento')} -> {fecha}")
-            except Exception as e:
-                print(f"      ⚠️ Error ajustando fecha para hora 00:00: {e}")
+        if hora_inicio in MIDNIGHT_STARTS:
+            print(f"      🔧 Ajuste de fecha por hora 00:00: {event.get('name', 'Evento')} -> {fecha}")
         
         # Usar tags extraídos o inferidos
         tags = event.get('tags', ['Fiesta'])
         
-        # Información del venue
-        venue_info = event.get('venue_info', {})
+        # Información del venue (la ciudad por defecto sale del catálogo)
+        venue_info = (venues.info(event.get('venue_slug', '')) if venues else None) or event.get('venue_info', {})
+        catalog_venue = catalog_by_slug.get(event.get('venue_slug', '')) or {}
         
         transformed_event = {
             "evento": {
@@ -1766,7 +1870,7 @@ def transform_to_app_format(events: List[Dict]) -> List[Dict]:
                 "lugar": {
                     "nombre": event.get('venue_slug', '').replace('-', ' ').title(),
                     "direccion": venue_info.get('direccion', ''),
-                    "ciudad": venue_info.get('ciudad', 'Murcia'),
+                    "ciudad": venue_info.get('ciudad', catalog_venue.get('ciudad', 'Murcia')),
                     "codigo_postal": venue_info.get('codigo_postal', ''),
                     "latitud": venue_info.get('latitud'),
                     "longitud": venue_info.get('longitud'),
@@ -1780,43 +1884,62 @@ def transform_to_app_format(events: List[Dict]) -> List[Dict]:
     return transformed
 
 
-def scrape_all_events(urls: List[str] = None, get_details: bool = True) -> List[Dict]:
+@traced('firecrawl')
+def probe_constructed_events(firecrawl: Firecrawl, events: List[Dict], data_dir: Path = None) -> List[Dict]:
     """
-    Scrapea eventos de todas las URLs.
+    Valida en bloque las URLs deducidas por heurística (marcadas con `_url_constructed`)
+    y descarta las que no existen (404/410), para que el scrape de detalles solo
+    se gaste en eventos reales. La página que descarga la sonda de Firecrawl se
+    reutiliza como página de detalle (PROBE_PAGES).
+    """
+    candidates = [e['url'] for e in events if e.get('_url_constructed') and e.get('url')]
+    if not candidates:
+        return events
+
+    from url_probe import HttpProbe, FirecrawlProbe, UrlProbeCache, probe_urls
+    firecrawl_probe = FirecrawlProbe(lambda url: fetch_event_page(firecrawl, url), PROBE_PAGES)
+
+    print(f"\n🔎 Sondeando {len(candidates)} URLs construidas...")
+    cache = UrlProbeCache((data_dir or DATA_DIR) / 'url_probe_cache.json')
+    # Sin red (replay) solo se sondea a través del propio backend
+    probes = [firecrawl_probe] if getattr(firecrawl, 'offline', False) else [HttpProbe(), firecrawl_probe]
+    verdicts = probe_urls(candidates, probes, cache)
+
+    kept = []
+    for event in events:
+        if verdicts.get(event.get('url')) is False:
+            print(f"   ⚠️ URL inexistente descartada sin scrapear: {event.get('name', 'N/A')} - {event.get('url', '')[:80]}...")
+            continue
+        kept.append(event)
+    return kept
+
+
+class EventDeduplicator:
+    """
+    Deduplicación incremental: accept(event) dice si el evento es nuevo y lo registra.
+    Permite deduplicar según van llegando los listados (pipeline) o de una vez.
     """
-    target_urls = urls or VENUE_URLS
-    all_events = []
-    
-    print("=" * 60)
-    print("PartyFinder - Firecrawl Scraper")
-    print("=" * 60)
-    
-    firecrawl = Firecrawl(api_key=API_KEY)
-    
-    for url in target_urls:
-        events = scrape_venue(firecrawl, url)
-        all_events.extend(events)
     
-    # Obtener detalles de eventos si se solicita
-    if get_details and all_events:
-        # Deduplicar eventos antes de scrapear detalles
+    def __init__(self, dates: DateNormalizer = None, index: DedupeIndex = None):
+        self.dates = dates or DateNormalizer()
+        # Casi duplicados entre venues y ejecuciones (dedupe_index.py)
+        self.index = index
         # Para Sala Rem: deduplicar por nombre + fecha (ya que tenemos múltiples códigos para el mismo evento)
         # Para otros: deduplicar por URL o código
-        seen_urls = set()
-        seen_codes = set()
-        seen_name_date = set()  # Para Sala Rem: (nombre_normalizado, fecha)
-        unique_events = []
-        
-        print(f"\n🔍 Deduplicando {len(all_events)} eventos...")
-        
-        for event in all_events:
-            event_url = event.get('url', '')
-            event_code = event.get('code', '')
-            event_name = event.get('name', '')
-            venue_slug = event.get('venue_slug', '')
-            is_sala_rem = 'sala-rem' in venue_slug.lower()
-            
-            # #region agent log
+        self.seen_urls = set()
+        self.seen_codes = set()
+        self.seen_name_date = set()  # Para Sala Rem: (nombre_normalizado, fecha)
+        self.accepted = 0
+    
+    def accept(self, event: Dict) -> bool:
+        event_url = event.get('url', '')
+        event_code = event.get('code', '')
+        event_name = event.get('name', '')
+        venue_slug = event.get('venue_slug', '')
+        is_sala_rem = 'sala-rem' in venue_slug.lower()
+        
+        # #region agent log
+        if DEBUG_LOG:
             debug_log("debug-session", "run1", "A", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Procesando evento para deduplicación", {
                 "event_name": event_name,
                 "event_url": event_url[:100],
@@ -1825,175 +1948,328 @@ def scrape_all_events(urls: List[str] = None, get_details: bool = True) -> List[
                 "_date_parts": event.get('_date_parts'),
                 "date_text": event.get('date_text')
             })
-            # #endregion
+        # #endregion
+        
+        # Para Sala Rem: deduplicar por nombre + fecha
+        if is_sala_rem:
+            # Normalizar nombre (eliminar emojis, espacios extra, etc.)
+            name_normalized = re.sub(r'[^\w\s]', '', event_name.lower()).strip()
+            name_normalized = re.sub(r'\s+', ' ', name_normalized)
+            # Fecha de _date_parts, date_text o la URL, con el mismo cambio de año que la transformación
+            event_day = self.dates.event_date(event)
+            event_date = event_day.strftime('%d-%m-%Y') if event_day else None
             
-            # Para Sala Rem: deduplicar por nombre + fecha
-            if is_sala_rem:
-                # Normalizar nombre (eliminar emojis, espacios extra, etc.)
-                name_normalized = re.sub(r'[^\w\s]', '', event_name.lower()).strip()
-                name_normalized = re.sub(r'\s+', ' ', name_normalized)
-                # Obtener fecha de _date_parts o date_text
-                event_date = None
-                if event.get('_date_parts'):
-                    date_parts = event['_date_parts']
-                    event_date = f"{date_parts['day']}-{date_parts['month']}-{date_parts['year']}"
-                elif event.get('date_text'):
-                    # Intentar extraer fecha de date_text
-                    date_match = re.search(r'(\d{1,2})\s+\w+', event.get('date_text', ''))
-                    if date_match:
-                        day = date_match.group(1)
-                        # Buscar mes en date_text
-                        month_map = {'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
-                                   'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
-                                   'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'}
-                        for month_name, month_num in month_map.items():
-                            if month_name in event.get('date_text', '').lower():
-                                event_date = f"{day}-{month_num}-2025"
-                                break
-                
-                # #region agent log
+            # #region agent log
+            if DEBUG_LOG:
                 debug_log("debug-session", "run1", "B", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Deduplicación Sala Rem", {
                     "name_normalized": name_normalized,
                     "event_date": event_date,
                     "name_date_key": (name_normalized, event_date) if event_date else None,
-                    "seen_name_date": list(seen_name_date)
+                    "self.seen_name_date": list(self.seen_name_date)
                 })
-                # #endregion
-                
-                if event_date:
-                    name_date_key = (name_normalized, event_date)
-                    if name_date_key in seen_name_date:
-                        print(f"   ⚠️ Evento duplicado (nombre+fecha): {event_name} - {event_date} - código: {event_code}")
-                        # #region agent log
+            # #endregion
+            
+            if event_date:
+                name_date_key = (name_normalized, event_date)
+                if name_date_key in self.seen_name_date:
+                    print(f"   ⚠️ Evento duplicado (nombre+fecha): {event_name} - {event_date} - código: {event_code}")
+                    # #region agent log
+                    if DEBUG_LOG:
                         debug_log("debug-session", "run1", "C", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Evento duplicado detectado (Sala Rem)", {
                             "event_name": event_name,
                             "event_date": event_date,
                             "name_date_key": name_date_key
                         })
-                        # #endregion
-                        continue
-                    seen_name_date.add(name_date_key)
-                    print(f"   ✅ Evento único (Sala Rem): {event_name} - {event_date} - código: {event_code}")
-                else:
-                    print(f"   ⚠️ No se pudo extraer fecha para {event_name}, usando URL para deduplicación")
-            
-            # Si ya vimos esta URL, saltar
-            if event_url in seen_urls:
-                print(f"   ⚠️ Evento duplicado (URL): {event.get('name', 'N/A')} - {event_url[:80]}...")
-                # #region agent log
+                    # #endregion
+                    return False
+                self.seen_name_date.add(name_date_key)
+                print(f"   ✅ Evento único (Sala Rem): {event_name} - {event_date} - código: {event_code}")
+            else:
+                print(f"   ⚠️ No se pudo extraer fecha para {event_name}, usando URL para deduplicación")
+        
+        # Si ya vimos esta URL, saltar
+        if event_url in self.seen_urls:
+            print(f"   ⚠️ Evento duplicado (URL): {event.get('name', 'N/A')} - {event_url[:80]}...")
+            # #region agent log
+            if DEBUG_LOG:
                 debug_log("debug-session", "run1", "D", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Evento duplicado detectado (URL)", {
                     "event_name": event_name,
                     "event_url": event_url[:100]
                 })
-                # #endregion
-                continue
-            
-            # Para otros venues: deduplicar por código
-            if not is_sala_rem and event_code and event_code in seen_codes:
-                print(f"   ⚠️ Evento duplicado (código): {event.get('name', 'N/A')} - código: {event_code}")
-                # #region agent log
+            # #endregion
+            return False
+        
+        # Para otros venues: deduplicar por código
+        if not is_sala_rem and event_code and event_code in self.seen_codes:
+            print(f"   ⚠️ Evento duplicado (código): {event.get('name', 'N/A')} - código: {event_code}")
+            # #region agent log
+            if DEBUG_LOG:
                 debug_log("debug-session", "run1", "E", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Evento duplicado detectado (código)", {
                     "event_name": event_name,
                     "event_code": event_code
                 })
-                # #endregion
-                continue
-            
-            seen_urls.add(event_url)
-            if event_code:
-                seen_codes.add(event_code)
-            unique_events.append(event)
-            print(f"   ✅ Evento único añadido: {event_name} - {event_code}")
-            # #region agent log
+            # #endregion
+            return False
+        
+        # Otra promotora u otro slug: mismo día y nombre casi igual
+        if self.index is not None:
+            original = self.index.check(event_key(event), event, self.dates.event_date(event))
+            if original:
+                print(f"   ⚠️ Evento duplicado (nombre parecido): {event_name} ≈ {original[:80]}")
+                return False
+        
+        self.seen_urls.add(event_url)
+        if event_code:
+            self.seen_codes.add(event_code)
+        self.accepted += 1
+        print(f"   ✅ Evento único añadido: {event_name} - {event_code}")
+        # #region agent log
+        if DEBUG_LOG:
             debug_log("debug-session", "run1", "F", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Evento único añadido", {
                 "event_name": event_name,
                 "event_code": event_code,
                 "event_url": event_url[:100],
-                "total_unique": len(unique_events)
+                "total_unique": self.accepted
             })
-            # #endregion
+        # #endregion
+        return True
+
+
+@traced('deduplicar')
+def deduplicate_events(events: List[Dict], dates: DateNormalizer = None,
+                       index: DedupeIndex = None) -> List[Dict]:
+    """
+    Deduplica eventos antes de scrapear detalles (o al fusionar shards).
+    Con index también descarta los casi duplicados (ver dedupe_index.py).
+    """
+    deduplicator = EventDeduplicator(dates, index)
+    print(f"\n🔍 Deduplicando {len(events)} eventos...")
+    unique_events = [event for event in events if deduplicator.accept(event)]
+    
+    if len(unique_events) < len(events):
+        print(f"   ✅ Eventos deduplicados: {len(events)} → {len(unique_events)}")
+    
+    return unique_events
+
+
+def validate_detail_result(result: Dict) -> Optional[Dict]:
+    """
+    Decide si un evento con detalles recién scrapeados se conserva.
+    Devuelve el evento o None si la URL era inválida o no tiene contenido.
+    """
+    session_id = "debug-session"
+    run_id = "run1"
+    
+    # Filtrar eventos inválidos (URLs que no retornaron contenido)
+    if result.get('_invalid'):
+        print(f"   ⚠️ Evento inválido descartado: {result.get('name', 'N/A')} - {result.get('url', 'N/A')}")
+        return None
+    else:
+        # Verificar que el evento tiene contenido válido (tickets o precios)
+        # Si no tiene tickets y todos los precios son 0, probablemente es inválido
+        tickets = result.get('tickets', [])
+        prices = result.get('prices', [])
+        has_valid_tickets = any(t.get('precio', '0') != '0' for t in tickets) if tickets else False
+        has_valid_prices = any(str(p) != '0' and str(p) != '0.0' for p in prices) if prices else False
         
-        if len(unique_events) < len(all_events):
-            print(f"   ✅ Eventos deduplicados: {len(all_events)} → {len(unique_events)}")
+        # #region agent log
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "G", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Validando contenido del evento", {
+                "event_name": result.get('name', 'N/A'),
+                "tickets_count": len(tickets),
+                "tickets": [t.copy() if isinstance(t, dict) else str(t) for t in tickets],
+                "prices": prices,
+                "has_valid_tickets": has_valid_tickets,
+                "has_valid_prices": has_valid_prices,
+                "has_description": bool(result.get('description', '').strip()),
+                "has_image": bool(result.get('image', '').strip()),
+                "description": result.get('description', '')[:100],
+                "image": result.get('image', '')[:100]
+            })
+        # #endregion
         
-        all_events = unique_events  # Usar eventos únicos
+        # Si no tiene tickets válidos ni precios válidos, y es de Sala Rem, puede ser una URL inválida
+        if not has_valid_tickets and not has_valid_prices and 'sala-rem' in result.get('venue_slug', '').lower():
+            # Verificar si tiene descripción o imagen (signos de que la URL es válida)
+            has_description = bool(result.get('description', '').strip())
+            has_image = bool(result.get('image', '').strip())
+            
+            # RELAJAR VALIDACIÓN: Si tiene al menos tickets (aunque sean precio 0), mantenerlo
+            # Esto es importante para eventos que pueden tener tickets gratuitos o con "consumicion"
+            has_any_tickets = len(tickets) > 0
+            
+            if not has_description and not has_image and not has_any_tickets:
+                print(f"   ⚠️ Evento sin contenido válido descartado: {result.get('name', 'N/A')} - {result.get('url', 'N/A')[:80]}...")
+                # #region agent log
+                if DEBUG_LOG:
+                    debug_log(session_id, run_id, "H", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Evento descartado por falta de contenido", {
+                        "event_name": result.get('name', 'N/A'),
+                        "reason": "no_description_no_image_no_tickets"
+                    })
+                # #endregion
+                accepted = None
+            else:
+                # Mantener el evento aunque no tenga precios válidos si tiene tickets o descripción/imagen
+                print(f"   ✅ Evento mantenido (tiene tickets/descripción/imagen): {result.get('name', 'N/A')}")
+                accepted = result
+        else:
+            accepted = result
+        # #region agent log
+        if DEBUG_LOG:
+            debug_log(session_id, run_id, "F", "scraper_firecrawl.py:880", "Evento procesado en scrape_all_events", {
+                "event_name": result.get('name', 'N/A'),
+                "event_code": result.get('code', 'N/A'),
+                "tickets_after": [t.copy() if isinstance(t, dict) else str(t) for t in result.get('tickets', [])]
+            })
+        # #endregion
+        return accepted
+
+
+def carried_venue_events(url: str, previous_events: Dict[str, Dict], today: date) -> List[Dict]:
+    """
+    Sin tiempo para el listado de un venue: reutiliza sus eventos futuros de la ejecución anterior.
+    """
+    venue_slug = url.split('/')[-2] if '/events' in url else ''
+    carried = [dict(e, _carried_forward=True) for e in previous_events.values()
+               if e.get('venue_slug') == venue_slug
+               and (infer_event_date(e, today) or date.max) >= today]
+    print(f"\n⏰ Sin tiempo para {url}: {len(carried)} eventos reutilizados de la ejecución anterior")
+    return carried
+
+
+def scrape_all_events(urls: List[str] = None, get_details: bool = True, probe_urls: bool = True,
+                      ignore_breaker: bool = False, deadline: RunDeadline = None,
+                      full_refresh: bool = False, data_dir: Path = None,
+                      fetch_workers: int = FETCH_WORKERS, parse_workers: int = None,
+                      reference: datetime = None) -> List[Dict]:
+    """
+    Scrapea eventos de todas las URLs.
+    Si probe_urls es True, las URLs construidas por heurística se validan con una
+    sonda barata antes de pedir sus detalles.
+    Con ignore_breaker se scrapean también los venues con el circuit breaker abierto.
+    Con deadline, los detalles se piden del evento más inminente al más lejano y,
+    cuando se agota el presupuesto, se reutilizan los datos de la ejecución anterior.
+    Salvo con full_refresh, solo se refrescan los eventos a los que les toca según
+    su nivel de refresco (ver refresh_tiers.py); el resto reutiliza sus datos.
+    data_dir es donde se lee la ejecución anterior y el estado entre ejecuciones
+    (por defecto DATA_DIR; cada shard usa el suyo).
+    Las descargas usan fetch_workers hilos y el parseo un pool de parse_workers
+    procesos (por defecto, uno por núcleo).
+    reference es el instante de la ejecución (por defecto, ahora; --reparse usa
+    el de la ejecución que re-extrae).
+    """
+    target_urls = urls or VENUE_URLS
+    all_events = []
+    data_dir = data_dir or DATA_DIR
+    deadline = deadline or RunDeadline()
+    previous_events = load_previous_events(data_dir / 'raw_events.json')
+    # Una sola referencia temporal para deduplicar, ordenar y refrescar
+    dates = DateNormalizer(reference)
+    today = dates.today
+    
+    print("=" * 60)
+    print("PartyFinder - Firecrawl Scraper")
+    print("=" * 60)
+    
+    firecrawl = create_firecrawl()
+    venue_stats = VenueStats(data_dir / 'venue_stats.json')
+    parse_pool = create_parse_pool(parse_workers)
+    
+    # ===== LISTADOS =====
+    # Los resultados se guardan por posición para que la deduplicación (el primero gana)
+    # no dependa de qué venue termina antes
+    events_by_venue = {}
+    
+    def skip_venue(url):
+        events_by_venue[url] = carried_venue_events(url, previous_events, today)
+    
+    with PROFILER.stage('listados'):
+        run_with_budget(
+            target_urls,
+            lambda url: scrape_venue(firecrawl, url, venue_stats, ignore_breaker=ignore_breaker,
+                                     parse_pool=parse_pool, today=today),
+            fetch_workers, deadline, LatencyEstimator(LISTING_SCRAPE_ESTIMATE_S),
+            on_done=lambda url, events: events_by_venue.__setitem__(url, events),
+            on_skipped=skip_venue
+        )
+    for url in target_urls:
+        all_events.extend(events_by_venue.get(url, []))
+    
+    venue_stats.save()
+    print("\n📊 Estadísticas de la escalera de listados:")
+    for line in venue_stats.summary():
+        print(f"   {line}")
+    
+    # ===== DETALLES =====
+    if get_details and all_events:
+        venues = VenueCache(data_dir / 'venue_cache.json')
+        with PROFILER.stage('deduplicar'):
+            dedupe_index = DedupeIndex(data_dir / 'dedupe_index.json', dates.reference, venues)
+            all_events = deduplicate_events(all_events, dates, dedupe_index)
+            dedupe_index.save()
+        
+        if probe_urls:
+            with PROFILER.stage('sondas'):
+                all_events = probe_constructed_events(firecrawl, all_events, data_dir)
+        
+        # Los eventos más inminentes primero: si se acaba el tiempo, se pierden los lejanos
+        all_events = order_by_event_date(all_events, today)
+        refresh_state = RefreshState(data_dir / 'refresh_state.json')
+        refresh_now = dates.reference
+        not_due = 0
+        to_fetch = []
         
-        print(f"\n🎫 Obteniendo detalles de {len(all_events)} eventos...")
         for i, event in enumerate(all_events):
+            if event.get('_carried_forward'):
+                continue
+            key = event_key(event)
+            if not full_refresh and key in previous_events:
+                tier = refresh_state.tier_for(key, infer_event_date(event, today), today)
+                if not refresh_state.is_due(key, tier, refresh_now):
+                    all_events[i] = dict(carry_forward(event, previous_events), _refresh_tier=REFRESH_TIERS[tier][0])
+                    not_due += 1
+                    continue
+            to_fetch.append(i)
+        
+        def fetch_details(i):
+            event = all_events[i]
             print(f"   [{i+1}/{len(all_events)}] {event.get('name', 'N/A')[:40]}...")
             # #region agent log
-            session_id = "debug-session"
-            run_id = "run1"
-            debug_log(session_id, run_id, "F", "scraper_firecrawl.py:878", "Procesando evento en scrape_all_events", {
-                "event_index": i,
-                "event_name": event.get('name', 'N/A'),
-                "event_code": event.get('code', 'N/A'),
-                "event_url": event.get('url', 'N/A'),
-                "tickets_before": [t.copy() if isinstance(t, dict) else str(t) for t in event.get('tickets', [])]
-            })
-            # #endregion
-            result = scrape_event_details(firecrawl, event)
-            
-            # Filtrar eventos inválidos (URLs que no retornaron contenido)
-            if result.get('_invalid'):
-                print(f"   ⚠️ Evento inválido descartado: {result.get('name', 'N/A')} - {result.get('url', 'N/A')}")
-                all_events[i] = None  # Marcar para filtrar después
-            else:
-                # Verificar que el evento tiene contenido válido (tickets o precios)
-                # Si no tiene tickets y todos los precios son 0, probablemente es inválido
-                tickets = result.get('tickets', [])
-                prices = result.get('prices', [])
-                has_valid_tickets = any(t.get('precio', '0') != '0' for t in tickets) if tickets else False
-                has_valid_prices = any(str(p) != '0' and str(p) != '0.0' for p in prices) if prices else False
-                
-                # #region agent log
-                debug_log(session_id, run_id, "G", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Validando contenido del evento", {
-                    "event_name": result.get('name', 'N/A'),
-                    "tickets_count": len(tickets),
-                    "tickets": [t.copy() if isinstance(t, dict) else str(t) for t in tickets],
-                    "prices": prices,
-                    "has_valid_tickets": has_valid_tickets,
-                    "has_valid_prices": has_valid_prices,
-                    "has_description": bool(result.get('description', '').strip()),
-                    "has_image": bool(result.get('image', '').strip()),
-                    "description": result.get('description', '')[:100],
-                    "image": result.get('image', '')[:100]
-                })
-                # #endregion
-                
-                # Si no tiene tickets válidos ni precios válidos, y es de Sala Rem, puede ser una URL inválida
-                if not has_valid_tickets and not has_valid_prices and 'sala-rem' in result.get('venue_slug', '').lower():
-                    # Verificar si tiene descripción o imagen (signos de que la URL es válida)
-                    has_description = bool(result.get('description', '').strip())
-                    has_image = bool(result.get('image', '').strip())
-                    
-                    # RELAJAR VALIDACIÓN: Si tiene al menos tickets (aunque sean precio 0), mantenerlo
-                    # Esto es importante para eventos que pueden tener tickets gratuitos o con "consumicion"
-                    has_any_tickets = len(tickets) > 0
-                    
-                    if not has_description and not has_image and not has_any_tickets:
-                        print(f"   ⚠️ Evento sin contenido válido descartado: {result.get('name', 'N/A')} - {result.get('url', 'N/A')[:80]}...")
-                        # #region agent log
-                        debug_log(session_id, run_id, "H", f"scraper_firecrawl.py:{sys._getframe().f_lineno}", "Evento descartado por falta de contenido", {
-                            "event_name": result.get('name', 'N/A'),
-                            "reason": "no_description_no_image_no_tickets"
-                        })
-                        # #endregion
-                        all_events[i] = None  # Marcar para filtrar después
-                    else:
-                        # Mantener el evento aunque no tenga precios válidos si tiene tickets o descripción/imagen
-                        print(f"   ✅ Evento mantenido (tiene tickets/descripción/imagen): {result.get('name', 'N/A')}")
-                        all_events[i] = result
-                else:
-                    all_events[i] = result
-                # #region agent log
-                debug_log(session_id, run_id, "F", "scraper_firecrawl.py:880", "Evento procesado en scrape_all_events", {
+            if DEBUG_LOG:
+                debug_log("debug-session", "run1", "F", "scraper_firecrawl.py:878", "Procesando evento en scrape_all_events", {
                     "event_index": i,
-                    "event_name": result.get('name', 'N/A'),
-                    "event_code": result.get('code', 'N/A'),
-                    "tickets_after": [t.copy() if isinstance(t, dict) else str(t) for t in result.get('tickets', [])]
+                    "event_name": event.get('name', 'N/A'),
+                    "event_code": event.get('code', 'N/A'),
+                    "event_url": event.get('url', 'N/A'),
+                    "tickets_before": [t.copy() if isinstance(t, dict) else str(t) for t in event.get('tickets', [])]
                 })
-                # #endregion
+            # #endregion
+            return scrape_event_details(firecrawl, venues.mark(event, refresh_now), parse_pool)
+        
+        def details_done(i, result):
+            result = venues.apply(result, refresh_now)
+            if not result.get('_invalid'):
+                refresh_state.record_fetch(event_key(all_events[i]), result.get('tickets', []), refresh_now)
+            all_events[i] = validate_detail_result(result)
+            if all_events[i] is not None:
+                METRICS.record_events(result.get('venue_slug', ''), 'detalle', 1)
+        
+        def details_skipped(i):
+            all_events[i] = carry_forward(all_events[i], previous_events)
+        
+        print(f"\n🎫 Obteniendo detalles de {len(to_fetch)} eventos ({deadline.describe()})...")
+        with PROFILER.stage('detalles'):
+            run_with_budget(to_fetch, fetch_details, fetch_workers, deadline,
+                            LatencyEstimator(DETAIL_SCRAPE_ESTIMATE_S),
+                            on_done=details_done, on_skipped=details_skipped)
+        
+        refresh_state.prune(refresh_now)
+        refresh_state.save()
+        venues.save()
+        if not_due:
+            print(f"\n♻️  {not_due} eventos sin refrescar (no les tocaba según su nivel)")
+    
+    parse_pool.shutdown()
     
     # Filtrar eventos inválidos (None o marcados como inválidos)
     all_events = [e for e in all_events if e is not None and not e.get('_invalid')]
@@ -2002,6 +2278,244 @@ def scrape_all_events(urls: List[str] = None, get_details: bool = True) -> List[
     return all_events
 
 
+def run_scrape_pipeline(urls: List[str] = None, get_details: bool = True, probe_urls: bool = True,
+                        ignore_breaker: bool = False, deadline: RunDeadline = None,
+                        full_refresh: bool = False, data_dir: Path = None,
+                        fetch_workers: int = FETCH_WORKERS, parse_workers: int = None,
+                        upload: bool = False, queue_size: int = QUEUE_SIZE,
+                        sink_batch: int = SINK_BATCH_SIZE, images=None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Versión por etapas de scrape_all_events + transformación + subida:
+    
+        descubrir -> deduplicar -> descargar -> parsear -> transformar [-> imagenes] -> destino
+    
+    Las etapas trabajan a la vez conectadas por colas acotadas (ver pipeline.py):
+    mientras se scrapean los últimos venues ya se están parseando, transformando
+    y, con upload, subiendo los eventos de los primeros. Los listados se deduplican
+    en el orden de los venues y los detalles se descargan en orden de fecha entre
+    los eventos en cola.
+    
+    La subida es incremental con IDs deterministas (upsert_events). Al final se
+    notifica una vez y, si ninguna etapa ha fallado, se borran de Firestore los
+    eventos que ya no aparecen.
+    Devuelve (eventos crudos, eventos transformados), ordenados por fecha.
+    """
+    target_urls = urls or VENUE_URLS
+    data_dir = data_dir or DATA_DIR
+    deadline = deadline or RunDeadline()
+    previous_events = load_previous_events(data_dir / 'raw_events.json')
+    # Una sola referencia temporal para deduplicar, ordenar y refrescar
+    dates = DateNormalizer()
+    today = dates.today
+    refresh_now = dates.reference
+    
+    print("=" * 60)
+    print("PartyFinder - Firecrawl Scraper (pipeline)")
+    print("=" * 60)
+    
+    if upload:
+        try:
+            from firebase_config import upsert_events, delete_events_except
+        except Exception as e:
+            print(f"❌ Error cargando Firebase, no se subirá nada: {e}")
+            upload = False
+    
+    firecrawl = create_firecrawl()
+    venue_stats = VenueStats(data_dir / 'venue_stats.json')
+    refresh_state = RefreshState(data_dir / 'refresh_state.json')
+    venues = VenueCache(data_dir / 'venue_cache.json')
+    dedupe_index = DedupeIndex(data_dir / 'dedupe_index.json', refresh_now, venues)
+    deduplicator = EventDeduplicator(dates, dedupe_index)
+    listing_estimator = LatencyEstimator(LISTING_SCRAPE_ESTIMATE_S)
+    detail_estimator = LatencyEstimator(DETAIL_SCRAPE_ESTIMATE_S)
+    parse_pool = create_parse_pool(parse_workers)
+    parse_stage_workers = parse_workers or default_parse_workers()
+    # Un pool de hilos para Firecrawl (limitado por el plan) y otro para Firebase
+    fetch_pool = ThreadPoolExecutor(max_workers=max(1, fetch_workers))
+    upload_pool = ThreadPoolExecutor(max_workers=1)
+    image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS) if images else None
+    
+    results = []            # (crudo, transformado)
+    listings = {}           # posición del venue -> (eventos, frescos) hasta que le toque deduplicar
+    next_listing = [0]
+    listing_lock = asyncio.Lock()
+    pending_upload = []
+    uploaded_ids = []
+    counters = {'not_due': 0, 'over_budget': 0}
+    
+    async def in_pool(pool, fn, *args):
+        # Copiar el contexto para que los spans del hilo cuelguen del span de la etapa
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(pool, context.run, fn, *args)
+    
+    async def emit_listings(emit, closing=False):
+        # Los listados pasan a deduplicar en el orden de los venues, como en
+        # scrape_all_events: el primero que gana no depende de qué venue acaba antes.
+        # Al cerrar se saltan los huecos de los venues que fallaron.
+        async with listing_lock:
+            while next_listing[0] < len(target_urls):
+                position = next_listing[0]
+                if position in listings:
+                    await emit(listings.pop(position))
+                elif not closing:
+                    break
+                next_listing[0] += 1
+    
+    async def discover(item, emit):
+        position, url = item
+        if not deadline.can_afford(listing_estimator.estimate()):
+            listings[position] = (carried_venue_events(url, previous_events, today), False)
+        else:
+            started = time.monotonic()
+            events = await in_pool(fetch_pool, scrape_venue, firecrawl, url, venue_stats, ignore_breaker,
+                                   parse_pool, today)
+            listing_estimator.observe(time.monotonic() - started)
+            listings[position] = (events, True)
+        await emit_listings(emit)
+    
+    async def close_discover(emit):
+        await emit_listings(emit, closing=True)
+    
+    async def dedupe(batch, emit):
+        events, fresh = batch
+        events = [e for e in events if deduplicator.accept(e)]
+        if not fresh or not get_details:
+            for event in events:
+                await emit((event, False))
+            return
+        if probe_urls:
+            events = await in_pool(fetch_pool, probe_constructed_events, firecrawl, events, data_dir)
+        for event in events:
+            key = event_key(event)
+            if not full_refresh and key in previous_events:
+                tier = refresh_state.tier_for(key, infer_event_date(event, today), today)
+                if not refresh_state.is_due(key, tier, refresh_now):
+                    counters['not_due'] += 1
+                    await emit((dict(carry_forward(event, previous_events), _refresh_tier=REFRESH_TIERS[tier][0]), False))
+                    continue
+            await emit((event, True))
+    
+    async def fetch(item, emit):
+        event, needs_details = item
+        if not needs_details:
+            await emit((event, None, False))
+            return
+        if not deadline.can_afford(detail_estimator.estimate()):
+            counters['over_budget'] += 1
+            await emit((carry_forward(event, previous_events), None, False))
+            return
+        print(f"   🎫 {event.get('name', 'N/A')[:40]}...")
+        started = time.monotonic()
+        prepared, page = await in_pool(fetch_pool, fetch_event_details_page, firecrawl, venues.mark(event, refresh_now))
+        detail_estimator.observe(time.monotonic() - started)
+        await emit((prepared, page, True))
+    
+    async def parse(item, emit):
+        event, page, fetched = item
+        if not fetched:
+            await emit(event)
+            return
+        # Sin página (sin URL o error de descarga) el evento sigue con los datos del listado
+        if page is None:
+            result = event
+        else:
+            result = await asyncio.wrap_future(parse_pool.submit(parse_event_details, event, page))
+        result = venues.apply(result, refresh_now)
+        if not result.get('_invalid'):
+            refresh_state.record_fetch(event_key(event), result.get('tickets', []), refresh_now)
+        accepted = validate_detail_result(result)
+        if accepted is not None:
+            METRICS.record_events(accepted.get('venue_slug', ''), 'detalle', 1)
+            await emit(accepted)
+    
+    async def transform(event, emit):
+        await emit((event, transform_to_app_format([event], dates, venues)[0]))
+    
+    async def cache_image(item, emit):
+        await in_pool(image_pool, images.rewrite, item[1])
+        await emit(item)
+    
+    async def flush_uploads():
+        if not pending_upload:
+            return
+        batch = list(pending_upload)
+        pending_upload.clear()
+        uploaded_ids.extend(await in_pool(upload_pool, upsert_events, batch))
+        print(f"   📤 {len(uploaded_ids)} eventos subidos")
+    
+    async def sink(item, emit):
+        results.append(item)
+        if upload:
+            pending_upload.append(item[1])
+            if len(pending_upload) >= sink_batch:
+                await flush_uploads()
+    
+    async def close_sink(emit):
+        if upload:
+            await flush_uploads()
+            # Una sola ronda de notificaciones, con todo ya subido
+            if uploaded_ids:
+                await in_pool(upload_pool, notify_new_events)
+    
+    def date_priority(item):
+        return (infer_event_date(item[0], today) or date.max).toordinal()
+    
+    stages = [
+        Stage('descubrir', discover, workers=fetch_workers, maxsize=queue_size, on_close=close_discover),
+        Stage('deduplicar', dedupe, workers=1, maxsize=queue_size),
+        Stage('descargar', fetch, workers=fetch_workers, maxsize=queue_size, priority=date_priority),
+        Stage('parsear', parse, workers=parse_stage_workers, maxsize=queue_size),
+        Stage('transformar', transform, workers=1, maxsize=queue_size),
+    ]
+    if images:
+        stages.append(Stage('imagenes', cache_image, workers=IMAGE_WORKERS, maxsize=queue_size))
+    stages.append(Stage('destino', sink, workers=1, maxsize=queue_size, on_close=close_sink))
+    pipeline = Pipeline(stages)
+    try:
+        pipeline.run(enumerate(target_urls))
+    finally:
+        fetch_pool.shutdown()
+        upload_pool.shutdown()
+        parse_pool.shutdown()
+        if image_pool:
+            image_pool.shutdown()
+    
+    venue_stats.save()
+    dedupe_index.save()
+    if images:
+        images.save()
+        print(f"\n🖼️ Imágenes: {images.summary()}")
+    print("\n📊 Estadísticas de la escalera de listados:")
+    for line in venue_stats.summary():
+        print(f"   {line}")
+    if get_details:
+        refresh_state.prune(refresh_now)
+        refresh_state.save()
+        venues.save()
+    if counters['not_due']:
+        print(f"\n♻️  {counters['not_due']} eventos sin refrescar (no les tocaba según su nivel)")
+    if counters['over_budget']:
+        print(f"\n⏰ {counters['over_budget']} eventos sin detalles por falta de tiempo ({deadline.describe()})")
+    
+    print("\n🧵 Etapas del pipeline:")
+    for line in pipeline.summary():
+        print(f"   {line}")
+    
+    # Solo se borra lo obsoleto si ninguna etapa ha fallado: un venue o evento
+    # perdido por un error no debe desaparecer de Firestore
+    if upload and uploaded_ids:
+        if any(stage['errors'] for stage in pipeline.stats().values()):
+            print("⚠️ Hubo errores en el pipeline: no se borran los eventos obsoletos")
+        else:
+            delete_events_except(uploaded_ids)
+    
+    results.sort(key=lambda r: infer_event_date(r[0], today) or date.max)
+    raw_events = [raw for raw, _ in results]
+    transformed = [app for _, app in results]
+    print(f"\n🎉 Total: {len(raw_events)} eventos scrapeados (eventos inválidos filtrados)")
+    return raw_events, transformed
+
+
 def test_connection() -> bool:
     """
     Test básico de conexión.
@@ -2010,7 +2524,7 @@ def test_connection() -> bool:
     print("PartyFinder - Test de Firecrawl")
     print("=" * 60)
     
-    firecrawl = Firecrawl(api_key=API_KEY)
+    firecrawl = create_firecrawl()
     test_url = VENUE_URLS[0]
     
     print(f"\n🔗 URL: {test_url}")
@@ -2018,11 +2532,12 @@ def test_connection() -> bool:
     
     try:
         # Usar actions para obtener HTML completo con aria-labels
-        result = firecrawl.scrape(
-            test_url, 
-            formats=["html"],
-            actions=[{"type": "wait", "milliseconds": 5000}]
-        )
+        with metrics_scope(stage='test'):
+            result = firecrawl.scrape(
+                test_url, 
+                formats=["html"],
+                actions=[{"type": "wait", "milliseconds": 5000}]
+            )
         status = result.metadata.status_code if result.metadata else "N/A"
         html_len = len(result.html) if result.html else 0
         
@@ -2040,6 +2555,282 @@ def test_connection() -> bool:
         return False
 
 
+@traced('deduplicar')
+def merge_shards(shard_dirs: List[Path]) -> List[Dict]:
+    """
+    Fusiona las salidas (raw_events.json) de varios shards y deduplica entre shards.
+    Las cachés de venues de los shards se fusionan en data/venue_cache.json.
+    """
+    all_events = []
+    shard_counts = set()
+    venues = VenueCache(DATA_DIR / 'venue_cache.json')
+    for shard_dir in shard_dirs:
+        raw_path = Path(shard_dir) / 'raw_events.json'
+        if not raw_path.exists():
+            print(f"   ⚠️ Shard sin datos: {shard_dir}")
+            continue
+        venues.merge(VenueCache(Path(shard_dir) / 'venue_cache.json'))
+        with open(raw_path, 'r', encoding='utf-8') as f:
+            events = json.load(f)
+        print(f"   📦 {Path(shard_dir).name}: {len(events)} eventos")
+        all_events.extend(events)
+        match = re.search(r'-of-(\d+)$', Path(shard_dir).name)
+        if match:
+            shard_counts.add(match.group(1))
+    
+    if len(shard_counts) > 1:
+        print(f"   ⚠️ Se mezclan shards de repartos distintos (N = {', '.join(sorted(shard_counts))})")
+    
+    # La transformación posterior lee la caché fusionada de data/
+    venues.save()
+    # Índice solo en memoria: los shards ya guardaron el suyo
+    return deduplicate_events(all_events, index=DedupeIndex(None, venues=venues))
+
+
+def reparse_snapshots(since: str = None, until: str = None, fetch_workers: int = FETCH_WORKERS,
+                      parse_workers: int = None) -> int:
+    """
+    Vuelve a extraer las ejecuciones grabadas en data/snapshots/ entre since y
+    until (YYYY-MM-DD) con los parsers actuales, sin red: cada una se reproduce
+    con scrape_all_events sobre sus páginas (extracción en el pool de procesos)
+    en un directorio de estado vacío y con la fecha de la ejecución original.
+    Sustituye su entrada en el archivo histórico y, si es la última ejecución
+    grabada, también data/raw_events.json.
+    """
+    store = SnapshotStore(DATA_DIR / 'snapshots')
+    runs = store.runs(since, until)
+    if not runs:
+        print(f"❌ No hay páginas grabadas en {store.path} para ese rango")
+        return 1
+    latest = store.runs()[-1]
+    archive = RunArchive(DATA_DIR / 'archive')
+    reparsed_at = datetime.now()
+    print(f"♻️ Re-extrayendo {len(runs)} ejecuciones ({runs[0]} → {runs[-1]}) sin red")
+    
+    for run_id in runs:
+        snapshots = RunSnapshots(store, run_id)
+        recorded = set(snapshots.urls())
+        urls = [url for url in VENUE_URLS if url in recorded]
+        if not urls:
+            print(f"   ⚠️ {run_id}: sin listados grabados")
+            continue
+        FIRECRAWL_BACKEND['replay'] = snapshots
+        with tempfile.TemporaryDirectory(prefix='reparse-') as state_dir:
+            # Estado vacío: sin niveles de refresco ni datos arrastrados, todo se vuelve a parsear
+            raw_events = scrape_all_events(urls, ignore_breaker=True, full_refresh=True, data_dir=Path(state_dir),
+                                           fetch_workers=fetch_workers, parse_workers=parse_workers,
+                                           reference=snapshots.reference)
+            transformed = transform_to_app_format(raw_events, DateNormalizer(snapshots.reference),
+                                                  VenueCache(Path(state_dir) / 'venue_cache.json'))
+        entry = archive.append(raw_events, transformed, snapshots.reference, reparsed_at=reparsed_at)
+        print(f"📚 {run_id}: {entry['events']} eventos, {entry['tickets']} entradas → {entry['file']}")
+        if run_id == latest:
+            write_json(DATA_DIR / 'raw_events.json', raw_events)
+            print(f"💾 Datos crudos: {DATA_DIR / 'raw_events.json'}")
+    FIRECRAWL_BACKEND['replay'] = None
+    return 0
+
+
+# Espera máxima entre comprobaciones del demonio (para reaccionar a señales y cambios de hora)
+DAEMON_MAX_SLEEP_S = 60
+# Como mucho una ronda de notificaciones push cada tanto, y solo si hay eventos nuevos
+DAEMON_NOTIFY_INTERVAL_S = 30 * 60
+
+
+def write_json(path: Path, data):
+    """Escribe en un fichero temporal y lo renombra: nadie lee el JSON a medio escribir."""
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    tmp.replace(path)
+
+
+def save_export(output_dir: Path, raw_events: List[Dict], transformed: List[Dict]):
+    """
+    Escribe raw_events.json, events.json y sus índices de búsqueda y geográfico.
+    Cada fichero se sustituye de golpe y events.json va el último: server.py
+    recarga al cambiar cualquiera de los tres y descarta índices que no cuadran.
+    """
+    write_json(output_dir / 'raw_events.json', raw_events)
+    print(f"\n💾 Datos crudos: {output_dir / 'raw_events.json'}")
+    
+    # Índice de búsqueda junto a los datos (lo sirve server.py en /api/search)
+    search_index = write_search_index(transformed, output_dir / 'search_index.json')
+    # Índice geográfico: en modo shard, su bbox y coverage dicen qué zona cubre el shard
+    geo_index = write_geo_index(transformed, output_dir / 'geo_index.json')
+    
+    write_json(output_dir / 'events.json', transformed)
+    print(f"💾 Datos transformados: {output_dir / 'events.json'}")
+    print(f"🔎 Índice de búsqueda: {output_dir / 'search_index.json'} ({len(search_index['terms'])} términos)")
+    print(f"🗺️ Índice geográfico: {output_dir / 'geo_index.json'} ({len(geo_index['cells'])} celdas)")
+
+
+def run_daemon(urls: List[str] = None, upload: bool = False, daily_credits: int = DAILY_CREDITS,
+               fetch_workers: int = FETCH_WORKERS, parse_workers: int = None,
+               ignore_breaker: bool = False) -> int:
+    """
+    Modo demonio: sondea los listados con la cadencia de poll_schedule.py (más a
+    menudo en las noches de fin de semana y cerca del inicio de los eventos),
+    pide los detalles solo de los eventos nuevos o cambiados y publica cada
+    cambio en cuanto se detecta (events.json y, con upload, Firestore).
+    Pasado daily_credits en un día, los venues se sondean cada EXHAUSTED_INTERVAL.
+    Las notificaciones push solo se envían si se han subido eventos nuevos (no
+    cambios), como mucho una vez cada DAEMON_NOTIFY_INTERVAL_S.
+    Termina con SIGINT o SIGTERM.
+    """
+    target_urls = urls or VENUE_URLS
+    if upload:
+        try:
+            from firebase_config import upsert_events, delete_events, event_document_id
+        except Exception as e:
+            print(f"❌ Error cargando Firebase, no se subirá nada: {e}")
+            upload = False
+    
+    firecrawl = create_firecrawl()
+    state = PollState(DATA_DIR / 'poll_state.json')
+    venue_stats = VenueStats(DATA_DIR / 'venue_stats.json')
+    refresh_state = RefreshState(DATA_DIR / 'refresh_state.json')
+    venues = VenueCache(DATA_DIR / 'venue_cache.json')
+    parse_pool = create_parse_pool(parse_workers)
+    fetch_pool = ThreadPoolExecutor(max_workers=max(1, fetch_workers))
+    current = load_previous_events(DATA_DIR / 'raw_events.json')
+    notify = {'pending': False, 'last': None}
+    
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    
+    print("=" * 60)
+    print(f"PartyFinder - Firecrawl Scraper (demonio, {len(target_urls)} venues, {daily_credits} créditos/día)")
+    print("=" * 60)
+    
+    def poll(url: str):
+        now, local = datetime.now(), madrid_now()
+        dates = DateNormalizer()
+        listing = scrape_venue(firecrawl, url, venue_stats, ignore_breaker=ignore_breaker, parse_pool=parse_pool,
+                               today=dates.today)
+        listing = deduplicate_events(listing, dates) if listing else []
+        changed, removed = state.diff(url, listing, event_key)
+        
+        starts = [event_start(dates.event_date(e), e.get('hora_inicio')) for e in listing]
+        next_start = min((s for s in starts if s and s >= local), default=None)
+        if state.credits >= daily_credits:
+            name, interval = 'sin_presupuesto', EXHAUSTED_INTERVAL
+        else:
+            name, interval = poll_interval(local, next_start)
+        state.schedule(url, now, name, interval)
+        print(f"   ⏱️ Próximo sondeo en {interval} ({name})")
+        if not changed and not removed:
+            print("   💤 Listado sin cambios")
+            return
+        
+        print(f"   🔁 {len(changed)} eventos nuevos o cambiados, {len(removed)} retirados")
+        # Las URLs construidas se validan antes (con la caché de sondas)
+        changed = probe_constructed_events(firecrawl, changed, DATA_DIR)
+        results = fetch_pool.map(lambda e: scrape_event_details(firecrawl, venues.mark(e, now), parse_pool), changed)
+        updated = []
+        inserted = 0
+        for event, result in zip(changed, results):
+            result = venues.apply(result, now)
+            if not result.get('_invalid'):
+                refresh_state.record_fetch(event_key(event), result.get('tickets', []), now)
+            accepted = validate_detail_result(result)
+            if accepted is None:
+                if not result.get('_invalid'):
+                    # Fallo de descarga: se reintenta en el próximo sondeo
+                    state.venues[url]['fingerprints'].pop(event_key(event), None)
+                continue
+            METRICS.record_events(accepted.get('venue_slug', ''), 'detalle', 1)
+            inserted += event_key(event) not in current
+            current[event_key(event)] = accepted
+            updated.append(accepted)
+        retired = [current.pop(key) for key in removed if key in current]
+        
+        raw_events = order_by_event_date(list(current.values()), dates.today)
+        transformed = transform_to_app_format(raw_events, dates, venues)
+        save_export(DATA_DIR, raw_events, transformed)
+        if upload:
+            if updated:
+                upsert_events(transform_to_app_format(updated, dates, venues))
+                notify['pending'] = notify['pending'] or inserted > 0
+            if retired:
+                delete_events([event_document_id(e['evento']) for e in transform_to_app_format(retired, dates, venues)])
+            print(f"   📤 Publicados {len(updated)} cambios y {len(retired)} retirados")
+    
+    def flush_notifications(force: bool = False):
+        if not notify['pending']:
+            return
+        if not force and notify['last'] is not None and time.monotonic() - notify['last'] < DAEMON_NOTIFY_INTERVAL_S:
+            return
+        notify_new_events()
+        notify['pending'], notify['last'] = False, time.monotonic()
+    
+    try:
+        while not stop.is_set():
+            for url in state.due(target_urls, datetime.now()):
+                if stop.is_set():
+                    break
+                calls_before = len(METRICS.calls)
+                try:
+                    poll(url)
+                except Exception as e:
+                    print(f"   ❌ Error sondeando {url}: {type(e).__name__}: {e}")
+                    state.schedule(url, datetime.now(), 'error', EXHAUSTED_INTERVAL / 6)
+                if state.spend(METRICS.credits_since(calls_before), madrid_now()):
+                    # Un registro de métricas por día
+                    METRICS.write(DATA_DIR)
+                    METRICS.reset()
+                state.save()
+                venue_stats.save()
+                refresh_state.save()
+                venues.save()
+            flush_notifications()
+            wakeup = state.next_wakeup(target_urls)
+            wait = (wakeup - datetime.now()).total_seconds() if wakeup else 0
+            stop.wait(min(max(wait, 1), DAEMON_MAX_SLEEP_S))
+    finally:
+        flush_notifications(force=True)
+        fetch_pool.shutdown()
+        parse_pool.shutdown()
+        state.save()
+        print(f"\n🛑 Demonio detenido ({state.credits} créditos hoy)")
+    return 0
+
+
+@traced('notificaciones')
+def notify_new_events():
+    """
+    Envía las notificaciones push de los eventos nuevos ya subidos.
+    """
+    print("\n📬 Verificando y enviando notificaciones push...")
+    try:
+        from push_notifications import check_and_send_notifications
+        check_and_send_notifications()
+    except Exception as e:
+        print(f"⚠️ Error enviando notificaciones: {e}")
+        # No fallar el scraper si las notificaciones fallan
+
+
+def upload_and_notify(transformed: List[Dict]):
+    """
+    Sube los eventos a Firebase y envía las notificaciones push.
+    Usa los mismos IDs deterministas que el pipeline y el demonio (upsert_events)
+    y después borra los eventos que ya no aparecen, así los modos se pueden mezclar.
+    """
+    print("\n📤 Subiendo a Firebase...")
+    try:
+        from firebase_config import upsert_events, delete_events_except
+        uploaded_ids = upsert_events(transformed)
+        if uploaded_ids:
+            delete_events_except(uploaded_ids)
+        print(f"✅ {len(uploaded_ids)} eventos subidos a Firebase")
+        
+        # Enviar push notifications para nuevos eventos
+        notify_new_events()
+    except Exception as e:
+        print(f"❌ Error subiendo a Firebase: {e}")
+
+
 def main():
     import argparse
     
@@ -2048,9 +2839,95 @@ def main():
     parser.add_argument('--upload', '-u', action='store_true', help='Subir a Firebase')
     parser.add_argument('--no-details', action='store_true', help='No obtener detalles de eventos')
     parser.add_argument('--urls', nargs='+', help='URLs específicas a scrapear (ej: --urls https://web.fourvenues.com/es/sala-rem/events)')
+    parser.add_argument('--shard', metavar='i/N', help='Scrapear solo el shard i de N del catálogo de venues (ej: --shard 2/4)')
+    parser.add_argument('--merge', nargs='*', metavar='DIR', help='Fusionar las salidas de los shards (por defecto todos los de data/shards)')
+    parser.add_argument('--no-probe', action='store_true', help='No validar URLs construidas antes de scrapear detalles')
+    parser.add_argument('--deadline', type=float, metavar='MIN', help='Tiempo máximo de la ejecución en minutos (prioriza eventos inminentes)')
+    parser.add_argument('--reserve', type=float, default=5, metavar='MIN', help='Minutos reservados para subida y notificaciones (con --deadline)')
+    parser.add_argument('--full-refresh', action='store_true', help='Refrescar detalles de todos los eventos, ignorando los niveles de refresco')
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS, help=f'Scrapes simultáneos contra Firecrawl (por defecto {FETCH_WORKERS})')
+    parser.add_argument('--parse-workers', type=int, help='Procesos de parseo (por defecto uno por núcleo; 1 = en línea)')
+    parser.add_argument('--html-parser', choices=available_backends(), help='Backend de parseo HTML (por defecto lxml si está instalado)')
+    parser.add_argument('--sequential', action='store_true', help='Ejecutar las etapas una tras otra en lugar del pipeline concurrente')
+    parser.add_argument('--images', action='store_true', help='Cachear los carteles y reescribir imagen_url a miniaturas WebP (data/images/)')
+    parser.add_argument('--image-base-url', metavar='URL', help=f'URL pública de data/images/ (por defecto ${IMAGE_BASE_ENV})')
+    parser.add_argument('--daemon', action='store_true', help='Sondear los listados de forma continua y publicar los cambios al momento (ver poll_schedule.py)')
+    parser.add_argument('--daily-credits', type=int, default=DAILY_CREDITS, metavar='N', help=f'Créditos de Firecrawl por día en modo demonio (por defecto {DAILY_CREDITS})')
+    parser.add_argument('--no-snapshots', action='store_true', help='No archivar las páginas descargadas (data/snapshots/)')
+    parser.add_argument('--reparse', nargs='*', metavar='FECHA',
+                        help='Re-extraer sin red las páginas archivadas: [desde [hasta]] en YYYY-MM-DD (por defecto todas)')
+    parser.add_argument('--no-archive', action='store_true', help='No añadir la ejecución al archivo histórico (data/archive/)')
+    parser.add_argument('--ignore-breaker', action='store_true', help='Scrapear también los venues con el circuit breaker abierto')
+    
+    parser.add_argument('--trace', nargs='?', const=str(DATA_DIR / 'trace.json'), metavar='FICHERO',
+                        help='Guardar una traza de la ejecución (por defecto data/trace.json; se abre en ui.perfetto.dev)')
+    parser.add_argument('--profile', action='store_true', help='Perfilar cada etapa con cProfile y tracemalloc (informes en data/profile/; fuerza modo secuencial)')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP_N, metavar='N', help=f'Filas de los informes de --profile (por defecto {DEFAULT_TOP_N})')
+    parser.add_argument('--trace-format', choices=TRACE_FORMATS, default='chrome', help='Formato de la traza (por defecto chrome)')
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument('--record', metavar='DIR', help='Grabar las respuestas de Firecrawl como fixtures en DIR')
+    replay.add_argument('--replay', metavar='DIR', help='Reproducir los fixtures de DIR en lugar de llamar a Firecrawl (sin red)')
+    parser.add_argument('--replay-latency', default='0', metavar='MS',
+                        help="Latencia artificial del replay: ms fijos, 'ms+jitter' o 'recorded[*escala]' (por defecto 0)")
+    parser.add_argument('--replay-failure-rate', type=float, default=0.0, metavar='P', help='Probabilidad de fallo inyectado por llamada en el replay')
+    parser.add_argument('--replay-failure-status', type=int, nargs='*', metavar='CODE',
+                        help=f'Los fallos inyectados responden con estos códigos HTTP (sin valores: {FAILURE_STATUS}); por defecto son excepciones')
+    parser.add_argument('--replay-seed', type=int, default=0, help='Semilla de la latencia y los fallos del replay')
     
     args = parser.parse_args()
     
+    # Por entorno para que lo hereden también los procesos del pool de parseo
+    if args.html_parser:
+        os.environ[PARSER_ENV] = args.html_parser
+    
+    FIRECRAWL_BACKEND['record'] = args.record
+    FIRECRAWL_BACKEND['replay'] = args.replay
+    if args.replay:
+        failure_status = None
+        if args.replay_failure_status is not None:
+            failure_status = args.replay_failure_status or FAILURE_STATUS
+        FIRECRAWL_BACKEND['replay_options'] = {
+            **parse_latency(args.replay_latency),
+            'failure_rate': args.replay_failure_rate,
+            'failure_status': failure_status,
+            'seed': args.replay_seed,
+        }
+    
+    if args.profile:
+        # cProfile solo ve el hilo principal: todo secuencial y en línea
+        args.sequential = True
+        args.fetch_workers = 1
+        args.parse_workers = 1
+        DATA_DIR.mkdir(exist_ok=True)
+        PROFILER.start(DATA_DIR / 'profile', args.profile_top)
+    if args.trace:
+        TRACER.enable()
+    
+    try:
+        with TRACER.span('ejecucion', 'scraper'):
+            return run(args)
+    finally:
+        if args.trace:
+            trace_path = TRACER.export(args.trace, args.trace_format)
+            print(f"\n🧭 Traza ({args.trace_format}): {trace_path}")
+            for line in TRACER.summary():
+                print(f"   {line}")
+        # Las llamadas de --reparse son reproducciones: no cuentan en el histórico de créditos
+        if METRICS.calls and args.reparse is None:
+            summary = METRICS.write(DATA_DIR)
+            print(f"\n💳 Firecrawl: {summary['total_calls']} llamadas, ~{summary['total_credits']} créditos "
+                  f"(detalle en {DATA_DIR / 'firecrawl_metrics.json'})")
+        if args.profile:
+            profile_dir = PROFILER.finish()
+            print(f"\n🔬 Perfil por etapas: {profile_dir}")
+            for line in PROFILER.summary():
+                print(f"   {line}")
+
+
+def run(args) -> int:
+    """
+    Ejecuta el scraper con los argumentos ya parseados de main().
+    """
     # Crear directorio data
     DATA_DIR.mkdir(exist_ok=True)
     
@@ -2058,45 +2935,87 @@ def main():
         success = test_connection()
         return 0 if success else 1
     
-    # Scraping completo - usar URLs específicas si se proporcionan
-    target_urls = args.urls if args.urls else None
-    raw_events = scrape_all_events(urls=target_urls, get_details=not args.no_details)
+    if args.reparse is not None:
+        since, until = (args.reparse + [None, None])[:2]
+        return reparse_snapshots(since, until, args.fetch_workers, args.parse_workers)
+    if args.daemon:
+        return run_daemon(args.urls, args.upload, args.daily_credits, args.fetch_workers,
+                          args.parse_workers, args.ignore_breaker)
+    
+    output_dir = DATA_DIR
+    transformed = None
+    streamed_upload = False
+    images = create_image_cache(args.image_base_url) if args.images else None
+    run_at = datetime.now()
+    snapshots = None
+    if not args.no_snapshots and not FIRECRAWL_BACKEND['replay'] and args.merge is None:
+        snapshots = SnapshotStore(DATA_DIR / 'snapshots')
+        FIRECRAWL_BACKEND['snapshots'] = snapshots.recorder(run_at)
+    
+    if args.merge is not None:
+        shard_dirs = [Path(d) for d in args.merge] or sorted(p for p in (DATA_DIR / 'shards').glob('*') if p.is_dir())
+        print(f"🧩 Fusionando {len(shard_dirs)} shards...")
+        raw_events = merge_shards(shard_dirs)
+    else:
+        # El reloj empieza aquí para que la reserva cubra la escritura, la subida y las notificaciones
+        deadline = RunDeadline(args.deadline * 60 if args.deadline else None, reserve_seconds=args.reserve * 60)
+        
+        # Scraping completo - usar URLs específicas si se proporcionan
+        target_urls = args.urls if args.urls else None
+        if args.shard:
+            index, count = parse_shard(args.shard)
+            venues = select_shard(VENUE_CATALOG, index, count)
+            target_urls = [v['url'] for v in venues]
+            output_dir = DATA_DIR / 'shards' / f"{index}-of-{count}"
+            output_dir.mkdir(parents=True, exist_ok=True)
+            print(f"🧩 Shard {index}/{count}: {len(venues)} de {len(VENUE_CATALOG)} venues")
+            if not target_urls:
+                print("   ⚠️ Shard vacío")
+                return 0
+            if args.upload:
+                print("   ⚠️ --upload se ignora en modo shard: sube los datos tras --merge")
+                args.upload = False
+        
+        options = dict(urls=target_urls, get_details=not args.no_details, probe_urls=not args.no_probe,
+                       ignore_breaker=args.ignore_breaker, deadline=deadline,
+                       full_refresh=args.full_refresh, data_dir=output_dir,
+                       fetch_workers=args.fetch_workers, parse_workers=args.parse_workers)
+        if args.sequential:
+            raw_events = scrape_all_events(**options)
+        else:
+            # El pipeline sube y notifica según avanza
+            raw_events, transformed = run_scrape_pipeline(upload=args.upload, images=images, **options)
+            streamed_upload = args.upload
+    
+    if snapshots:
+        print(f"\n🗄️ Páginas archivadas: {snapshots.summary()}")
     
     if not raw_events:
         print("\n❌ No se encontraron eventos")
         return 1
     
     # Transformar
-    transformed = transform_to_app_format(raw_events)
+    if transformed is None:
+        with PROFILER.stage('transformar'):
+            transformed = transform_to_app_format(raw_events, venues=VenueCache(output_dir / 'venue_cache.json'))
+        if images:
+            with PROFILER.stage('imagenes'), TRACER.span('imagenes', 'imagenes', eventos=len(transformed)):
+                images.apply(transformed)
+                images.save()
+            print(f"\n🖼️ Imágenes: {images.summary()}")
     
     # Guardar
-    with open(DATA_DIR / 'raw_events.json', 'w', encoding='utf-8') as f:
-        json.dump(raw_events, f, indent=2, ensure_ascii=False)
-    print(f"\n💾 Datos crudos: {DATA_DIR / 'raw_events.json'}")
-    
-    with open(DATA_DIR / 'events.json', 'w', encoding='utf-8') as f:
-        json.dump(transformed, f, indent=2, ensure_ascii=False)
-    print(f"💾 Datos transformados: {DATA_DIR / 'events.json'}")
+    with PROFILER.stage('guardar'):
+        save_export(output_dir, raw_events, transformed)
+        # Histórico columnar: solo la salida completa (los shards se archivan al fusionarlos)
+        if not args.shard and not args.no_archive:
+            entry = RunArchive(DATA_DIR / 'archive').append(raw_events, transformed, run_at)
+            print(f"📚 Archivo histórico: {entry['file']} ({entry['events']} eventos, {entry['tickets']} entradas, {entry['bytes'] / 1024:.1f} KB)")
     
     # Subir a Firebase
-    if args.upload:
-        print("\n📤 Subiendo a Firebase...")
-        try:
-            from firebase_config import upload_events_to_firestore, delete_old_events
-            delete_old_events()
-            upload_events_to_firestore(transformed)
-            print("✅ Datos subidos a Firebase")
-            
-            # Enviar push notifications para nuevos eventos
-            print("\n📬 Verificando y enviando notificaciones push...")
-            try:
-                from push_notifications import check_and_send_notifications
-                check_and_send_notifications()
-            except Exception as e:
-                print(f"⚠️ Error enviando notificaciones: {e}")
-                # No fallar el scraper si las notificaciones fallan
-        except Exception as e:
-            print(f"❌ Error subiendo a Firebase: {e}")
+    if args.upload and not streamed_upload:
+        with PROFILER.stage('subir'):
+            upload_and_notify(transformed)
     
     return 0
 
@@ -0,0 +1,173 @@
+"""
+Índice de búsqueda de eventos
+=============================
+Índice invertido compacto que se genera con cada exportación, junto a
+events.json (data/search_index.json), para buscar por nombre, descripción,
+DJ, tag o sala sin recorrer todos los eventos. Lo consulta server.py
+(/api/search) y es lo bastante pequeño para enviarlo a la app.
+
+Normalización (igual al indexar y al buscar):
+- minúsculas y sin tildes: "Reguetón" -> "regueton"
+- sin palabras vacías ("de", "la", "con"...)
+- stemming ligero: plurales y vocal final ("fiestas" -> "fiest", "noche" -> "noch")
+
+Formato:
+    {"version": 1, "generated_at": iso,
+     "docs": [url_evento, ...],                 # posición = índice en events.json
+     "terms": ["dj", "fiest", ...],             # ordenados (búsqueda por prefijo)
+     "postings": [[doc, peso, doc, peso, ...], ...]}   # alineadas con terms
+
+Cada palabra de la consulta casa con los términos que empiezan por ella, así
+que "regg" ya encuentra "reggaeton". Los resultados contienen todas las
+palabras y se ordenan por peso (nombre > tags y sala > descripción).
+"""
+
+import bisect
+import json
+import re
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SEARCH_INDEX_VERSION = 1
+
+# Peso de cada campo en la puntuación
+FIELD_WEIGHTS = {'nombre': 3, 'tags': 2, 'lugar': 2, 'descripcion': 1}
+
+STOPWORDS = {
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'la', 'las', 'lo', 'los', 'para',
+    'por', 'que', 'se', 'su', 'sus', 'un', 'una', 'unos', 'unas', 'y', 'o', 'e', 'u',
+    'the', 'and', 'of',
+}
+
+# Un prefijo muy corto puede abarcar cientos de términos: se limita la expansión
+MAX_PREFIX_TERMS = 64
+MIN_PREFIX_CHARS = 2
+
+_TOKEN = re.compile(r'\w+')
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """Stemming ligero para español: plural y vocal final."""
+    if len(word) > 4 and word.endswith('es'):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith('s'):
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'aoe':
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in _TOKEN.findall(fold(text))
+            if token not in STOPWORDS and (len(token) > 1 or token.isdigit())]
+
+
+def _event_fields(event: Dict) -> Dict[str, str]:
+    evento = event.get('evento', event)
+    return {
+        'nombre': evento.get('nombreEvento', ''),
+        'tags': ' '.join(evento.get('tags') or []),
+        'lugar': (evento.get('lugar') or {}).get('nombre', ''),
+        'descripcion': evento.get('descripcion', ''),
+    }
+
+
+def build_search_index(events: List[Dict], generated_at: datetime = None) -> Dict:
+    """Índice de un events.json ya transformado (formato de la app)."""
+    weights: Dict[str, Dict[int, int]] = {}
+    docs = []
+    for doc, event in enumerate(events):
+        evento = event.get('evento', event)
+        docs.append(evento.get('url_evento', ''))
+        for field, text in _event_fields(event).items():
+            for term in set(tokenize(text)):
+                postings = weights.setdefault(term, {})
+                postings[doc] = postings.get(doc, 0) + FIELD_WEIGHTS[field]
+
+    terms = sorted(weights)
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'generated_at': (generated_at or datetime.now()).isoformat(timespec='seconds'),
+        'docs': docs,
+        'terms': terms,
+        'postings': [[value for pair in sorted(weights[term].items()) for value in pair] for term in terms],
+    }
+
+
+def write_search_index(events: List[Dict], path: Path) -> Dict:
+    index = build_search_index(events)
+    # Fichero temporal + rename: server.py nunca lee un índice a medio escribir
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        # Sin sangría ni espacios: el índice se envía tal cual a la app
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    tmp.replace(path)
+    return index
+
+
+class SearchIndex:
+    """Índice cargado en memoria para responder consultas."""
+
+    def __init__(self, data: Dict):
+        if data.get('version') != SEARCH_INDEX_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+        self.docs: List[str] = data['docs']
+        self.terms: List[str] = data['terms']
+        self.generated_at = data.get('generated_at')
+        # Postings como diccionarios {doc: peso} para intersecar sin recorrer listas
+        self.postings: List[Dict[int, int]] = [dict(zip(p[::2], p[1::2])) for p in data['postings']]
+
+    @classmethod
+    def load(cls, path: Path) -> 'SearchIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _prefix_range(self, prefix: str) -> range:
+        start = bisect.bisect_left(self.terms, prefix)
+        end = start
+        while end < len(self.terms) and end - start < MAX_PREFIX_TERMS and self.terms[end].startswith(prefix):
+            end += 1
+        return range(start, end)
+
+    def _matches(self, token: str) -> Dict[int, int]:
+        # Prefijo solo a partir de MIN_PREFIX_CHARS; por debajo, término exacto
+        if len(token) < MIN_PREFIX_CHARS:
+            i = bisect.bisect_left(self.terms, token)
+            return self.postings[i] if i < len(self.terms) and self.terms[i] == token else {}
+        found: Dict[int, int] = {}
+        for i in self._prefix_range(token):
+            for doc, weight in self.postings[i].items():
+                # Término exacto cuenta más que una extensión del prefijo
+                score = weight * 2 if self.terms[i] == token else weight
+                if score > found.get(doc, 0):
+                    found[doc] = score
+        return found
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, int]]:
+        """[(posición en events.json, puntuación)] con todas las palabras de la consulta."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            matches = self._matches(token)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {doc: score + matches[doc] for doc, score in scores.items() if doc in matches}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+def search_events(index: SearchIndex, events: List[Dict], query: str, limit: int = 20) -> List[Dict]:
+    """Eventos de events.json que responden a la consulta, del más relevante al menos."""
+    return [events[doc] for doc, _ in index.search(query, limit) if doc < len(events)]
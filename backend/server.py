@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+API de lectura de PartyFinder
+=============================
+Sirve la última exportación del scraper (data/events.json y sus índices) a la
+app con el formato { success, data, meta } que espera src/services/api.ts.
+
+    GET /api/events                  Todos los eventos
+    GET /api/search?q=techno&limit=20  Búsqueda (índice data/search_index.json)
+    GET /api/nearby?lat=37.98&lon=-1.13&radius_km=2&fecha=hoy
+    GET /api/nearby?bbox=37.9,-1.2,38.0,-1.1     Eventos cercanos (índice data/geo_index.json)
+    GET /api/status                  Fecha de la exportación y tamaños
+    GET /api/health                  Health check
+
+Los ficheros se recargan solos cuando el scraper escribe una exportación nueva.
+
+Uso:
+    python server.py                 # http://localhost:5000
+    python server.py --port 8080 --data-dir data/shards/1-of-4
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from geo_index import GeoIndex
+from search_index import SearchIndex, search_events
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_PORT = 5000
+MAX_SEARCH_LIMIT = 100
+DEFAULT_RADIUS_KM = 2.0
+MAX_RADIUS_KM = 100.0
+# Hasta esta hora de la madrugada "hoy" sigue siendo la noche anterior
+NIGHT_ENDS_HOUR = 6
+
+
+def tonight() -> str:
+    return (datetime.now() - timedelta(hours=NIGHT_ENDS_HOUR)).date().isoformat()
+
+
+class ExportStore:
+    """
+    Última exportación en memoria. Comprueba los mtimes de events.json y sus
+    índices en cada petición (tres stats) y recarga si alguno ha cambiado. Si
+    events.json no se puede leer se siguen sirviendo los datos anteriores.
+    """
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.events: List[Dict] = []
+        self.search: Optional[SearchIndex] = None
+        self.geo: Optional[GeoIndex] = None
+        self.loaded_mtime = None
+        self.loaded_at = None
+        self._seen = None           # mtimes de la última recarga intentada
+        self._lock = threading.Lock()
+
+    @property
+    def events_path(self) -> Path:
+        return self.data_dir / 'events.json'
+
+    @property
+    def search_path(self) -> Path:
+        return self.data_dir / 'search_index.json'
+
+    @property
+    def geo_path(self) -> Path:
+        return self.data_dir / 'geo_index.json'
+
+    def _mtimes(self):
+        mtimes = []
+        for path in (self.events_path, self.search_path, self.geo_path):
+            try:
+                mtimes.append(path.stat().st_mtime)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def refresh(self):
+        mtimes = self._mtimes()
+        if mtimes[0] is None or mtimes == self._seen:
+            return
+        with self._lock:
+            if mtimes == self._seen:
+                return
+            self._seen = mtimes
+            try:
+                with open(self.events_path, 'r', encoding='utf-8') as f:
+                    events = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   ⚠️ {self.events_path.name} ilegible, se siguen sirviendo los datos anteriores: {e}")
+                return
+            # Las posiciones de los índices solo valen para el events.json con el que se generaron
+            urls = [event.get('evento', event).get('url_evento', '') for event in events]
+            search = None
+            if self.search_path.exists():
+                try:
+                    search = SearchIndex.load(self.search_path)
+                    if search.docs != urls:
+                        print(f"   ⚠️ {self.search_path.name} no corresponde a events.json, búsqueda desactivada")
+                        search = None
+                except Exception as e:
+                    print(f"   ⚠️ Índice de búsqueda ilegible: {e}")
+            geo = None
+            if self.geo_path.exists():
+                try:
+                    geo = GeoIndex.load(self.geo_path, events)
+                    if geo.docs is not None and geo.docs != urls:
+                        print(f"   ⚠️ {self.geo_path.name} no corresponde a events.json, búsqueda cercana desactivada")
+                        geo = None
+                except Exception as e:
+                    print(f"   ⚠️ Índice geográfico ilegible: {e}")
+            self.events, self.search, self.geo = events, search, geo
+            self.loaded_mtime = mtimes[0]
+            self.loaded_at = time.time()
+            print(f"📦 Exportación cargada: {len(events)} eventos")
+
+
+def create_app(data_dir: Path = DATA_DIR):
+    from flask import Flask, jsonify, request
+    try:
+        from flask_cors import CORS
+    except ImportError:
+        CORS = None
+
+    app = Flask(__name__)
+    if CORS:
+        CORS(app)
+    store = ExportStore(data_dir)
+    app.config['STORE'] = store
+
+    @app.before_request
+    def reload_export():
+        store.refresh()
+
+    def meta(**extra):
+        return {
+            'count': len(store.events),
+            'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(store.loaded_mtime)) if store.loaded_mtime else None,
+            **extra,
+        }
+
+    @app.get('/api/events')
+    def events():
+        return jsonify(success=True, data=store.events, meta=meta())
+
+    @app.get('/api/search')
+    def search():
+        query = request.args.get('q', '').strip()
+        try:
+            limit = min(int(request.args.get('limit', 20)), MAX_SEARCH_LIMIT)
+        except ValueError:
+            return jsonify(success=False, error="limit debe ser un entero"), 400
+        if store.search is None:
+            return jsonify(success=False, error="Índice de búsqueda no disponible"), 503
+        started = time.perf_counter()
+        results = search_events(store.search, store.events, query, limit)
+        took_us = round((time.perf_counter() - started) * 1e6)
+        return jsonify(success=True, data=results, meta=meta(query=query, results=len(results), took_us=took_us))
+
+    @app.get('/api/nearby')
+    def nearby():
+        if store.geo is None:
+            return jsonify(success=False, error="Índice geográfico no disponible"), 503
+        fecha = request.args.get('fecha')
+        if fecha == 'hoy':
+            fecha = tonight()
+        started = time.perf_counter()
+        try:
+            if request.args.get('bbox'):
+                lat_min, lon_min, lat_max, lon_max = (float(v) for v in request.args['bbox'].split(','))
+                data = [store.events[doc] for doc in store.geo.within_bbox((lat_min, lon_min, lat_max, lon_max), fecha)]
+                query = {'bbox': [lat_min, lon_min, lat_max, lon_max]}
+            else:
+                lat, lon = float(request.args['lat']), float(request.args['lon'])
+                radius_km = min(float(request.args.get('radius_km', DEFAULT_RADIUS_KM)), MAX_RADIUS_KM)
+                data = [dict(store.events[doc], distancia_km=distance)
+                        for doc, distance in store.geo.nearby(lat, lon, radius_km, fecha)]
+                query = {'lat': lat, 'lon': lon, 'radius_km': radius_km}
+        except (KeyError, ValueError):
+            return jsonify(success=False, error="Usa lat, lon y radius_km, o bbox=lat_min,lon_min,lat_max,lon_max"), 400
+        took_us = round((time.perf_counter() - started) * 1e6)
+        return jsonify(success=True, data=data, meta=meta(**query, fecha=fecha, results=len(data), took_us=took_us))
+
+    @app.get('/api/status')
+    def status():
+        files = {}
+        for path in (store.events_path, store.search_path, store.geo_path):
+            if path.exists():
+                files[path.name] = path.stat().st_size
+        return jsonify(success=True, data={
+            'events': len(store.events),
+            'search_index': store.search is not None,
+            'geo_index': store.geo is not None,
+            'bbox': store.geo.bbox if store.geo else None,
+            'files': files,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(store.loaded_at)) if store.loaded_at else None,
+        }, meta=meta())
+
+    @app.get('/api/health')
+    def health():
+        return jsonify(status='ok')
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='API de lectura de PartyFinder')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', DEFAULT_PORT)))
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help=f'Directorio de la exportación (por defecto {DATA_DIR})')
+    args = parser.parse_args()
+
+    app = create_app(Path(args.data_dir))
+    print(f"🚀 API en http://{args.host}:{args.port} (datos: {args.data_dir})")
+    app.run(host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Prueba de la caché de imágenes contra un servidor HTTP local
+=============================================================
+Levanta un http.server en un hilo haciendo de FourVenues (carteles generados
+con Pillow, un 404 y un fichero que no es imagen) y comprueba que image_cache
+descarga cada cartel una vez, escribe las variantes WebP y reescribe los eventos.
+
+Uso:
+    python -m unittest test_image_cache
+"""
+
+import io
+import json
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    from PIL import Image, features
+    HAS_WEBP = features.check('webp')
+except ImportError:
+    HAS_WEBP = False
+
+from image_cache import ImageCache, content_hash
+
+
+def poster(width: int, height: int, color=(200, 30, 90)) -> bytes:
+    out = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(out, 'JPEG')
+    return out.getvalue()
+
+
+class PosterHandler(BaseHTTPRequestHandler):
+    files = {}
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(HAS_WEBP, 'Pillow con soporte WebP no disponible')
+class ImageCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.big = poster(2000, 1500)
+        cls.small = poster(300, 200, (10, 10, 10))
+        PosterHandler.files = {
+            '/cartel.jpg': cls.big,
+            '/otra-url/cartel.jpg': cls.big,
+            '/mini.jpg': cls.small,
+            '/roto.jpg': b'<html>no es una imagen</html>',
+        }
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), PosterHandler)
+        cls.origin = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        PosterHandler.requests = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = Path(self.tmp.name) / 'images'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def event(self, path: str) -> dict:
+        return {'evento': {'nombre': path, 'imagen_url': self.origin + path}}
+
+    def cache(self) -> ImageCache:
+        return ImageCache(self.store, base_url='https://cdn.example.com/images/')
+
+    def test_apply_writes_variants_and_rewrites_events(self):
+        cache = self.cache()
+        events = [self.event(p) for p in ('/cartel.jpg', '/otra-url/cartel.jpg', '/mini.jpg', '/falta.jpg', '/roto.jpg')]
+        cache.apply(events, workers=4)
+        cache.save()
+
+        digest = content_hash(self.big)
+        evento = events[0]['evento']
+        self.assertEqual(evento['imagen_url'], f'https://cdn.example.com/images/{digest}-thumb.webp')
+        self.assertEqual(evento['imagen_detalle_url'], f'https://cdn.example.com/images/{digest}-detail.webp')
+        self.assertEqual(evento['imagen_original_url'], self.origin + '/cartel.jpg')
+        # Mismo cartel bajo otra URL: mismas variantes
+        self.assertEqual(events[1]['evento']['imagen_url'], evento['imagen_url'])
+
+        with Image.open(self.store / f'{digest}-thumb.webp') as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (480, 360)))
+        with Image.open(self.store / f'{digest}-detail.webp') as detail:
+            self.assertEqual(detail.size, (1080, 810))
+        # Una imagen pequeña nunca se amplía
+        with Image.open(self.store / f'{content_hash(self.small)}-detail.webp') as detail:
+            self.assertEqual(detail.size, (300, 200))
+
+        # 404 y ficheros que no son imagen conservan la URL original
+        for event, path in ((events[3], '/falta.jpg'), (events[4], '/roto.jpg')):
+            self.assertEqual(event['evento']['imagen_url'], self.origin + path)
+            self.assertNotIn('imagen_original_url', event['evento'])
+
+        self.assertEqual(cache.stats['fetched'], 3)
+        self.assertEqual(cache.stats['deduplicated'], 1)
+        self.assertEqual(cache.stats['failed'], 2)
+        self.assertEqual(len(list(self.store.glob('*.webp'))), 4)
+        index = json.loads((self.store / 'index.json').read_text(encoding='utf-8'))
+        self.assertEqual(index[self.origin + '/cartel.jpg']['hash'], digest)
+        self.assertIn('failed_at', index[self.origin + '/falta.jpg'])
+
+    def test_second_run_reuses_store_without_downloading(self):
+        first = self.cache()
+        first.apply([self.event('/cartel.jpg')])
+        first.save()
+        PosterHandler.requests = []
+
+        second = self.cache()
+        # Un evento ya reescrito se resuelve por su imagen_original_url
+        events = [self.event('/cartel.jpg'), first.rewrite(self.event('/cartel.jpg'))]
+        second.apply(events)
+        self.assertEqual(PosterHandler.requests, [])
+        self.assertEqual(second.stats['hits'], 2)
+        self.assertEqual(events[0]['evento']['imagen_url'], events[1]['evento']['imagen_url'])
+
+    def test_failures_are_retried_after_ttl_and_unused_entries_purged(self):
+        cache = self.cache()
+        now = datetime(2026, 10, 1, 12, 0)
+        self.assertIsNone(cache.resolve(self.origin + '/falta.jpg', now))
+        self.assertIsNone(cache.resolve(self.origin + '/falta.jpg', now + timedelta(hours=1)))
+        self.assertEqual(PosterHandler.requests, ['/falta.jpg'])
+        cache.resolve(self.origin + '/falta.jpg', now + timedelta(hours=7))
+        self.assertEqual(len(PosterHandler.requests), 2)
+
+        digest = cache.resolve(self.origin + '/mini.jpg', now)
+        cache.save(now + timedelta(days=31))
+        self.assertEqual(list(self.store.glob('*.webp')), [])
+        self.assertNotIn(self.origin + '/mini.jpg', cache.index)
+        self.assertIsNotNone(digest)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+Trazas por etapa (Chrome trace / OTLP-JSON)
+===========================================
+Instrumentación ligera para saber en qué se va el tiempo de una ejecución:
+esperas de Firecrawl, parseo, deduplicación, transformación, escrituras en
+Firestore o notificaciones.
+
+    with TRACER.span('deduplicar', 'pipeline'):
+        ...
+
+    @traced('firecrawl')
+    def scrape_venue(...):
+        ...
+
+Desactivado no cuesta casi nada (una comprobación por llamada). Con
+`--trace` el scraper escribe al final un fichero que se abre en Perfetto
+(https://ui.perfetto.dev) o chrome://tracing:
+- formato 'chrome': trace-event JSON (eventos "X" con duración)
+- formato 'otlp': OTLP-JSON de OpenTelemetry (resourceSpans)
+
+Los spans de los procesos del pool de parseo se devuelven al proceso
+principal junto con el resultado (ver parse_pool.py).
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TRACE_FORMATS = ['chrome', 'otlp']
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+    """
+    Recolector de spans en memoria. Cada span es un dict plano (serializable)
+    para poder viajar entre procesos.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+        self._tracks: Dict[str, int] = {}
+
+    def enable(self, trace_id: str = None):
+        self.enabled = True
+        if trace_id:
+            self.trace_id = trace_id
+
+    def _track_id(self, track: str) -> int:
+        # Pistas sintéticas (p. ej. un worker asyncio) para que sus spans no se solapen
+        with self._lock:
+            return self._tracks.setdefault(track, 1_000_000 + len(self._tracks))
+
+    @contextmanager
+    def span(self, name: str, category: str = 'scraper', track: str = None, **attributes):
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        span = {
+            'name': name,
+            'cat': category,
+            'span_id': secrets.token_hex(8),
+            'parent_id': parent['span_id'] if parent else None,
+            'pid': os.getpid(),
+            'tid': self._track_id(track) if track else threading.get_ident(),
+            'thread': track or threading.current_thread().name,
+            'start_ns': time.time_ns(),
+            'args': {k: v for k, v in attributes.items() if v is not None},
+        }
+        token = _current_span.set(span)
+        started = time.perf_counter_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span['args']['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span['dur_ns'] = time.perf_counter_ns() - started
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def add_spans(self, spans: List[Dict]):
+        if spans:
+            with self._lock:
+                self.spans.extend(spans)
+
+    def drain(self) -> List[Dict]:
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    # ----- Exportación -----
+
+    def to_chrome(self) -> Dict:
+        events = []
+        threads = {}
+        for s in self.spans:
+            threads[(s['pid'], s['tid'])] = s['thread']
+            events.append({
+                'name': s['name'], 'cat': s['cat'], 'ph': 'X',
+                'ts': s['start_ns'] / 1000, 'dur': s['dur_ns'] / 1000,
+                'pid': s['pid'], 'tid': s['tid'], 'args': s['args'],
+            })
+        for (pid, tid), thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_otlp(self, service_name: str = 'partyfinder-scraper') -> Dict:
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {'key': key, 'value': {'boolValue': value}}
+            if isinstance(value, int):
+                return {'key': key, 'value': {'intValue': str(value)}}
+            if isinstance(value, float):
+                return {'key': key, 'value': {'doubleValue': value}}
+            return {'key': key, 'value': {'stringValue': str(value)}}
+
+        spans = []
+        for s in self.spans:
+            span = {
+                'traceId': self.trace_id,
+                'spanId': s['span_id'],
+                'name': s['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(s['start_ns']),
+                'endTimeUnixNano': str(s['start_ns'] + s['dur_ns']),
+                'attributes': [attribute('category', s['cat']), attribute('thread', s['thread']),
+                               attribute('process.pid', s['pid'])]
+                              + [attribute(k, v) for k, v in s['args'].items()],
+            }
+            if s['parent_id']:
+                span['parentSpanId'] = s['parent_id']
+            if 'error' in s['args']:
+                span['status'] = {'code': 2, 'message': s['args']['error']}
+            spans.append(span)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [attribute('service.name', service_name)]},
+            'scopeSpans': [{'scope': {'name': 'partyfinder.tracing'}, 'spans': spans}],
+        }]}
+
+    def export(self, path: Path, fmt: str = 'chrome') -> Path:
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Formato de traza desconocido: {fmt}")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.to_chrome() if fmt == 'chrome' else self.to_otlp()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    def summary(self, top: int = 10) -> List[str]:
+        """Tiempo total y número de llamadas por nombre de span, de mayor a menor."""
+        totals: Dict[str, List[float]] = {}
+        for s in self.spans:
+            entry = totals.setdefault(s['name'], [0, 0.0])
+            entry[0] += 1
+            entry[1] += s['dur_ns'] / 1e9
+        ranked = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return [f"{name:<32} {count:>6} llamadas {seconds:>9.2f}s" for name, (count, seconds) in ranked]
+
+
+TRACER = Tracer()
+
+
+def traced(category: str = 'scraper', name: str = None):
+    """
+    Decorador que envuelve la función en un span con su nombre.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with TRACER.span(span_name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def call_with_spans(fn, tracing: bool, trace_id: Optional[str], *args, **kwargs):
+    """
+    Ejecuta fn en un proceso del pool y devuelve (resultado, spans) para que
+    el proceso principal incorpore los spans del worker a su traza.
+    """
+    if not tracing:
+        return fn(*args, **kwargs), []
+    TRACER.enable(trace_id)
+    TRACER.drain()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        spans = TRACER.drain()
+    return result, spans
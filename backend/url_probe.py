@@ -0,0 +1,204 @@
+"""
+Sonda barata de existencia de URLs de eventos
+=============================================
+Las URLs que construye la heurística de emparejamiento de Sala Rem (nombre +
+fecha + código) fallan a menudo. Antes del scrape de detalles comprobamos en
+bloque si la URL existe y guardamos el veredicto en caché para próximas
+ejecuciones.
+
+Una sonda es cualquier callable `sonda(url) -> Optional[bool]`:
+    True  -> la URL existe (la página de detalle tiene contenido)
+    False -> la URL no existe (404/410)
+    None  -> no se puede saber (Cloudflare, timeout, página vacía...), se pasa a la siguiente
+
+Las páginas de FourVenues se pintan en el cliente: un 2xx por HTTP directo o un
+markdown vacío no dicen nada. La sonda de Firecrawl descarga la página de
+detalle completa y la deja en ProbePages para que el scrape de detalles la
+reutilice en vez de pagarla dos veces.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from firecrawl_metrics import metrics_scope
+
+PROBE_CACHE_PATH = Path(__file__).parent / "data" / "url_probe_cache.json"
+
+# Los veredictos positivos duran más: un evento publicado no suele desaparecer,
+# mientras que una URL inválida puede empezar a existir cuando se publique.
+VALID_TTL = timedelta(days=7)
+INVALID_TTL = timedelta(hours=12)
+
+# Códigos HTTP que indican con seguridad que la página no existe
+NOT_FOUND_STATUS = {404, 410}
+
+# Páginas descargadas por las sondas pendientes de reutilizar (las más antiguas se descartan)
+MAX_PROBE_PAGES = 256
+
+Probe = Callable[[str], Optional[bool]]
+
+
+class ProbePages:
+    """Páginas de detalle descargadas al sondear, hasta que el scrape de detalles las recoja."""
+
+    def __init__(self, max_pages: int = MAX_PROBE_PAGES):
+        self.max_pages = max_pages
+        self._pages: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, url: str, page: Dict):
+        with self._lock:
+            self._pages[url] = page
+            self._pages.move_to_end(url)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def take(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            return self._pages.pop(url, None)
+
+
+class HttpProbe:
+    """
+    Sonda directa por HTTP (HEAD y, si el servidor no lo admite, GET en streaming).
+    Es gratuita pero solo puede descartar (404/410): un 2xx es la carcasa de la
+    SPA y Cloudflare puede bloquearla; en ambos casos devuelve None.
+    """
+
+    def __init__(self, session=None, timeout: float = 6.0):
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers['User-Agent'] = 'Mozilla/5.0 (PartyFinder URL probe)'
+        self.session = session
+        self.timeout = timeout
+
+    def __call__(self, url: str) -> Optional[bool]:
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in (405, 501):
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                response.close()
+        except Exception:
+            return None
+
+        if response.status_code in NOT_FOUND_STATUS:
+            return False
+        # 2xx de la carcasa, 403/503 de Cloudflare, 429... no son concluyentes
+        return None
+
+
+class FirecrawlProbe:
+    """
+    Sonda vía Firecrawl: fetch(url) descarga la página de detalle completa (la
+    misma petición que el scrape de detalles, con su espera) y, si tiene
+    contenido, se guarda en pages para no volver a pagarla. Atraviesa Cloudflare.
+    """
+
+    def __init__(self, fetch: Callable[[str], Dict], pages: ProbePages):
+        self.fetch = fetch
+        self.pages = pages
+
+    def __call__(self, url: str) -> Optional[bool]:
+        try:
+            with metrics_scope(stage='sonda'):
+                page = self.fetch(url)
+        except Exception:
+            return None
+
+        if page.get('status_code') in NOT_FOUND_STATUS:
+            return False
+        # Una página vacía puede ser un render fallido: lo decide el scrape de detalles
+        if not (page.get('html') or page.get('markdown') or '').strip():
+            return None
+        self.pages.put(url, page)
+        return True
+
+
+class UrlProbeCache:
+    """
+    Caché persistente de veredictos {url: {"valid": bool, "checked_at": iso}}.
+    """
+
+    def __init__(self, path: Path = PROBE_CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"   ⚠️ Caché de sondas ilegible, se ignora: {e}")
+                self.entries = {}
+
+    def get(self, url: str, now: datetime = None) -> Optional[bool]:
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        now = now or datetime.now()
+        try:
+            checked_at = datetime.fromisoformat(entry['checked_at'])
+        except (KeyError, ValueError):
+            return None
+        ttl = VALID_TTL if entry.get('valid') else INVALID_TTL
+        if now - checked_at > ttl:
+            return None
+        return bool(entry.get('valid'))
+
+    def set(self, url: str, valid: bool, now: datetime = None):
+        self.entries[url] = {
+            'valid': valid,
+            'checked_at': (now or datetime.now()).isoformat(timespec='seconds')
+        }
+
+    def save(self):
+        # Purgar entradas caducadas para que el fichero no crezca sin límite
+        now = datetime.now()
+        self.entries = {url: e for url, e in self.entries.items() if self.get(url, now) is not None}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+
+
+def probe_urls(urls: List[str], probes: List[Probe], cache: UrlProbeCache = None,
+               max_workers: int = 8) -> Dict[str, Optional[bool]]:
+    """
+    Valida un bloque de URLs. Primero se consulta la caché y el resto se sondea en
+    paralelo probando cada sonda en orden hasta obtener un veredicto concluyente.
+    Las URLs sin veredicto (None) deben tratarse como "posiblemente válidas".
+    """
+    verdicts: Dict[str, Optional[bool]] = {}
+    pending = []
+    for url in dict.fromkeys(urls):
+        cached = cache.get(url) if cache else None
+        if cached is None:
+            pending.append(url)
+        else:
+            verdicts[url] = cached
+
+    def run_probes(url: str) -> Optional[bool]:
+        for probe in probes:
+            verdict = probe(url)
+            if verdict is not None:
+                return verdict
+        return None
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            for url, verdict in zip(pending, pool.map(run_probes, pending)):
+                verdicts[url] = verdict
+                if cache is not None and verdict is not None:
+                    cache.set(url, verdict)
+
+    if cache is not None:
+        cache.save()
+
+    hits = len(verdicts) - len(pending)
+    invalid = sum(1 for v in verdicts.values() if v is False)
+    print(f"   🔎 Sondas: {len(verdicts)} URLs ({hits} desde caché), {invalid} inválidas")
+    return verdicts
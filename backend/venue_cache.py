@@ -0,0 +1,109 @@
+"""
+Caché de metadatos de venues
+============================
+La dirección, ciudad, código postal y coordenadas salen del JSON-LD de cada
+página de detalle, pero son las mismas para todos los eventos de un venue.
+Se guardan una vez por venue_slug en data/venue_cache.json:
+
+    {"sala-rem": {"info": {"direccion", "ciudad", "codigo_postal", "latitud", "longitud"},
+                  "updated_at": iso}}
+
+Mientras la entrada está fresca, el parseo de detalles no busca el venue
+(evento marcado con `_venue_cached`) y todos los eventos del venue comparten
+el mismo dict `venue_info`, así la salida es coherente entre eventos.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+VENUE_CACHE_PATH = Path(__file__).parent / "data" / "venue_cache.json"
+
+# Una sala no se muda a menudo: se vuelve a extraer cada dos semanas
+VENUE_TTL = timedelta(days=14)
+
+VENUE_FIELDS = ('direccion', 'ciudad', 'codigo_postal', 'latitud', 'longitud')
+
+
+def useful_venue_info(info: Optional[Dict]) -> bool:
+    """Hay algo que cachear: dirección o coordenadas."""
+    return bool(info) and bool(info.get('direccion') or info.get('latitud') is not None)
+
+
+class VenueCache:
+    """
+    Metadatos por venue_slug. Es seguro usarla desde los hilos del scraper.
+    """
+
+    def __init__(self, path: Path = VENUE_CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"   ⚠️ Caché de venues ilegible, se ignora: {e}")
+                self.entries = {}
+
+    def info(self, slug: str) -> Optional[Dict]:
+        """venue_info guardado para el venue, tenga la edad que tenga."""
+        entry = self.entries.get(slug)
+        return entry['info'] if entry else None
+
+    def is_fresh(self, slug: str, now: datetime = None) -> bool:
+        entry = self.entries.get(slug)
+        if not entry:
+            return False
+        try:
+            updated_at = datetime.fromisoformat(entry['updated_at'])
+        except (KeyError, ValueError):
+            return False
+        return (now or datetime.now()) - updated_at <= VENUE_TTL
+
+    def mark(self, event: Dict, now: datetime = None) -> Dict:
+        """Evento listo para el parseo: con `_venue_cached` si no hace falta extraer el venue."""
+        if self.is_fresh(event.get('venue_slug', ''), now):
+            return dict(event, _venue_cached=True)
+        return event
+
+    def apply(self, event: Dict, now: datetime = None) -> Dict:
+        """
+        Tras el parseo: aprende el venue_info extraído si la entrada no está
+        fresca y deja en el evento el de la caché (la misma instancia para
+        todos los eventos del venue).
+        """
+        if event is None:
+            return event
+        event.pop('_venue_cached', None)
+        slug = event.get('venue_slug', '')
+        if not slug:
+            return event
+        extracted = event.get('venue_info')
+        with self._lock:
+            if useful_venue_info(extracted) and not self.is_fresh(slug, now):
+                self.entries[slug] = {
+                    'info': {field: extracted.get(field) for field in VENUE_FIELDS if field in extracted},
+                    'updated_at': (now or datetime.now()).isoformat(timespec='seconds'),
+                }
+            cached = self.info(slug)
+        if cached:
+            event['venue_info'] = cached
+        return event
+
+    def merge(self, other: 'VenueCache'):
+        """Añade las entradas de otra caché (p. ej. de un shard); gana la más reciente."""
+        with self._lock:
+            for slug, entry in other.entries.items():
+                current = self.entries.get(slug)
+                if not current or entry.get('updated_at', '') > current.get('updated_at', ''):
+                    self.entries[slug] = entry
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, ensure_ascii=False)
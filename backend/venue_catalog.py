@@ -0,0 +1,79 @@
+"""
+Catálogo de venues
+==================
+Los venues a scrapear viven en venues.json en lugar de en el código, para poder
+crecer a cientos de venues en varias ciudades. Cada entrada tiene:
+
+    slug     Identificador de FourVenues (el que aparece en la URL)
+    nombre   Nombre legible
+    ciudad   Ciudad por defecto de sus eventos
+    url      URL del listado de eventos
+    listing  (opcional) Formatos y escalera de reintentos propios, ver venue_ladder.py
+
+Para repartir el trabajo entre varios runners, cada venue se asigna a un shard
+de forma determinista a partir de su slug (`--shard i/N`).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+CATALOG_PATH = Path(__file__).parent / "venues.json"
+
+
+def load_venue_catalog(path: Path = CATALOG_PATH) -> List[Dict]:
+    """
+    Carga y valida el catálogo. Los slugs duplicados son un error de configuración.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        venues = json.load(f).get('venues', [])
+
+    seen = set()
+    for venue in venues:
+        for field in ('slug', 'url'):
+            if not venue.get(field):
+                raise ValueError(f"Venue sin '{field}' en {path}: {venue}")
+        if venue['slug'] in seen:
+            raise ValueError(f"Slug duplicado en {path}: {venue['slug']}")
+        seen.add(venue['slug'])
+    return venues
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Convierte "i/N" (1 <= i <= N) en (i, N).
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard inválido '{value}': formato esperado i/N, ej. 2/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard inválido '{value}': i debe estar entre 1 y N")
+    return index, count
+
+
+def shard_of(slug: str, count: int) -> int:
+    """
+    Shard (1..count) de un venue. Usa un hash estable (no hash() de Python, que
+    cambia entre procesos) para que cada runner calcule el mismo reparto.
+    """
+    digest = hashlib.md5(slug.encode('utf-8')).hexdigest()
+    return int(digest, 16) % count + 1
+
+
+def select_shard(venues: List[Dict], index: int, count: int) -> List[Dict]:
+    return [v for v in venues if shard_of(v['slug'], count) == index]
+
+
+def find_venue(venues: List[Dict], url_or_slug: str) -> Optional[Dict]:
+    """
+    Busca un venue por slug o por URL (de listado o de evento).
+    """
+    for venue in venues:
+        if url_or_slug == venue['slug'] or url_or_slug.rstrip('/') == venue['url'].rstrip('/'):
+            return venue
+    for venue in venues:
+        if f"/{venue['slug']}/" in url_or_slug:
+            return venue
+    return None
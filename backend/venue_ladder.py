@@ -0,0 +1,229 @@
+"""
+Escalera de reintentos y circuit breaker para los listados de venues
+===================================================================
+Cada venue se scrapea subiendo por una escalera de intentos cada vez más caros
+(intento rápido -> esperas largas -> scroll completo) y se para en el primer
+escalón que devuelve eventos.
+
+Por cada venue y escalón se guardan estadísticas (intentos, éxitos, latencia)
+en data/venue_stats.json. Con ellas:
+- se saltan escalones que nunca funcionan para ese venue (se vuelven a probar
+  de vez en cuando por si la web cambia);
+- un circuit breaker deja de scrapear durante un tiempo los venues que fallan
+  de forma dura (excepciones, sin HTML, HTTP >= 400) varias ejecuciones seguidas;
+- un venue que responde bien pero sin eventos varias ejecuciones seguidas
+  (cerrado por temporada, sin programación) solo prueba el escalón más barato,
+  con la escalera completa de vez en cuando.
+"""
+
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Escalones disponibles. Cada uno define las acciones de Firecrawl y el wait_for.
+LISTING_STEPS = {
+    'rapido': {
+        'actions': [
+            {"type": "wait", "milliseconds": 8000},
+            {"type": "scroll", "direction": "down", "amount": 500},
+            {"type": "wait", "milliseconds": 2000}
+        ],
+        'wait_for': 5000
+    },
+    'espera_larga': {
+        'actions': [
+            {"type": "wait", "milliseconds": 15000},
+            {"type": "scroll", "direction": "down", "amount": 1000},
+            {"type": "wait", "milliseconds": 5000}
+        ],
+        'wait_for': 10000
+    },
+    'scroll_completo': {
+        'actions': [
+            {"type": "wait", "milliseconds": 20000},
+            {"type": "scroll", "direction": "down", "amount": 1500},
+            {"type": "wait", "milliseconds": 8000},
+            {"type": "scroll", "direction": "down", "amount": 1500},
+            {"type": "wait", "milliseconds": 8000},
+            {"type": "scroll", "direction": "down", "amount": 1500},
+            {"type": "wait", "milliseconds": 8000}
+        ],
+        'wait_for': 20000
+    },
+}
+
+DEFAULT_LISTING_CONFIG = {
+    'formats': ["html"],
+    'ladder': ['rapido', 'espera_larga', 'scroll_completo']
+}
+
+# Configuración por venue (se busca el slug dentro de la URL)
+# Sala Rem carga todo por JS: necesita markdown/rawHtml y no tiene sentido el intento rápido
+VENUE_LISTING_CONFIG = {
+    'sala-rem': {
+        'formats': ["html", "markdown", "rawHtml"],
+        'ladder': ['scroll_completo', 'scroll_completo']
+    },
+}
+
+# Un escalón con MIN_ATTEMPTS_TO_SKIP intentos y ningún éxito se salta...
+MIN_ATTEMPTS_TO_SKIP = 5
+# ...salvo cada RETRY_SKIPPED_EVERY ejecuciones, para detectar si vuelve a funcionar
+RETRY_SKIPPED_EVERY = 10
+
+# Ejecuciones seguidas sin eventos (sin fallo duro) para dejar al venue solo con el escalón más barato
+EMPTY_RUNS_TO_SHORTEN = 3
+
+# Circuit breaker
+BREAKER_THRESHOLD = 3                  # Ejecuciones seguidas con fallo duro para abrir
+BREAKER_COOLDOWN = timedelta(hours=24)  # Primer periodo de enfriamiento
+BREAKER_MAX_COOLDOWN = timedelta(days=7)
+
+
+def get_listing_config(url: str, overrides: Dict = None) -> Dict:
+    """
+    Devuelve {'formats', 'ladder'} para la URL de un venue.
+    overrides (campo 'listing' del catálogo de venues) tiene prioridad.
+    """
+    if overrides:
+        unknown = [step for step in overrides.get('ladder', []) if step not in LISTING_STEPS]
+        if unknown:
+            raise ValueError(f"Escalones desconocidos para {url}: {unknown}")
+        return {**DEFAULT_LISTING_CONFIG, **overrides}
+    url_lower = url.lower()
+    for key, config in VENUE_LISTING_CONFIG.items():
+        if key in url_lower:
+            return {**DEFAULT_LISTING_CONFIG, **config}
+    return dict(DEFAULT_LISTING_CONFIG)
+
+
+class VenueStats:
+    """
+    Estadísticas persistentes por venue y escalón, más el estado del circuit breaker.
+    Con path=None solo se mantienen en memoria.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.data: Dict[str, Dict] = {}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                print(f"   ⚠️ Estadísticas de venues ilegibles, se reinician: {e}")
+                self.data = {}
+
+    def _venue(self, venue: str) -> Dict:
+        return self.data.setdefault(venue, {'steps': {}, 'breaker': {}})
+
+    def _step(self, venue: str, step: str) -> Dict:
+        return self._venue(venue)['steps'].setdefault(step, {
+            'attempts': 0,
+            'successes': 0,
+            'hard_failures': 0,
+            'skipped': 0,
+            'total_latency_s': 0.0,
+            'last_latency_s': None
+        })
+
+    # ----- Escalones -----
+
+    def should_skip(self, venue: str, step: str) -> bool:
+        """
+        True si el escalón no ha dado nunca resultados para este venue.
+        Cada RETRY_SKIPPED_EVERY saltos se deja pasar un intento de exploración.
+        """
+        stats = self._step(venue, step)
+        if stats['attempts'] < MIN_ATTEMPTS_TO_SKIP or stats['successes'] > 0:
+            return False
+        if stats['skipped'] >= RETRY_SKIPPED_EVERY:
+            stats['skipped'] = 0
+            return False
+        stats['skipped'] += 1
+        return True
+
+    def record_attempt(self, venue: str, step: str, latency_s: float, success: bool, hard_failure: bool):
+        stats = self._step(venue, step)
+        stats['attempts'] += 1
+        stats['total_latency_s'] = round(stats['total_latency_s'] + latency_s, 3)
+        stats['last_latency_s'] = round(latency_s, 3)
+        if success:
+            stats['successes'] += 1
+        if hard_failure:
+            stats['hard_failures'] += 1
+
+    def ladder_for(self, venue: str, ladder: List[str]) -> List[str]:
+        """
+        Escalera a usar en esta ejecución: la completa o, si el venue lleva
+        EMPTY_RUNS_TO_SHORTEN ejecuciones sin eventos, solo su primer escalón
+        (el más barato). Cada RETRY_SKIPPED_EVERY ejecuciones así se prueba entera.
+        """
+        quiet = self._venue(venue).setdefault('quiet', {})
+        if quiet.get('empty_runs', 0) < EMPTY_RUNS_TO_SHORTEN:
+            return ladder
+        if quiet.get('shortened', 0) >= RETRY_SKIPPED_EVERY:
+            quiet['shortened'] = 0
+            return ladder
+        quiet['shortened'] = quiet.get('shortened', 0) + 1
+        return ladder[:1]
+
+    # ----- Circuit breaker -----
+
+    def breaker_open_until(self, venue: str, now: datetime = None) -> Optional[datetime]:
+        """
+        Devuelve hasta cuándo está abierto el circuito del venue, o None si está cerrado.
+        """
+        open_until = self._venue(venue)['breaker'].get('open_until')
+        if not open_until:
+            return None
+        open_until = datetime.fromisoformat(open_until)
+        return open_until if (now or datetime.now()) < open_until else None
+
+    def record_run(self, venue: str, hard_failure: bool, now: datetime = None, empty: bool = False):
+        """
+        Registra el resultado global de una ejecución del venue y abre/cierra el
+        circuito. empty: la web respondió pero sin eventos.
+        """
+        now = now or datetime.now()
+        quiet = self._venue(venue).setdefault('quiet', {})
+        if empty and not hard_failure:
+            quiet['empty_runs'] = quiet.get('empty_runs', 0) + 1
+        elif not hard_failure:
+            quiet.clear()
+        breaker = self._venue(venue)['breaker']
+        if not hard_failure:
+            breaker.clear()
+            return
+
+        breaker['consecutive_failures'] = breaker.get('consecutive_failures', 0) + 1
+        if breaker['consecutive_failures'] >= BREAKER_THRESHOLD:
+            # Backoff exponencial: cada reapertura dobla el enfriamiento
+            previous = timedelta(hours=breaker.get('cooldown_h', 0))
+            cooldown = min(previous * 2, BREAKER_MAX_COOLDOWN) if previous else BREAKER_COOLDOWN
+            breaker['cooldown_h'] = cooldown.total_seconds() / 3600
+            breaker['open_until'] = (now + cooldown).isoformat(timespec='seconds')
+            print(f"   ⛔ Circuito abierto para {venue} durante {breaker['cooldown_h']:.0f}h "
+                  f"({breaker['consecutive_failures']} fallos duros seguidos)")
+
+    # ----- Persistencia / informe -----
+
+    def summary(self) -> List[str]:
+        lines = []
+        for venue, venue_data in sorted(self.data.items()):
+            for step, s in venue_data['steps'].items():
+                if not s['attempts']:
+                    continue
+                avg = s['total_latency_s'] / s['attempts']
+                rate = 100 * s['successes'] / s['attempts']
+                lines.append(f"{venue:<24} {step:<16} {s['attempts']:>4} intentos "
+                             f"{rate:>5.0f}% éxito  {avg:>6.1f}s media")
+        return lines
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
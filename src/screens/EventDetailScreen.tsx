@@ -210,7 +210,7 @@ export const EventDetailScreen: React.FC<EventDetailScreenProps> = ({ route, nav
           source={
             imageError
               ? require('../../assets/icon.png')
-              : { uri: party.imageUrl }
+              : { uri: party.imageDetailUrl || party.imageUrl }
           }
           style={styles.image}
           onError={() => setImageError(true)}
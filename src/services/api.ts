@@ -116,6 +116,7 @@ const transformData = (apiData: any[]): { venues: Venue[], parties: Party[] } =>
         ? Math.min(...ticketTypes.map(t => t.price).filter(p => p > 0))
         : 0,
       imageUrl: eventoData.imagen_url || eventoData.imageUrl || venue.imageUrl,
+      imageDetailUrl: eventoData.imagen_detalle_url,
       ticketUrl: eventoData.url_evento || eventoData.url_entradas || '',
       isAvailable: ticketTypes.length > 0 ? ticketTypes.some(t => t.isAvailable) : true,
       fewLeft: ticketTypes.some(t => t.fewLeft && t.isAvailable),
@@ -43,6 +43,7 @@ export interface Party {
   endTime: string; // HH:MM format
   price: number; // Precio mínimo para mostrar en la lista
   imageUrl: string;
+  imageDetailUrl?: string; // Variante grande del cartel (si el backend la genera)
   ticketUrl?: string;
   isAvailable: boolean;
   fewLeft?: boolean;